@@ -42,7 +42,9 @@ class Blog(models.Model):
     description = models.CharField(max_length=300, blank=True)
     
     cover_image = models.URLField(blank=True, null=True)
+    cover_image_variants = models.JSONField(default=dict, blank=True)
     blog_frame_image = models.URLField(blank=True, null=True)
+    blog_frame_image_variants = models.JSONField(default=dict, blank=True)
     
     tags = models.ManyToManyField('BlogTag', related_name="blogs", blank=True)
 
@@ -56,6 +58,10 @@ class Blog(models.Model):
 
     class Meta:
         ordering = ["-priority", "-created_at"]
+        indexes = [
+            # Keyset pagination of the public listing: (created_at, id) within published blogs
+            models.Index(fields=["is_published", "created_at"], name="blog_published_created_idx"),
+        ]
 
     def __str__(self):
         return self.title
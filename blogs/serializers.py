@@ -3,6 +3,7 @@
 from rest_framework import serializers
 from .models import BlogTag, Blog
 from common.constants import AUTH_TYPE_ADMIN
+from common.serializers import ImageSrcsetField
 
 class BlogTagSerializer(serializers.ModelSerializer):
     class Meta:
@@ -16,12 +17,15 @@ class BlogSerializer(serializers.ModelSerializer):
     tag_ids = serializers.PrimaryKeyRelatedField(
         queryset=BlogTag.objects.all(), write_only=True, many=True, source='tags'
     )
+    cover_image_srcset = ImageSrcsetField(source='cover_image_variants')
+    blog_frame_image_srcset = ImageSrcsetField(source='blog_frame_image_variants')
 
     class Meta:
         model = Blog
         fields = [
             'id', 'title', 'description', 'slug', 'content',
-            'cover_image', 'blog_frame_image',
+            'cover_image', 'cover_image_variants', 'cover_image_srcset',
+            'blog_frame_image', 'blog_frame_image_variants', 'blog_frame_image_srcset',
             'tags', 'tag_ids', 'published_date',
             'is_published', 'priority', 'views',
             'is_rejected', 'created_at', 'updated_at', 'author', 'user'
@@ -51,6 +55,8 @@ class BlogSerializer(serializers.ModelSerializer):
 
 class BlogListSerializer(serializers.ModelSerializer):
     tags = BlogTagSerializer(many=True, read_only=True)
+    cover_image_srcset = ImageSrcsetField(source='cover_image_variants')
+    blog_frame_image_srcset = ImageSrcsetField(source='blog_frame_image_variants')
 
     class Meta:
         model = Blog
@@ -1,3 +1,39 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.utils.http import http_date
 
-# Create your tests here.
+from blogs.models import Blog
+from misc.models import SearchDocument
+from misc.view_counter import apply_view_counts
+
+
+# Views are applied directly below instead of through the background flusher
+@override_settings(VIEW_COUNTER_ENABLED=False)
+class PublishedBlogDetailConditionalTests(TestCase):
+    def setUp(self):
+        self.blog = Blog.objects.create(title="Compost", slug="compost", is_published=True, views=4)
+        self.url = f"/api/blogs/published/{self.blog.pk}/"
+
+    def test_unchanged_blog_is_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["views"], 4)
+        self.assertNotIn("Last-Modified", response)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_flushed_views_change_the_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        apply_view_counts(SearchDocument.Kind.BLOG, {self.blog.pk: 3})
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["views"], 7)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_if_modified_since_alone_does_not_hide_new_views(self):
+        self.client.get(self.url)
+        apply_view_counts(SearchDocument.Kind.BLOG, {self.blog.pk: 3})
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=http_date(self.blog.updated_at.timestamp() + 60))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["views"], 7)
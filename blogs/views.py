@@ -7,18 +7,24 @@ from .serializers import BlogTagSerializer, BlogSerializer, BlogListSerializer
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework import generics
 from rest_framework.generics import ListAPIView
-from rest_framework.pagination import PageNumberPagination
+from common.pagination import OptionalKeysetPagination
 from user.models import UserAuth
 from common.views import CustomJWTAuthentication, IsAdminUser, IsAdminUser
+from common.utils.response_cache import cached_response
+from common.utils.conditional import conditional_response, detail_validators, list_validators
 from common.constants import S3_BLOG_BUCKET_NAME
-from common.utils.s3_utils import delete_image_from_s3, upload_image_to_s3
+from common.utils.s3_utils import delete_image_from_s3
+from common.utils.image_variants import upload_image_with_variants, delete_image_variants
+from common.utils.tag_filter import filter_by_tags, parse_tag_params, tag_facets
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.exceptions import PermissionDenied
-from misc.models import BlogNotification
+from misc.models import BlogNotification, SearchDocument
+from misc.search import filter_by_search
+from misc.view_counter import record_view
 from django.db import transaction, DatabaseError
 from django.utils import timezone 
+from functools import partial
 from datetime import date
-from django.db.models import Q
 
 
 class BlogTagListCreateView(APIView):
@@ -29,6 +35,7 @@ class BlogTagListCreateView(APIView):
             return [AllowAny()]
         return [IsAdminUser()]
 
+    @cached_response('blogs.blogtag')
     def get(self, request):
         tags = BlogTag.objects.all()
         serializer = BlogTagSerializer(tags, many=True)
@@ -168,7 +175,7 @@ class BlogDetailAPIView(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class PublishedBlogPagination(PageNumberPagination):
+class PublishedBlogPagination(OptionalKeysetPagination):
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 50
@@ -177,7 +184,7 @@ class PublishedBlogPagination(PageNumberPagination):
 class PublishedBlogListAPIView(APIView):
     permission_classes = [AllowAny]
 
-    class CustomPagination(PageNumberPagination):
+    class CustomPagination(OptionalKeysetPagination):
         page_size = 10
         page_size_query_param = 'page_size'
         max_page_size = 50
@@ -189,20 +196,21 @@ class PublishedBlogListAPIView(APIView):
         blogs = Blog.objects.filter(is_published=True, is_rejected=False).defer('content')
 
         # Apply search
+        rank_by_relevance = bool(search_query) and "sort" not in request.query_params
         if search_query:
-            blogs = blogs.filter(
-                Q(title__icontains=search_query) |
-                Q(description__icontains=search_query) |
-                Q(author__icontains=search_query)  # Optional: adjust based on your model
-            )
+            blogs = filter_by_search(blogs, SearchDocument.Kind.BLOG, search_query, rank=rank_by_relevance)
 
-        # Apply sorting
+        # Apply sorting (a search without an explicit sort stays in relevance order)
         allowed_sort_fields = ['created_at', 'title', '-created_at', '-title']
-        if sort_by in allowed_sort_fields:
-            blogs = blogs.order_by(sort_by)
-        else:
-            blogs = blogs.order_by('-created_at')  # Default fallback
+        if not rank_by_relevance:
+            if sort_by in allowed_sort_fields:
+                blogs = blogs.order_by(sort_by)
+            else:
+                blogs = blogs.order_by('-created_at')  # Default fallback
+
+        return conditional_response(request, list_validators(request, blogs), partial(self.build_page, request, blogs))
 
+    def build_page(self, request, blogs):
         paginator = self.CustomPagination()
         result_page = paginator.paginate_queryset(blogs, request)
         serializer = BlogSerializer(result_page, many=True)
@@ -213,40 +221,37 @@ class PublishedBlogListAPIViewByTags(APIView):
     permission_classes = [AllowAny]
     authentication_classes = []
 
-    class CustomPagination(PageNumberPagination):
+    class CustomPagination(OptionalKeysetPagination):
         page_size = 10
         page_size_query_param = 'page_size'
         max_page_size = 50
 
     def get(self, request):
-        tags_param = request.query_params.get("tags", "")
+        tag_values, match = parse_tag_params(request)
         search_query = request.query_params.get("search", "")
         sort_by = request.query_params.get("sort", "-created_at")
 
-        tag_names = [tag.strip() for tag in tags_param.split(",") if tag.strip()]
-        tag_qs = BlogTag.objects.filter(name__in=tag_names)
-
-        blogs = Blog.objects.filter(is_published=True).filter(tags__in=tag_qs).distinct().defer('content')
+        blogs = filter_by_tags(Blog.objects.filter(is_published=True), tag_values, match).defer('content')
 
         # Apply search
+        rank_by_relevance = bool(search_query) and "sort" not in request.query_params
         if search_query:
-            blogs = blogs.filter(
-                Q(title__icontains=search_query) |
-                Q(description__icontains=search_query) |
-                Q(author__icontains=search_query)
-            )
+            blogs = filter_by_search(blogs, SearchDocument.Kind.BLOG, search_query, rank=rank_by_relevance)
 
-        # Apply sorting
+        # Apply sorting (a search without an explicit sort stays in relevance order)
         allowed_sort_fields = ['created_at', 'title', '-created_at', '-title']
-        if sort_by in allowed_sort_fields:
-            blogs = blogs.order_by(sort_by)
-        else:
-            blogs = blogs.order_by('-created_at')
+        if not rank_by_relevance:
+            if sort_by in allowed_sort_fields:
+                blogs = blogs.order_by(sort_by)
+            else:
+                blogs = blogs.order_by('-created_at')
 
         paginator = self.CustomPagination()
         page = paginator.paginate_queryset(blogs, request)
         serializer = BlogSerializer(page, many=True)
-        return paginator.get_paginated_response(serializer.data)
+        response = paginator.get_paginated_response(serializer.data)
+        response.data['facets'] = tag_facets(blogs)
+        return response
 
 
 class PublishedBlogDetailAPIView(generics.RetrieveAPIView):
@@ -254,6 +259,17 @@ class PublishedBlogDetailAPIView(generics.RetrieveAPIView):
     serializer_class = BlogSerializer  # ✅ Includes content
     permission_classes = [AllowAny]
 
+    def retrieve(self, request, *args, **kwargs):
+        # Validate on (id, updated_at, views) first: `content` is only loaded for a 200.
+        # The view counter flush doesn't move updated_at, so views are validated too
+        row = get_object_or_404(self.get_queryset().values('pk', 'updated_at', 'views'), pk=kwargs['pk'])
+        record_view(SearchDocument.Kind.BLOG, row['pk'])
+        return conditional_response(
+            request,
+            detail_validators(request, row['pk'], row['updated_at'], row['views']),
+            partial(super().retrieve, request, *args, **kwargs),
+        )
+
 
 # user blogs
 class UserBlogListCreateAPIView(APIView):
@@ -355,11 +371,16 @@ class S3ImageManager(APIView):
             return Response({'error': 'No image file provided'}, status=400)
 
         bucket = S3_BLOG_BUCKET_NAME
-        response = upload_image_to_s3(image_file=image_file, folder=folder, bucket=bucket)
+        response = upload_image_with_variants(image_file=image_file, folder=folder, bucket=bucket)
 
         if not response['error']:
             print('Response message:', response['message'], 'url:', response['url'])
-            return Response({'message': response['message'], 'url': response['url'], 'key': response['key']}, status=200)
+            return Response({
+                'message': response['message'],
+                'url': response['url'],
+                'key': response['key'],
+                'variants': response['variants'],
+            }, status=200)
         
         if response['error']:
             print('Response error message:', response['message'])
@@ -379,6 +400,7 @@ class S3ImageManager(APIView):
         bucket = S3_BLOG_BUCKET_NAME
 
         response = delete_image_from_s3(bucket=bucket, image_key=image_key)
+        delete_image_variants(bucket=bucket, image_key=image_key)
 
         if not response['error']:
             print('Response message:', response['message'], image_key)
@@ -391,8 +413,8 @@ class S3ImageManager(APIView):
 
 
 
-import boto3
 from django.conf import settings
+from common.utils.storage import get_storage
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework import status
@@ -424,25 +446,16 @@ class ListS3Images(APIView):
     def get(self, request):
         folder = request.query_params.get('folder', 'cover/')  # default to 'cover/' folder
 
-        s3 = boto3.client(
-            's3',
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name=settings.AWS_S3_REGION_NAME
-        )
-
+        storage = get_storage()
         bucket_name = settings.AWS_STORAGE_BUCKET_NAME
 
         try:
-            response = s3.list_objects_v2(Bucket=bucket_name, Prefix=folder)
             files = []
 
-            for obj in response.get('Contents', []):
-                key = obj['Key']
+            for key in storage.list_keys(bucket_name, prefix=folder):
                 # Skip folders
                 if not key.endswith('/'):
-                    file_url = f"https://{bucket_name}.s3.amazonaws.com/{key}"
-                    files.append(file_url)
+                    files.append(storage.url_for(bucket_name, key))
 
             return Response({"images": files})
         except Exception as e:
@@ -28,6 +28,7 @@ class Book(models.Model):
 
     image_url = models.URLField(blank=True, null=True)
     image_key = models.CharField(max_length=255, blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True)
 
     tags = models.ManyToManyField(BookTag, related_name="books", blank=True)
     views = models.PositiveIntegerField(default=0)
@@ -39,6 +40,10 @@ class Book(models.Model):
 
     class Meta:
         ordering = ['priority', '-published_date']
+        indexes = [
+            # Keyset pagination of the public listing: (published_date, id) within published books
+            models.Index(fields=['is_published', 'published_date'], name='book_published_date_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -47,6 +52,7 @@ class Book(models.Model):
 class BooksHomeImages(models.Model):
     image_url = models.URLField(blank=True, null=True)
     image_key = models.CharField(max_length=255, blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True)
     priority = models.IntegerField(default=0)
 
     created_at = models.DateTimeField(auto_now_add=True)
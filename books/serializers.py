@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Book, BookTag, BooksHomeImages, BooksHomeDetails
+from common.serializers import ImageSrcsetField
 
 
 class BookTagSerializer(serializers.ModelSerializer):
@@ -13,6 +14,7 @@ class BookSerializer(serializers.ModelSerializer):
     tag_ids = serializers.PrimaryKeyRelatedField(
         queryset=BookTag.objects.all(), write_only=True, many=True, required=False
     )
+    image_srcset = ImageSrcsetField(source='image_variants')
 
     class Meta:
         model = Book
@@ -25,6 +27,8 @@ class BookSerializer(serializers.ModelSerializer):
             'affiliate_link',
             'image_url',
             'image_key',
+            'image_variants',
+            'image_srcset',
             'views',
             'priority',
             'is_published',
@@ -51,9 +55,11 @@ class BookSerializer(serializers.ModelSerializer):
 
 
 class BooksHomeImagesSerializer(serializers.ModelSerializer):
+    image_srcset = ImageSrcsetField(source='image_variants')
+
     class Meta:
         model = BooksHomeImages
-        fields = ['id', 'image_url', 'image_key', 'priority', 'created_at', 'updated_at']
+        fields = ['id', 'image_url', 'image_key', 'image_variants', 'image_srcset', 'priority', 'created_at', 'updated_at']
 
     def create(self, validated_data):
         return BooksHomeImages.objects.create(**validated_data)
@@ -7,12 +7,18 @@ from .serializers import BookSerializer, BookTagSerializer, BooksHomeImagesSeria
 from common.views import CustomJWTAuthentication, IsAdminUser
 from common.constants import S3_BOOKS_BUCKET_NAME, S3_BLOG_BUCKET_NAME
 from rest_framework.parsers import MultiPartParser, FormParser
-from common.utils.s3_utils import upload_image_to_s3, delete_image_from_s3
-from rest_framework.pagination import PageNumberPagination
+from common.utils.image_variants import upload_image_with_variants, delete_image_variants
+from common.utils.s3_utils import delete_image_from_s3
+from common.utils.tag_filter import filter_by_tags, parse_tag_params, tag_facets
+from common.utils.upload_engine import upload_files_to_s3
+from common.utils.response_cache import cached_response, invalidate_model
+from common.pagination import OptionalKeysetPagination
 from django.shortcuts import get_object_or_404
 import json
 from django.db import models
-from django.db.models import Q
+from misc.models import SearchDocument
+from misc.search import filter_by_search
+from misc.view_counter import record_view
 
 # Create your views here.
 
@@ -24,6 +30,7 @@ class BookTagListCreateView(APIView):
             return [AllowAny()]
         return [IsAdminUser()]
 
+    @cached_response('books.booktag')
     def get(self, request):
         tags = BookTag.objects.all().order_by("name")
         serializer = BookTagSerializer(tags, many=True)
@@ -96,6 +103,7 @@ class HomePublicBookImageView(APIView):
     authentication_classes = []
     permission_classes = [AllowAny]
 
+    @cached_response('books.bookshomeimages')
     def get(self, request):
         """
         List all images in the BooksHomeImages model.
@@ -109,6 +117,7 @@ class HomePublicBookView(APIView):
     authentication_classes = []
     permission_classes = [AllowAny]
 
+    @cached_response('books.bookshomedetails')
     def get(self, request):
         try:
             book = BooksHomeDetails.objects.filter(is_published=True).latest("published_date")
@@ -155,7 +164,7 @@ class HomeAdminBookView(APIView):
 
 
 
-class StandardResultsSetPagination(PageNumberPagination):
+class StandardResultsSetPagination(OptionalKeysetPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 100
@@ -174,13 +183,13 @@ class PublicPublishedBooksAPIView(APIView):
 
         books = Book.objects.filter(is_published=True)
 
+        # A search without an explicit sort is ordered by relevance
+        rank_by_relevance = bool(search_query) and "sort" not in request.query_params
         if search_query:
-            books = books.filter(
-                Q(title__icontains=search_query) |
-                Q(author_name__icontains=search_query)
-            )
+            books = filter_by_search(books, SearchDocument.Kind.BOOK, search_query, rank=rank_by_relevance)
 
-        books = books.order_by(ordering)
+        if not rank_by_relevance:
+            books = books.order_by(ordering)
 
         paginator = StandardResultsSetPagination()
         page = paginator.paginate_queryset(books, request)
@@ -194,29 +203,27 @@ class PublicPublishedBooksAPIViewByTags(APIView):
     authentication_classes = []
 
     def get(self, request):
-        tags_param = request.query_params.get("tags", "")
+        tag_values, match = parse_tag_params(request)
         search_query = request.query_params.get("search", "")
         sort_order = request.query_params.get("sort", "newest")
 
-        tag_names = [tag.strip() for tag in tags_param.split(",") if tag.strip()]
-        tag_qs = BookTag.objects.filter(name__in=tag_names)
-
         ordering = "-published_date" if sort_order == "newest" else "published_date"
 
-        books = Book.objects.filter(is_published=True, tags__in=tag_qs)
+        books = filter_by_tags(Book.objects.filter(is_published=True), tag_values, match)
 
+        rank_by_relevance = bool(search_query) and "sort" not in request.query_params
         if search_query:
-            books = books.filter(
-                Q(title__icontains=search_query) |
-                Q(author_name__icontains=search_query)
-            )
+            books = filter_by_search(books, SearchDocument.Kind.BOOK, search_query, rank=rank_by_relevance)
 
-        books = books.distinct().order_by(ordering)
+        if not rank_by_relevance:
+            books = books.order_by(ordering)
 
         paginator = StandardResultsSetPagination()
         page = paginator.paginate_queryset(books, request)
         serializer = BookSerializer(page, many=True)
-        return paginator.get_paginated_response(serializer.data)
+        response = paginator.get_paginated_response(serializer.data)
+        response.data['facets'] = tag_facets(books)
+        return response
 
 
 
@@ -226,6 +233,7 @@ class PublicPublishedBookDetailAPIView(APIView):
 
     def get(self, request, pk):
         book = get_object_or_404(Book, pk=pk, is_published=True)
+        record_view(SearchDocument.Kind.BOOK, book.pk)
         serializer = BookSerializer(book)
         return Response(serializer.data, status=200)
 
@@ -251,13 +259,14 @@ class S3BooksImageManager(APIView):
             return Response({'error': 'No file provided'}, status=400)
 
         bucket = S3_BLOG_BUCKET_NAME
-        response = upload_image_to_s3(image_file=upload_file, folder=folder, bucket=bucket)
+        response = upload_image_with_variants(image_file=upload_file, folder=folder, bucket=bucket)
 
         if not response['error']:
             return Response({
                 'message': response['message'],
                 'url': response['url'],
-                'key': response['key']
+                'key': response['key'],
+                'variants': response['variants'],
             }, status=200)
         
         return Response({'message': response['message']}, status=400)
@@ -274,6 +283,7 @@ class S3BooksImageManager(APIView):
 
         bucket = S3_BLOG_BUCKET_NAME
         response = delete_image_from_s3(bucket=bucket, image_key=file_key)
+        delete_image_variants(bucket=bucket, image_key=file_key)
 
         if not response['error']:
             return Response({'message': response['message']}, status=200)
@@ -314,26 +324,37 @@ class S3BooksHomeImageManager(APIView):
         # Get current max priority (or -1 if none exist)
         max_priority = BooksHomeImages.objects.aggregate(max_priority=models.Max('priority'))['max_priority'] or -1
 
-        for index, file in enumerate(files):
-            response = upload_image_to_s3(image_file=file, folder=folder, bucket=bucket)
-            if not response['error']:
-                priority = max_priority + 1 + index  # Always append after the last priority
-                image_obj = BooksHomeImages.objects.create(
-                    image_url=response['url'],
-                    image_key=response['key'],
-                    priority=priority,
-                )
-                uploaded.append({
-                    'message': response['message'],
-                    'url': response['url'],
-                    'key': response['key'],
-                    'priority': image_obj.priority,
-                })
+        failed = []
+        image_objs = []
+
+        # Files upload concurrently, results come back in request order
+        for response in upload_files_to_s3(files, folder=folder, bucket=bucket, variants=True):
+            if response['error']:
+                failed.append({'name': response['name'], 'message': response['message']})
+                continue
+
+            priority = max_priority + 1 + response['index']  # Always append after the last priority
+            image_objs.append(BooksHomeImages(
+                image_url=response['url'],
+                image_key=response['key'],
+                image_variants=response['variants'],
+                priority=priority,
+            ))
+            uploaded.append({
+                'message': response['message'],
+                'url': response['url'],
+                'key': response['key'],
+                'variants': response['variants'],
+                'priority': priority,
+            })
+
+        BooksHomeImages.objects.bulk_create(image_objs)
+        invalidate_model(BooksHomeImages)
 
         if uploaded:
-            return Response({'uploaded': uploaded}, status=200)
+            return Response({'uploaded': uploaded, 'failed': failed}, status=200)
         else:
-            return Response({'message': 'No files uploaded successfully'}, status=400)
+            return Response({'message': 'No files uploaded successfully', 'failed': failed}, status=400)
 
 
     def patch(self, request):
@@ -406,6 +427,7 @@ class S3BooksHomeImageManager(APIView):
 
         bucket = S3_BLOG_BUCKET_NAME
         response = delete_image_from_s3(bucket=bucket, image_key=file_key)
+        delete_image_variants(bucket=bucket, image_key=file_key)
 
         if not response['error']:
             BooksHomeImages.objects.filter(image_key=file_key).delete()
@@ -9,4 +9,17 @@ S3_MAGAZINE_BUCKET_NAME="worthminds-magazines"
 S3_CONTRIBUTORS_BUCKET_NAME="worthminds-contributors"
 S3_PODCASTS_BUCKET_NAME="worthminds-podcasts"
 S3_BOOKS_BUCKET_NAME="worthminds-books"
-S3_USER_BUCKET_NAME="worthminds-user"
\ No newline at end of file
+S3_USER_BUCKET_NAME="worthminds-user"
+
+# Content types accepted by presigned direct uploads
+DIRECT_UPLOAD_AUDIO_CONTENT_TYPES=['audio/*']
+DIRECT_UPLOAD_DOCUMENT_CONTENT_TYPES=[
+    'application/pdf',
+    'application/msword',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'image/*',
+]
+DIRECT_UPLOAD_NOMINATION_CONTENT_TYPES=['application/pdf', 'image/*']
+
+DIRECT_UPLOAD_PODCAST_AUDIO_FOLDER="podcasts/audio"
+DIRECT_UPLOAD_EVENT_DOCUMENT_FOLDER="eventforms/documents"
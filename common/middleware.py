@@ -0,0 +1,138 @@
+# common/middleware.py
+
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+
+logger = logging.getLogger('common.queries')
+
+# `IN (%s, %s, %s)` -> `IN (...)` so lookups over different-sized id lists share a template
+_IN_LIST = re.compile(r'\bIN \((?:%s, )*%s\)')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class _QueryRecorder:
+    """execute_wrapper that counts queries, DB time and repeated SQL templates."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.templates = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.templates[_IN_LIST.sub('IN (...)', sql)] += 1
+
+    def repeated(self, threshold):
+        return [(sql, n) for sql, n in self.templates.most_common() if n >= threshold]
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    return match._func_path
+
+
+def _query_budget(request):
+    """
+    Allowed queries for the resolved view: a `query_budget` attribute on the
+    view class / function wins, then QUERY_BUDGETS[url name or dotted path],
+    then QUERY_BUDGET_DEFAULT. None means unlimited.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+
+    view = getattr(match.func, 'view_class', match.func)
+    budget = getattr(view, 'query_budget', None)
+    if budget is not None:
+        return budget
+
+    budgets = settings.QUERY_BUDGETS
+    for key in (match.view_name, match._func_path):
+        if key in budgets:
+            return budgets[key]
+    return settings.QUERY_BUDGET_DEFAULT
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Counts SQL queries and DB time per request on every database alias.
+
+    - Adds `Server-Timing: db;dur=..;desc="N queries", app;dur=..`.
+    - Logs one JSON line per request on the `common.queries` logger, with
+      the SQL templates that ran QUERY_REPEAT_THRESHOLD+ times (N+1 suspects).
+    - Checks the view's query budget; QUERY_BUDGET_ACTION 'log' warns and
+      'raise' fails the request with QueryBudgetExceeded (for tests / CI).
+
+    Queries run while a streaming response is consumed are not counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.QUERY_INSTRUMENTATION_ENABLED:
+            return self.get_response(request)
+
+        recorder = _QueryRecorder()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        db_ms = recorder.duration * 1000
+        response['Server-Timing'] = (
+            f'db;dur={db_ms:.1f};desc="{recorder.count} queries", '
+            f'app;dur={(total - recorder.duration) * 1000:.1f}'
+        )
+
+        repeated = recorder.repeated(settings.QUERY_REPEAT_THRESHOLD)
+        budget = _query_budget(request)
+        over_budget = budget is not None and recorder.count > budget
+
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': _view_name(request),
+            'status': response.status_code,
+            'queries': recorder.count,
+            'db_ms': round(db_ms, 1),
+            'total_ms': round(total * 1000, 1),
+        }
+        if budget is not None:
+            record['budget'] = budget
+        if response.has_header('X-Cache'):
+            record['cache'] = response['X-Cache'].lower()
+        if repeated:
+            record['repeated'] = [{'sql': sql[:300], 'count': n} for sql, n in repeated]
+
+        line = json.dumps(record)
+        if over_budget or repeated:
+            logger.warning(line)
+        else:
+            logger.info(line)
+
+        if over_budget and settings.QUERY_BUDGET_ACTION == 'raise':
+            raise QueryBudgetExceeded(
+                f"{record['view']} ran {recorder.count} queries, budget is {budget}"
+            )
+        return response
@@ -0,0 +1,221 @@
+# common/pagination.py
+
+import base64
+import binascii
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over the queryset's own ordering plus the primary key.
+
+    The next page is selected with `WHERE (sort_key, id) > (last_sort_key, last_id)`
+    instead of an OFFSET, and no COUNT(*) is issued, so every page costs the
+    same however deep it is. Cursors are opaque base64 tokens; clients only
+    follow the `next` / `previous` links.
+
+    Orderings that cannot be expressed as a keyset (relevance-ranked search
+    results, ordering across relations) fall back to an offset carried in
+    the cursor, with the same response shape.
+    """
+
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 50
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                return _positive_int(
+                    request.query_params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size,
+                )
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.size = self.get_page_size(request)
+        self.next_cursor = self.previous_cursor = None
+
+        cursor = self.decode_cursor(request)
+        ordering = self.get_keyset_ordering(queryset)
+        if ordering is None:
+            return self._paginate_by_offset(queryset, cursor)
+        return self._paginate_by_keyset(queryset, ordering, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_link(self.next_cursor),
+            'previous': self.get_link(self.previous_cursor),
+            'results': data,
+        })
+
+    # Ordering
+
+    def get_keyset_ordering(self, queryset):
+        """
+        [(field, descending), ...] ending with the primary key, or None when
+        the queryset's ordering is not made of plain local fields.
+        """
+        query = queryset.query
+        if query.order_by:
+            order_by = query.order_by
+        elif query.default_ordering:
+            order_by = queryset.model._meta.ordering
+        else:
+            order_by = []
+
+        opts = queryset.model._meta
+        ordering = []
+        for item in order_by:
+            if not isinstance(item, str) or item == '?':
+                return None
+            descending = item.startswith('-')
+            name = item.lstrip('-')
+            if name == 'pk':
+                name = opts.pk.name
+            try:
+                field = opts.get_field(name)
+            except FieldDoesNotExist:
+                return None
+            if field.is_relation or field.null:
+                # NULLs sort differently per database and can't be compared with > / <
+                return None
+            ordering.append((field, descending))
+
+        if not any(field.primary_key for field, _ in ordering):
+            # Tie-breaker so rows sharing a sort value are neither skipped nor repeated
+            ordering.append((opts.pk, ordering[-1][1] if ordering else True))
+        return ordering
+
+    # Keyset mode
+
+    def _paginate_by_keyset(self, queryset, ordering, cursor):
+        backwards = bool(cursor and cursor.get('p'))
+        if backwards:
+            ordering = [(field, not descending) for field, descending in ordering]
+
+        queryset = queryset.order_by(*[('-' if descending else '') + field.name for field, descending in ordering])
+        if cursor is not None:
+            queryset = queryset.filter(self._after(ordering, self._load_keys(ordering, cursor)))
+
+        rows = list(queryset[:self.size + 1])
+        has_more = len(rows) > self.size
+        rows = rows[:self.size]
+        if backwards:
+            rows.reverse()
+
+        if rows:
+            has_next = has_more or backwards
+            has_previous = has_more if backwards else cursor is not None
+            if has_next:
+                self.next_cursor = {'k': self._dump_keys(ordering, rows[-1])}
+            if has_previous:
+                self.previous_cursor = {'k': self._dump_keys(ordering, rows[0]), 'p': 1}
+        return rows
+
+    @staticmethod
+    def _after(ordering, keys):
+        """(f1, f2, ...) > (k1, k2, ...) honouring each field's direction."""
+        condition = Q()
+        equal = {}
+        for (field, descending), key in zip(ordering, keys):
+            condition |= Q(**equal, **{f"{field.name}__{'lt' if descending else 'gt'}": key})
+            equal[field.name] = key
+        return condition
+
+    @staticmethod
+    def _dump_keys(ordering, row):
+        keys = []
+        for field, _ in ordering:
+            value = getattr(row, field.attname)
+            keys.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        return keys
+
+    def _load_keys(self, ordering, cursor):
+        keys = cursor.get('k')
+        if not isinstance(keys, list) or len(keys) != len(ordering):
+            # Cursor from another sort order, or tampered with
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            return [field.to_python(key) for (field, _), key in zip(ordering, keys)]
+        except ValidationError:
+            raise NotFound(self.invalid_cursor_message)
+
+    # Offset fallback
+
+    def _paginate_by_offset(self, queryset, cursor):
+        offset = (cursor or {}).get('o', 0)
+        if not isinstance(offset, int) or offset < 0:
+            raise NotFound(self.invalid_cursor_message)
+
+        rows = list(queryset[offset:offset + self.size + 1])
+        if len(rows) > self.size:
+            self.next_cursor = {'o': offset + self.size}
+        if offset:
+            self.previous_cursor = {'o': max(0, offset - self.size)}
+        return rows[:self.size]
+
+    # Cursor encoding
+
+    def decode_cursor(self, request):
+        """The cursor payload, or None for the first page (`?cursor=` or no value)."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+        except (binascii.Error, UnicodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(payload, dict):
+            raise NotFound(self.invalid_cursor_message)
+        return payload
+
+    @staticmethod
+    def encode_cursor(payload):
+        return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode('ascii')
+
+    def get_link(self, cursor):
+        if cursor is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), 'page')
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(cursor))
+
+
+class OptionalKeysetPagination(PageNumberPagination):
+    """
+    Page-number pagination that switches to KeysetPagination when the
+    request carries a `cursor` parameter (`?cursor=` for the first page).
+
+    Page-number responses keep their `count`; keyset responses have only
+    `next`, `previous` and `results`.
+    """
+
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            self.keyset.page_size = self.page_size
+            self.keyset.page_size_query_param = self.page_size_query_param
+            self.keyset.max_page_size = self.max_page_size
+            return self.keyset.paginate_queryset(queryset, request, view=view)
+        return super().paginate_queryset(queryset, request, view=view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,19 @@
+from rest_framework import serializers
+
+from common.utils.image_variants import build_srcset
+
+
+class ImageSrcsetField(serializers.Field):
+    """
+    Read-only `srcset` strings for an `*_image_variants` map, one per format:
+    {'webp': 'https://.../a_320w.webp 320w, https://.../a_640w.webp 640w', 'jpeg': '...'}
+
+    Usage: `cover_image_srcset = ImageSrcsetField(source='cover_image_variants')`
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return {fmt: build_srcset(value, fmt) for fmt in (value or {})}
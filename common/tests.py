@@ -1,3 +1,125 @@
-from django.test import TestCase
+import io
+import os
+import shutil
+import tempfile
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+
+from common.utils import storage
+from common.utils.s3_utils import delete_image_from_s3, upload_image_to_s3
+from common.utils.storage import LocalStorageBackend, S3StorageBackend, get_storage, reset_storage
+
+
+class LocalStorageBackendTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.backend = LocalStorageBackend(root=self.root, base_url="/media/test/")
+
+    def test_upload_download_and_delete(self):
+        self.backend.upload_fileobj(io.BytesIO(b"hello"), "bucket", "blogs/a.txt", content_type="text/plain")
+        self.assertTrue(os.path.isfile(os.path.join(self.root, "bucket", "blogs", "a.txt")))
+
+        downloaded = io.BytesIO()
+        self.backend.download_fileobj("bucket", "blogs/a.txt", downloaded)
+        self.assertEqual(downloaded.getvalue(), b"hello")
+        self.assertEqual(list(self.backend.list_keys("bucket", prefix="blogs/")), ["blogs/a.txt"])
+
+        self.backend.delete_object("bucket", "blogs/a.txt")
+        self.assertFalse(os.path.exists(os.path.join(self.root, "bucket", "blogs", "a.txt")))
+        # Deleting a missing object is a no-op, as on S3
+        self.backend.delete_object("bucket", "blogs/a.txt")
+
+    def test_head_object(self):
+        self.assertIsNone(self.backend.head_object("bucket", "cover.png"))
+        self.backend.upload_fileobj(io.BytesIO(b"12345"), "bucket", "cover.png")
+        self.assertEqual(self.backend.head_object("bucket", "cover.png"),
+                         {"size": 5, "content_type": "image/png", "etag": ""})
+
+    def test_url_generation(self):
+        self.assertEqual(self.backend.url_for("bucket", "blogs/a.png"), "/media/test/bucket/blogs/a.png")
+        post = self.backend.generate_presigned_post("bucket", "blogs/a.png", "image/png", 1024, 60)
+        self.assertEqual(post["url"], "/media/test/bucket/blogs/a.png")
+        self.assertEqual(post["fields"], {"key": "blogs/a.png", "Content-Type": "image/png"})
+        put = self.backend.generate_presigned_put("bucket", "blogs/a.png", "image/png", 1024, 60)
+        self.assertEqual(put, {"url": "/media/test/bucket/blogs/a.png", "headers": {"Content-Type": "image/png"}})
+
+    def test_keys_cannot_escape_the_bucket(self):
+        for key in ("../other/a.txt", "/etc/passwd", "a/../../b.txt"):
+            with self.assertRaises(ValueError):
+                self.backend.upload_fileobj(io.BytesIO(b"x"), "bucket", key)
+        self.assertFalse(os.path.exists(os.path.join(self.root, "other")))
+
+
+class StorageSelectionTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        settings_override = override_settings(FILE_STORAGE_BACKEND="local", LOCAL_STORAGE_ROOT=self.root,
+                                              LOCAL_STORAGE_BASE_URL="/media/test/")
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        reset_storage()
+        self.addCleanup(reset_storage)
+
+    def test_upload_and_delete_through_the_configured_backend(self):
+        image = SimpleUploadedFile("cover.png", b"png-bytes", content_type="image/png")
+        result = upload_image_to_s3(image, "blogs", "bucket")
+        self.assertFalse(result["error"], result["message"])
+        self.assertTrue(result["key"].startswith("blogs/") and result["key"].endswith(".png"))
+        self.assertEqual(result["url"], f"/media/test/bucket/{result['key']}")
+        self.assertEqual(get_storage().head_object("bucket", result["key"])["size"], len(b"png-bytes"))
+
+        result = delete_image_from_s3("bucket", result["key"])
+        self.assertFalse(result["error"], result["message"])
+        self.assertEqual(list(get_storage().list_keys("bucket")), [])
+
+    def test_backend_is_a_process_wide_singleton(self):
+        backends = []
+        threads = [threading.Thread(target=lambda: backends.append(get_storage())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertIsInstance(get_storage(), LocalStorageBackend)
+        self.assertTrue(all(backend is get_storage() for backend in backends))
+
+    def test_reset_storage_picks_up_new_settings(self):
+        first = get_storage()
+        self.assertIs(get_storage(), first)
+        with override_settings(LOCAL_STORAGE_ROOT=os.path.join(self.root, "other")):
+            reset_storage()
+            self.assertIsNot(get_storage(), first)
+            self.assertEqual(get_storage().root, os.path.join(self.root, "other"))
+
+    def test_unknown_backend(self):
+        with override_settings(FILE_STORAGE_BACKEND="ftp"):
+            reset_storage()
+            with self.assertRaises(ValueError):
+                get_storage()
+
+
+class S3ClientPoolTests(SimpleTestCase):
+    def test_client_is_built_once_and_shared_across_threads(self):
+        backend = S3StorageBackend()
+        with mock.patch.object(S3StorageBackend, "_build_client", side_effect=lambda: object()) as build:
+            clients = []
+            threads = [threading.Thread(target=lambda: clients.append(backend.client)) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(build.call_count, 1)
+        self.assertTrue(all(client is clients[0] for client in clients))
+
+    def test_client_is_rebuilt_after_fork(self):
+        backend = S3StorageBackend()
+        with mock.patch.object(S3StorageBackend, "_build_client", side_effect=lambda: object()) as build:
+            parent_client = backend.client
+            with mock.patch.object(storage.os, "getpid", return_value=os.getpid() + 1):
+                child_client = backend.client
+        self.assertEqual(build.call_count, 2)
+        self.assertIsNot(parent_client, child_client)
@@ -0,0 +1,14 @@
+# common/utils/cache_backend.py
+#
+# Whether the default Django cache is shared by every worker process. Caches
+# that rely on invalidation (a signal deleting or bumping a key) are only
+# correct when it is: with a per-process LocMemCache the delete only reaches
+# the worker that handled the write, and the others keep serving the old
+# value until it expires. Such caches check this and fall back to reading
+# the database instead.
+
+from django.conf import settings
+
+
+def cache_is_shared():
+    return settings.CACHE_SHARED
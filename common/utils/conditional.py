@@ -0,0 +1,72 @@
+# common/utils/conditional.py
+#
+# Conditional GET (ETag / Last-Modified -> 304) for read endpoints. Validators
+# come from one cheap query, before anything is loaded or serialized:
+#
+#   - details: the row's (id, updated_at)
+#   - lists:   Max(updated_at) and Count over the filtered queryset, so an
+#              edit, an addition and a removal each change the ETag
+#
+# Both are mixed with the full request path, so every page / filter / window
+# has its own ETag. A matching If-None-Match (or, without one, a recent enough
+# If-Modified-Since) is answered with an empty 304 and the body is never
+# built. Writes that change what an endpoint returns without saving the row
+# it is validated on (e.g. magazine pages) call touch_updated_at().
+#
+# Counters updated in place (views, registrations) don't move updated_at.
+# Detail endpoints that return one pass it to detail_validators as well, so
+# the ETag changes with it; elsewhere clients may see counters lag until the
+# row next changes.
+
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def make_etag(*parts):
+    digest = hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def detail_validators(request, pk, updated_at, *counters):
+    """
+    (etag, last_modified) of one row. `counters` are values the body shows
+    that change without moving updated_at (e.g. views): they go into the
+    ETag, and Last-Modified is left out since updated_at no longer covers
+    everything the body shows.
+    """
+    if counters:
+        return make_etag(request.get_full_path(), pk, updated_at, *counters), None
+    return make_etag(request.get_full_path(), pk, updated_at), updated_at
+
+
+def list_validators(request, queryset, field='updated_at'):
+    """(etag, last_modified) of a filtered queryset, in one aggregate query."""
+    stats = queryset.order_by().aggregate(last_modified=Max(field), count=Count('pk'))
+    return make_etag(request.get_full_path(), stats['count'], stats['last_modified']), stats['last_modified']
+
+
+def conditional_response(request, validators, build):
+    """
+    304 when the client's copy is current, otherwise `build()`. Either way
+    the response carries ETag and Last-Modified.
+    """
+    etag, last_modified = validators
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = build()
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+    return response
+
+
+def touch_updated_at(model, pk):
+    """Move a row's updated_at without saving it (no signals, one UPDATE)."""
+    model.objects.filter(pk=pk).update(updated_at=timezone.now())
@@ -0,0 +1,144 @@
+import math
+import uuid
+
+from django.conf import settings
+
+from common.utils.storage import MB, get_storage
+
+
+# S3 rejects multipart uploads with more parts than this
+S3_MAX_PARTS = 10000
+
+
+def is_allowed_content_type(content_type, allowed_content_types):
+    """Match a content type against a list such as ['application/pdf', 'image/*']."""
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    if not content_type:
+        return False
+    for allowed in allowed_content_types:
+        if allowed.endswith('/*'):
+            if content_type.startswith(allowed[:-1]):
+                return True
+        elif content_type == allowed:
+            return True
+    return False
+
+
+def issue_direct_upload(bucket, folder, filename, content_type, size, allowed_content_types, max_size_bytes, method=None):
+    """
+    Issue a presigned target so the client uploads straight to S3.
+
+    `method` is 'post' (browser form upload, default), 'put' (single request)
+    or 'multipart' (presigned part URLs). Files larger than
+    DIRECT_UPLOAD_MULTIPART_THRESHOLD_MB always use multipart, which is
+    refused when the storage backend does not support it.
+
+    Returns the same {'error', 'message', ...} shape as the s3_utils helpers.
+    """
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        return {'error': True, 'message': '`size` must be an integer number of bytes'}
+
+    if size <= 0:
+        return {'error': True, 'message': '`size` must be greater than 0'}
+    if size > max_size_bytes:
+        return {'error': True, 'message': f'File exceeds size limit of {max_size_bytes // MB} MB'}
+    if not is_allowed_content_type(content_type, allowed_content_types):
+        return {'error': True, 'message': f'Unsupported file type `{content_type}`'}
+
+    if size > settings.DIRECT_UPLOAD_MULTIPART_THRESHOLD_MB * MB:
+        method = 'multipart'
+    method = method or 'post'
+    if method not in ('post', 'put', 'multipart'):
+        return {'error': True, 'message': '`method` must be one of post, put or multipart'}
+    storage = get_storage()
+    if method == 'multipart' and not storage.supports_multipart:
+        return {'error': True, 'message': f'Multipart uploads are not supported by the `{storage.name}` storage backend'}
+
+    ext = filename.split('.')[-1].lower() if '.' in filename else 'bin'
+    key = f"{folder}/{uuid.uuid4()}.{ext}"
+    expires_in = settings.DIRECT_UPLOAD_EXPIRES_SECONDS
+
+    target = {
+        'error': False,
+        'message': 'Upload target issued',
+        'method': method,
+        'key': key,
+        'file_url': storage.url_for(bucket, key),
+        'expires_in': expires_in,
+    }
+
+    try:
+        if method == 'post':
+            presigned = storage.generate_presigned_post(bucket, key, content_type, max_size_bytes, expires_in)
+            target.update({'url': presigned['url'], 'fields': presigned['fields']})
+
+        elif method == 'put':
+            presigned = storage.generate_presigned_put(bucket, key, content_type, size, expires_in)
+            target.update({'url': presigned['url'], 'headers': presigned['headers']})
+
+        else:
+            part_size = max(settings.DIRECT_UPLOAD_PART_SIZE_MB * MB, math.ceil(size / S3_MAX_PARTS))
+            part_count = math.ceil(size / part_size)
+            upload_id = storage.create_multipart_upload(bucket, key, content_type)
+            target.update({
+                'upload_id': upload_id,
+                'part_size': part_size,
+                'parts': [
+                    {
+                        'part_number': part_number,
+                        'url': storage.generate_presigned_part_url(bucket, key, upload_id, part_number, expires_in),
+                    }
+                    for part_number in range(1, part_count + 1)
+                ],
+            })
+    except Exception as e:
+        return {'error': True, 'message': str(e)}
+
+    return target
+
+
+def complete_direct_upload(bucket, key, expected_prefix, allowed_content_types, max_size_bytes, upload_id=None, parts=None):
+    """
+    Finish a direct upload: complete the multipart upload if needed, then
+    HEAD the object and check it against the same limits the target was
+    issued with. Objects that fail the checks are deleted.
+    """
+    if not key or not key.startswith(expected_prefix):
+        return {'error': True, 'message': 'Key does not belong to this upload scope'}
+
+    storage = get_storage()
+    if upload_id and not storage.supports_multipart:
+        return {'error': True, 'message': f'Multipart uploads are not supported by the `{storage.name}` storage backend'}
+    try:
+        if upload_id:
+            if not parts:
+                return {'error': True, 'message': '`parts` are required to complete a multipart upload'}
+            parts = sorted(
+                ({'part_number': int(part['part_number']), 'etag': part['etag']} for part in parts),
+                key=lambda part: part['part_number'],
+            )
+            storage.complete_multipart_upload(bucket, key, upload_id, parts)
+
+        head = storage.head_object(bucket, key)
+    except (KeyError, TypeError, ValueError):
+        return {'error': True, 'message': 'Each part must include `part_number` and `etag`'}
+    except Exception as e:
+        return {'error': True, 'message': str(e)}
+
+    if head is None:
+        return {'error': True, 'message': 'Uploaded object not found'}
+
+    if head['size'] > max_size_bytes or not is_allowed_content_type(head['content_type'], allowed_content_types):
+        storage.delete_object(bucket, key)
+        return {'error': True, 'message': 'Uploaded object does not match the allowed size or type'}
+
+    return {
+        'error': False,
+        'message': 'Upload verified',
+        'key': key,
+        'url': storage.url_for(bucket, key),
+        'size': head['size'],
+        'content_type': head['content_type'],
+    }
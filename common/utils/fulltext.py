@@ -0,0 +1,84 @@
+import re
+
+from django.db import models
+from django.db.backends.ddl_references import Statement, Table
+
+
+def fts_table_name(model):
+    """Name of the SQLite FTS5 shadow table kept next to `model`'s table."""
+    return f"{model._meta.db_table}_fts"
+
+
+class FullTextIndex(models.Index):
+    """
+    FULLTEXT index on MySQL; an FTS5 virtual table on SQLite.
+
+    Django has no portable full-text index, so this hooks the DDL:
+    - mysql: `CREATE FULLTEXT INDEX ... (cols)`, queried with MATCH ... AGAINST.
+    - sqlite: `CREATE VIRTUAL TABLE <table>_fts USING fts5(cols)`. FTS5 tables
+      are not updated by triggers here, the code that writes the model keeps
+      them in sync (rowid = primary key).
+    - anything else: a regular index, so migrations still apply.
+    """
+
+    def create_sql(self, model, schema_editor, using="", **kwargs):
+        vendor = schema_editor.connection.vendor
+        if vendor == "sqlite":
+            columns = ", ".join(
+                schema_editor.quote_name(model._meta.get_field(field_name).column)
+                for field_name in self.fields
+            )
+            return Statement(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS %(table)s USING fts5(%(columns)s)",
+                table=Table(fts_table_name(model), schema_editor.quote_name),
+                columns=columns,
+            )
+
+        statement = super().create_sql(model, schema_editor, using=using, **kwargs)
+        if vendor == "mysql":
+            statement.template = statement.template.replace("CREATE INDEX", "CREATE FULLTEXT INDEX", 1)
+        return statement
+
+    def remove_sql(self, model, schema_editor, **kwargs):
+        if schema_editor.connection.vendor == "sqlite":
+            return Statement(
+                "DROP TABLE IF EXISTS %(table)s",
+                table=Table(fts_table_name(model), schema_editor.quote_name),
+            )
+        return super().remove_sql(model, schema_editor, **kwargs)
+
+
+def search_terms(query, max_terms=10):
+    """Split free text into plain word terms, dropping any query-syntax characters."""
+    return re.findall(r"\w+", query or "")[:max_terms]
+
+
+# InnoDB FULLTEXT leaves these out of the index (default innodb_ft_min_token_size
+# and built-in stopword list), so a query term among them can never match
+MYSQL_FT_MIN_TOKEN_SIZE = 3
+MYSQL_FT_STOPWORDS = frozenset({
+    "a", "about", "an", "are", "as", "at", "be", "by", "com", "de", "en", "for", "from", "how", "i", "in",
+    "is", "it", "la", "of", "on", "or", "that", "the", "this", "to", "was", "what", "when", "where", "who",
+    "will", "with", "und", "www",
+})
+
+
+def mysql_indexed_terms(terms, min_token_size=MYSQL_FT_MIN_TOKEN_SIZE):
+    """Split terms into (terms InnoDB FULLTEXT indexes, terms it skips and that need a substring match)."""
+    indexed, skipped = [], []
+    for term in terms:
+        if len(term) < min_token_size or term.lower() in MYSQL_FT_STOPWORDS:
+            skipped.append(term)
+        else:
+            indexed.append(term)
+    return indexed, skipped
+
+
+def mysql_boolean_query(terms):
+    """`foo bar` -> `+foo* +bar*`: every term required, prefix matches, ranked by MySQL relevance."""
+    return " ".join(f"+{term}*" for term in terms)
+
+
+def fts5_query(terms):
+    """`foo bar` -> `"foo"* AND "bar"*` for an FTS5 MATCH."""
+    return " AND ".join(f'"{term}"*' for term in terms)
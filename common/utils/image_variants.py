@@ -0,0 +1,217 @@
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+from common.utils.s3_utils import upload_image_to_s3
+from common.utils.storage import get_storage
+
+
+# Formats we can decode and re-encode safely. GIF/SVG keep their original only.
+VARIANT_SOURCE_CONTENT_TYPES = ('image/jpeg', 'image/png', 'image/webp')
+
+VARIANT_CONTENT_TYPES = {
+    'webp': 'image/webp',
+    'jpeg': 'image/jpeg',
+}
+
+VARIANTS_FOLDER = 'variants'
+
+
+def render_image_variants(data, widths, formats, quality):
+    """
+    Resize `data` (encoded image bytes) to each width and re-encode it.
+
+    Runs inside the variant process pool, so it must stay a plain top-level
+    function with picklable arguments and no Django access. EXIF is applied to
+    the pixels (orientation) and then dropped, since the re-encoded images are
+    saved without it.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source)
+        image.load()
+
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    source_width = image.width
+    target_widths = [width for width in sorted(widths) if width < source_width]
+    # Never upscale, but keep a re-encoded copy when the source fits under the largest width
+    if source_width <= max(widths):
+        target_widths.append(source_width)
+
+    variants = []
+    for width in target_widths:
+        height = max(1, round(image.height * width / source_width))
+        resized = image if width == source_width else image.resize((width, height), Image.LANCZOS)
+
+        for fmt in formats:
+            output = io.BytesIO()
+            if fmt == 'jpeg':
+                frame = resized
+                if frame.mode == 'RGBA':
+                    frame = Image.new('RGB', frame.size, (255, 255, 255))
+                    frame.paste(resized, mask=resized.getchannel('A'))
+                frame.save(output, 'JPEG', quality=quality, optimize=True, progressive=True)
+            else:
+                resized.save(output, 'WEBP', quality=quality, method=4)
+
+            variants.append({
+                'width': width,
+                'height': height,
+                'format': fmt,
+                'data': output.getvalue(),
+            })
+
+    return variants
+
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def get_variant_executor():
+    """
+    Shared process pool for image resizing.
+
+    Resizing is CPU bound, so it runs in separate processes and never holds
+    the GIL of a request thread. Workers are spawned rather than forked so
+    they don't inherit the parent's threads, sockets or DB connections.
+    """
+    global _executor, _executor_pid
+    pid = os.getpid()
+    if _executor is None or _executor_pid != pid:
+        with _executor_lock:
+            if _executor is None or _executor_pid != pid:
+                _executor = ProcessPoolExecutor(
+                    max_workers=settings.IMAGE_VARIANT_MAX_WORKERS,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+                _executor_pid = pid
+    return _executor
+
+
+def _reset_variant_executor():
+    global _executor
+    with _executor_lock:
+        _executor = None
+
+
+def variant_key(key, width, fmt):
+    root = key.rsplit('.', 1)[0]
+    ext = 'jpg' if fmt == 'jpeg' else fmt
+    return f"{VARIANTS_FOLDER}/{root}_{width}w.{ext}"
+
+
+def submit_image_variants(image_file):
+    """
+    Start rendering variants for an uploaded image in the process pool.
+    Returns a future, or None when the file is not a resizable image.
+    """
+    if (getattr(image_file, 'content_type', '') or '').lower() not in VARIANT_SOURCE_CONTENT_TYPES:
+        return None
+
+    image_file.seek(0)
+    data = image_file.read()
+    image_file.seek(0)
+
+    try:
+        return get_variant_executor().submit(
+            render_image_variants,
+            data,
+            settings.IMAGE_VARIANT_WIDTHS,
+            settings.IMAGE_VARIANT_FORMATS,
+            settings.IMAGE_VARIANT_QUALITY,
+        )
+    except BrokenProcessPool:
+        _reset_variant_executor()
+        return None
+
+
+def store_image_variants(future, bucket, key):
+    """
+    Wait for a rendering `future` and upload its output next to `key`.
+
+    Returns a srcset-ready map, e.g. {'webp': {'320': url, ...}, 'jpeg': {...}}.
+    Variants are best effort: on any failure the original upload still stands
+    and an empty map is returned.
+    """
+    if future is None:
+        return {}
+
+    try:
+        rendered = future.result(timeout=settings.IMAGE_VARIANT_TIMEOUT_SECONDS)
+    except BrokenProcessPool as e:
+        _reset_variant_executor()
+        print('Image variant pool failed:', str(e))
+        return {}
+    except Exception as e:
+        print('Image variant rendering failed:', key, str(e))
+        return {}
+
+    storage = get_storage()
+    variants = {}
+    try:
+        for variant in rendered:
+            path = variant_key(key, variant['width'], variant['format'])
+            storage.upload_fileobj(
+                io.BytesIO(variant['data']),
+                bucket,
+                path,
+                content_type=VARIANT_CONTENT_TYPES[variant['format']],
+            )
+            variants.setdefault(variant['format'], {})[str(variant['width'])] = storage.url_for(bucket, path)
+    except Exception as e:
+        print('Image variant upload failed:', key, str(e))
+        delete_image_variants(bucket, key)
+        return {}
+
+    return variants
+
+
+def upload_image_with_variants(image_file, folder, bucket):
+    """
+    `upload_image_to_s3` plus responsive variants.
+
+    Rendering starts in the process pool before the original is uploaded, so
+    the CPU work overlaps the network round-trip. The response gains a
+    `variants` map that callers store in the matching `*_image_variants` field.
+    """
+    future = submit_image_variants(image_file)
+    response = upload_image_to_s3(image_file=image_file, folder=folder, bucket=bucket)
+
+    if response['error']:
+        if future is not None:
+            future.cancel()
+        return response
+
+    response['variants'] = store_image_variants(future, bucket, response['key'])
+    return response
+
+
+def delete_image_variants(bucket, image_key):
+    """Delete every variant rendered for `image_key`. Safe to call for images without variants."""
+    try:
+        storage = get_storage()
+        prefix = f"{VARIANTS_FOLDER}/{image_key.rsplit('.', 1)[0]}_"
+        for key in list(storage.list_keys(bucket, prefix)):
+            storage.delete_object(bucket, key)
+        return {'error': False, 'message': f'Variants of `{image_key}` deleted successfully'}
+    except Exception as e:
+        return {'error': True, 'message': str(e)}
+
+
+def build_srcset(variants, fmt):
+    """Turn one format of a variants map into an HTML `srcset` string."""
+    urls = (variants or {}).get(fmt) or {}
+    return ", ".join(
+        f"{url} {width}w"
+        for width, url in sorted(urls.items(), key=lambda item: int(item[0]))
+    )
@@ -0,0 +1,109 @@
+from django.db import connections
+
+from common.utils.response_cache import invalidate_model
+
+
+class NestedDiff:
+    """
+    Diff-based write of a nested serializer's child rows.
+
+    Incoming items (validated dicts) are matched to existing children by
+    `key` (the pk, or a natural key such as a page number). Matched rows are
+    changed in place; unmatched items become new rows; existing rows nobody
+    asked for are deleted. Diffs for one child model can be collected across
+    many parents (e.g. the activities of every day of an event) and are then
+    written with one bulk_create, one bulk_update and one delete.
+
+        diff = NestedDiff(EventMetric)
+        diff.add(instance.metrics.all(), metrics_data, event=instance)
+        diff.apply()
+
+    Primary keys are never reused or churned: an unchanged row is not touched
+    at all. Bulk writes skip save() and model signals.
+    """
+
+    def __init__(self, model, key='id'):
+        self.model = model
+        self.key = key
+        self.to_create = []
+        self.to_update = []
+        self.update_fields = set()
+        self.to_delete = []
+
+    def add(self, existing, items, **parent):
+        """
+        Diff `items` against `existing` (the parent's current children) and
+        return the resulting child instances in the order of `items`.
+        `parent` holds the foreign key(s) to set on new rows, e.g. event=instance.
+        """
+        pk_name = self.model._meta.pk.name
+        by_key = {}
+        for obj in existing:
+            by_key.setdefault(getattr(obj, self.key), obj)
+
+        result = []
+        for item in items:
+            item = dict(item)
+            obj = by_key.pop(item.get(self.key), None) if item.get(self.key) is not None else None
+            if obj is None:
+                # An id the parent doesn't own is ignored rather than re-parented
+                item.pop(pk_name, None)
+                obj = self.model(**parent, **item)
+                self.to_create.append(obj)
+            else:
+                changed = False
+                for name, value in item.items():
+                    if name != pk_name and getattr(obj, name) != value:
+                        setattr(obj, name, value)
+                        self.update_fields.add(name)
+                        changed = True
+                if changed:
+                    self.to_update.append(obj)
+            result.append(obj)
+
+        self.to_delete.extend(by_key.values())
+        return result
+
+    def apply(self, need_pks=False, batch_size=500):
+        """
+        Write the collected changes: delete first (frees unique keys for
+        reuse), then update, then create. Set `need_pks` when the new rows get
+        children of their own; on backends that can't return ids from a bulk
+        insert (MySQL), those rows are then inserted one by one.
+        """
+        manager = self.model._default_manager
+        if self.to_delete:
+            manager.filter(pk__in=[obj.pk for obj in self.to_delete]).delete()
+        if self.to_update:
+            manager.bulk_update(self.to_update, sorted(self.update_fields), batch_size=batch_size)
+        if self.to_create:
+            features = connections[manager.db].features
+            if need_pks and not features.can_return_rows_from_bulk_insert:
+                for obj in self.to_create:
+                    obj.save(force_insert=True)
+            else:
+                manager.bulk_create(self.to_create, batch_size=batch_size)
+
+        created, updated, deleted = len(self.to_create), len(self.to_update), len(self.to_delete)
+        if created or updated or deleted:
+            # The bulk writes sent no signals
+            invalidate_model(self.model)
+        self.to_create, self.to_update, self.to_delete = [], [], []
+        self.update_fields = set()
+        return created, updated, deleted
+
+
+def sync_children(manager, items, key='id', existing=None, need_pks=False):
+    """
+    Replace the children behind a reverse FK manager (e.g. `magazine.pages`)
+    with `items`, writing only the difference. Pass `existing=[]` for a
+    parent that was just created. Returns the child instances.
+    """
+    if existing is None:
+        existing = manager.all()
+    diff = NestedDiff(manager.model, key=key)
+    objs = diff.add(existing, items, **{manager.field.name: manager.instance})
+    diff.apply(need_pks=need_pks)
+    # A prefetched copy of the relation no longer matches the database
+    getattr(manager.instance, '_prefetched_objects_cache', {}).pop(manager.field.remote_field.get_accessor_name(), None)
+    return objs
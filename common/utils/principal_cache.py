@@ -0,0 +1,111 @@
+import threading
+
+from cachetools import TTLCache
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from common.utils.cache_backend import cache_is_shared
+from user.models import UserAuth
+
+
+# Upper bound on PRINCIPAL_CACHE_LOCAL_TTL_SECONDS: how long another worker can
+# keep authenticating a deactivated user or one whose admin role was removed
+MAX_LOCAL_TTL_SECONDS = 60
+
+# Reverse one-to-one accessors whose absence is cached alongside the user
+PROFILE_RELATIONS = ('profile', 'admin_profile', 'subscriber_profile')
+
+# The password hash never leaves the database; it stays a deferred field on cached users
+CACHED_FIELDS = [
+    field.attname for field in UserAuth._meta.concrete_fields if field.attname != 'password'
+]
+
+_local = None
+_local_lock = threading.Lock()
+
+
+def _local_cache():
+    global _local
+    if _local is None:
+        with _local_lock:
+            if _local is None:
+                _local = TTLCache(
+                    maxsize=settings.PRINCIPAL_CACHE_LOCAL_MAXSIZE,
+                    ttl=min(settings.PRINCIPAL_CACHE_LOCAL_TTL_SECONDS, MAX_LOCAL_TTL_SECONDS),
+                )
+    return _local
+
+
+def _cache_key(user_id):
+    return f'principal:v1:{user_id}'
+
+
+def _load_entry(user_id):
+    """One query: the user's fields plus the ids of whichever profiles exist."""
+    row = (
+        UserAuth.objects
+        .filter(pk=user_id)
+        .values(*CACHED_FIELDS, *[f'{relation}__id' for relation in PROFILE_RELATIONS])
+        .first()
+    )
+    if row is None:
+        return None
+    return {
+        'fields': [row[name] for name in CACHED_FIELDS],
+        'profiles': {relation: row[f'{relation}__id'] for relation in PROFILE_RELATIONS},
+    }
+
+
+def _build_user(entry):
+    user = UserAuth.from_db(DEFAULT_DB_ALIAS, CACHED_FIELDS, entry['fields'])
+    user.profile_ids = entry['profiles']
+    for relation, profile_id in entry['profiles'].items():
+        if profile_id is None:
+            # `hasattr(user, 'profile')` is answered from this, without a query
+            UserAuth._meta.get_field(relation).set_cached_value(user, None)
+    return user
+
+
+def get_principal(user_id):
+    """
+    UserAuth for `user_id` from the in-process TTL cache, then the Django
+    cache (only when it is shared by every worker), then the database.
+    Returns None if the user does not exist.
+
+    The result is a fresh instance every call (safe to mutate). Missing
+    profiles are known without a query; existing ones load lazily.
+    """
+    if not settings.PRINCIPAL_CACHE_ENABLED:
+        entry = _load_entry(user_id)
+        return _build_user(entry) if entry else None
+
+    local = _local_cache()
+    key = _cache_key(user_id)
+    with _local_lock:
+        entry = local.get(key)
+    if entry is None:
+        # A per-process cache would outlive invalidations made by other workers
+        shared = cache_is_shared()
+        entry = cache.get(key) if shared else None
+        if entry is None:
+            entry = _load_entry(user_id)
+            if entry is None:
+                return None
+            if shared:
+                cache.set(key, entry, settings.PRINCIPAL_CACHE_TTL_SECONDS)
+        with _local_lock:
+            local[key] = entry
+    return _build_user(entry)
+
+
+def invalidate_principal(user_id):
+    """
+    Drop a user from both tiers. Other processes keep their in-process copy
+    for at most PRINCIPAL_CACHE_LOCAL_TTL_SECONDS.
+    """
+    key = _cache_key(user_id)
+    local = _local_cache()
+    with _local_lock:
+        local.pop(key, None)
+    cache.delete(key)
@@ -0,0 +1,220 @@
+# common/utils/response_cache.py
+#
+# Shared cache for public GET endpoints whose data changes a few times a day.
+#
+#     class PublishedCareerListCreateAPIView(APIView):
+#         @cached_response('misc.career')
+#         def get(self, request): ...
+#
+# Entries are keyed by path, sorted query params and the authenticator that
+# accepted the request, and depend on tags: a model label ('misc.career')
+# or one row of it ('magazines.magazine:{pk}', formatted with the URL
+# kwargs). Each tag has a version in the cache that is part of the entry
+# key, so invalidating a tag just bumps its version and every entry built
+# on the old one is never read again (and expires). Versions are bumped by
+# post_save and m2m_changed of every model (connected in CommonConfig.ready)
+# and post_delete of the models a cached endpoint names; bulk writes that
+# bypass signals call invalidate_tags() themselves.
+#
+# On a miss only one worker rebuilds an entry; the others wait up to
+# RESPONSE_CACHE_LOCK_WAIT_SECONDS for it. Responses carry X-Cache: HIT /
+# MISS / BYPASS and each process counts hits and misses per view.
+#
+# Versions, locks and entries must be seen by every worker, so nothing is
+# cached unless the cache is shared (REDIS_URL): with the per-process
+# LocMemCache fallback a bump would only reach one worker, and every
+# response is a BYPASS.
+
+import hashlib
+import threading
+import time
+from collections import Counter
+from functools import partial, wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from rest_framework.response import Response
+
+from common.utils.cache_backend import cache_is_shared
+
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _count(view_name, event):
+    with _stats_lock:
+        _stats[(view_name, event)] += 1
+
+
+def cache_stats(reset=False):
+    """{view: {'hit': n, 'miss': n, 'wait': n, ...}} for this process."""
+    with _stats_lock:
+        stats = {}
+        for (view_name, event), n in _stats.items():
+            stats.setdefault(view_name, {})[event] = n
+        if reset:
+            _stats.clear()
+    return stats
+
+
+# Tags
+
+def model_tag(model, pk=None):
+    label = model._meta.label_lower
+    return label if pk is None else f'{label}:{pk}'
+
+
+def _tag_key(tag):
+    return f'response_tag:v1:{tag}'
+
+
+def _new_version():
+    return time.time_ns()
+
+
+def _tag_versions(tags):
+    """
+    Current version of each tag. A missing (never bumped or evicted) version
+    is created rather than assumed 0, so an eviction can't revive old entries.
+    """
+    keys = [_tag_key(tag) for tag in tags]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def _bump(tags):
+    cache.set_many({_tag_key(tag): _new_version() for tag in tags}, None)
+
+
+def invalidate_tags(*tags):
+    """Make every entry depending on any of `tags` stale."""
+    if not tags:
+        return
+    _bump(tags)
+    # Again after commit, in case a request re-cached the old data meanwhile
+    transaction.on_commit(partial(_bump, tags))
+
+
+def invalidate_model(model, pk=None):
+    tags = [model_tag(model)]
+    if pk is not None:
+        tags.append(model_tag(model, pk))
+    invalidate_tags(*tags)
+
+
+# Signals
+
+def _instance_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_model(sender, instance.pk)
+
+
+def _relation_changed(sender, instance, action, model, pk_set=None, **kwargs):
+    if not action.startswith('post_'):
+        return
+    invalidate_model(type(instance), instance.pk)
+    invalidate_tags(model_tag(model), *[model_tag(model, pk) for pk in pk_set or ()])
+
+
+def connect_response_cache_signals():
+    post_save.connect(_instance_changed, dispatch_uid='response_cache_save')
+    m2m_changed.connect(_relation_changed, dispatch_uid='response_cache_m2m')
+
+
+def _watch_deletes(label):
+    # Only for models an endpoint depends on: any post_delete receiver turns
+    # that model's queryset .delete() into a row-by-row delete
+    post_delete.connect(_instance_changed, sender=label, dispatch_uid=f'response_cache_delete_{label}')
+
+
+# Cached views
+
+def _entry_key(request, tag_versions):
+    authenticator = getattr(request, 'successful_authenticator', None)
+    parts = [
+        request.path,
+        '&'.join(f'{name}={value}' for name, values in sorted(request.query_params.lists()) for value in sorted(values)),
+        type(authenticator).__name__ if authenticator else 'anon',
+        ','.join(str(version) for version in tag_versions),
+    ]
+    digest = hashlib.sha1('|'.join(parts).encode()).hexdigest()
+    return f'response:v1:{digest}'
+
+
+def _wait_for(key):
+    deadline = time.monotonic() + settings.RESPONSE_CACHE_LOCK_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def _respond(entry, state):
+    data, status_code = entry
+    response = Response(data, status=status_code)
+    response['X-Cache'] = state
+    return response
+
+
+def cached_response(*tags, timeout=None):
+    """
+    Cache the 200 responses of an APIView `get` method. `tags` are model
+    labels ('misc.career') or row tags with URL kwargs ('magazines.magazine:{magazine_id}').
+    """
+    for label in {tag.split(':', 1)[0].lower() for tag in tags}:
+        _watch_deletes(label)
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            view_name = type(self).__name__
+            if not settings.RESPONSE_CACHE_ENABLED:
+                return method(self, request, *args, **kwargs)
+            if not cache_is_shared():
+                _count(view_name, 'bypass')
+                response = method(self, request, *args, **kwargs)
+                response['X-Cache'] = 'BYPASS'
+                return response
+
+            resolved = [tag.format(**kwargs).lower() for tag in tags]
+            key = _entry_key(request, _tag_versions(resolved))
+            entry = cache.get(key)
+            if entry is not None:
+                _count(view_name, 'hit')
+                return _respond(entry, 'HIT')
+
+            lock_key = f'{key}:lock'
+            locked = cache.add(lock_key, 1, settings.RESPONSE_CACHE_LOCK_SECONDS)
+            if not locked:
+                # Someone else is building this entry: use theirs if it's ready in time
+                entry = _wait_for(key)
+                if entry is not None:
+                    _count(view_name, 'wait')
+                    return _respond(entry, 'HIT')
+
+            _count(view_name, 'miss')
+            try:
+                response = method(self, request, *args, **kwargs)
+                if not isinstance(response, Response) or response.status_code != 200:
+                    response['X-Cache'] = 'BYPASS'
+                    return response
+                cache.set(key, (response.data, response.status_code), timeout or settings.RESPONSE_CACHE_SECONDS)
+                response['X-Cache'] = 'MISS'
+                return response
+            finally:
+                if locked:
+                    cache.delete(lock_key)
+
+        return wrapper
+
+    return decorator
@@ -1,32 +1,22 @@
-import boto3
 import uuid
-from django.conf import settings
-
-
-def get_s3_client():
-    return boto3.client(
-        's3',
-        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-        region_name=settings.AWS_S3_REGION_NAME
-    )
+from common.utils.storage import get_storage
 
 
 def upload_image_to_s3(image_file, folder, bucket):
     try:
-        s3 = get_s3_client()
+        storage = get_storage()
         ext = image_file.name.split('.')[-1]
         unique_filename = f"{uuid.uuid4()}.{ext}"
         key = f"{folder}/{unique_filename}"
 
-        s3.upload_fileobj(
+        storage.upload_fileobj(
             image_file,
             bucket,
             key,
-            ExtraArgs={'ContentType': image_file.content_type, 'ACL': 'public-read'}
+            content_type=image_file.content_type,
         )
 
-        file_url = f"https://{bucket}.s3.amazonaws.com/{key}"
+        file_url = storage.url_for(bucket, key)
         return {'error':False, 'message': 'Upload successful', 'url': file_url, 'key':key}
     except Exception as e:
         return {'error':True, 'message': str(e)}
@@ -34,10 +24,7 @@ def upload_image_to_s3(image_file, folder, bucket):
 
 def delete_image_from_s3(bucket, image_key):
     try:
-        s3 = get_s3_client()
-        s3.delete_object(Bucket=bucket, Key=image_key)
+        get_storage().delete_object(bucket, image_key)
         return {'error':False, 'message': f'Image `{image_key}` deleted successfully'}
     except Exception as e:
         return {'error':True, 'message': str(e)}
-    
-
@@ -0,0 +1,273 @@
+import mimetypes
+import os
+import shutil
+import threading
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from django.conf import settings
+
+
+MB = 1024 * 1024
+
+
+class S3StorageBackend:
+    """
+    Process-wide S3 backend.
+
+    boto3 clients are thread-safe, so one client (and its urllib3 connection
+    pool) is shared by every request thread instead of being rebuilt per call.
+    The client is created lazily and re-created after a fork, so pre-forking
+    servers never share sockets between worker processes.
+    """
+
+    name = "s3"
+    supports_multipart = True
+
+    def __init__(self):
+        self._client = None
+        self._client_pid = None
+        self._lock = threading.Lock()
+        self.transfer_config = TransferConfig(
+            multipart_threshold=settings.AWS_S3_MULTIPART_THRESHOLD_MB * MB,
+            multipart_chunksize=settings.AWS_S3_MULTIPART_CHUNKSIZE_MB * MB,
+            max_concurrency=settings.AWS_S3_TRANSFER_MAX_CONCURRENCY,
+            use_threads=True,
+        )
+
+    def _build_client(self):
+        config = Config(
+            region_name=settings.AWS_S3_REGION_NAME,
+            max_pool_connections=settings.AWS_S3_MAX_POOL_CONNECTIONS,
+            connect_timeout=settings.AWS_S3_CONNECT_TIMEOUT,
+            read_timeout=settings.AWS_S3_READ_TIMEOUT,
+            retries={
+                'max_attempts': settings.AWS_S3_RETRY_MAX_ATTEMPTS,
+                'mode': settings.AWS_S3_RETRY_MODE,
+            },
+        )
+        # A dedicated session keeps credential resolution off the shared default session
+        session = boto3.session.Session(
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            region_name=settings.AWS_S3_REGION_NAME,
+        )
+        return session.client('s3', config=config)
+
+    @property
+    def client(self):
+        pid = os.getpid()
+        if self._client is None or self._client_pid != pid:
+            with self._lock:
+                if self._client is None or self._client_pid != pid:
+                    self._client = self._build_client()
+                    self._client_pid = pid
+        return self._client
+
+    def upload_fileobj(self, fileobj, bucket, key, content_type=None, public=True):
+        extra_args = {}
+        if content_type:
+            extra_args['ContentType'] = content_type
+        if public:
+            extra_args['ACL'] = 'public-read'
+
+        self.client.upload_fileobj(
+            fileobj,
+            bucket,
+            key,
+            ExtraArgs=extra_args,
+            Config=self.transfer_config,
+        )
+
+    def delete_object(self, bucket, key):
+        self.client.delete_object(Bucket=bucket, Key=key)
+
+    def download_fileobj(self, bucket, key, fileobj):
+        self.client.download_fileobj(bucket, key, fileobj, Config=self.transfer_config)
+
+    def list_keys(self, bucket, prefix=''):
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                yield obj['Key']
+
+    def url_for(self, bucket, key):
+        return f"https://{bucket}.s3.amazonaws.com/{key}"
+
+    def head_object(self, bucket, key):
+        """Return {'size', 'content_type', 'etag'} for an object, or None if it does not exist."""
+        try:
+            response = self.client.head_object(Bucket=bucket, Key=key)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+        return {
+            'size': response['ContentLength'],
+            'content_type': response.get('ContentType', ''),
+            'etag': response.get('ETag', '').strip('"'),
+        }
+
+    # Direct (browser -> S3) uploads
+
+    def generate_presigned_post(self, bucket, key, content_type, max_size, expires_in, public=True):
+        fields = {'Content-Type': content_type}
+        conditions = [
+            {'Content-Type': content_type},
+            ['content-length-range', 1, max_size],
+        ]
+        if public:
+            fields['acl'] = 'public-read'
+            conditions.append({'acl': 'public-read'})
+
+        return self.client.generate_presigned_post(
+            Bucket=bucket,
+            Key=key,
+            Fields=fields,
+            Conditions=conditions,
+            ExpiresIn=expires_in,
+        )
+
+    def generate_presigned_put(self, bucket, key, content_type, content_length, expires_in, public=True):
+        params = {
+            'Bucket': bucket,
+            'Key': key,
+            'ContentType': content_type,
+            'ContentLength': content_length,
+        }
+        headers = {'Content-Type': content_type}
+        if public:
+            params['ACL'] = 'public-read'
+            headers['x-amz-acl'] = 'public-read'
+
+        url = self.client.generate_presigned_url('put_object', Params=params, ExpiresIn=expires_in)
+        return {'url': url, 'headers': headers}
+
+    def create_multipart_upload(self, bucket, key, content_type, public=True):
+        extra_args = {'ACL': 'public-read'} if public else {}
+        response = self.client.create_multipart_upload(
+            Bucket=bucket, Key=key, ContentType=content_type, **extra_args
+        )
+        return response['UploadId']
+
+    def generate_presigned_part_url(self, bucket, key, upload_id, part_number, expires_in):
+        return self.client.generate_presigned_url(
+            'upload_part',
+            Params={'Bucket': bucket, 'Key': key, 'UploadId': upload_id, 'PartNumber': part_number},
+            ExpiresIn=expires_in,
+        )
+
+    def complete_multipart_upload(self, bucket, key, upload_id, parts):
+        self.client.complete_multipart_upload(
+            Bucket=bucket,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={
+                'Parts': [{'PartNumber': part['part_number'], 'ETag': part['etag']} for part in parts]
+            },
+        )
+
+    def abort_multipart_upload(self, bucket, key, upload_id):
+        self.client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+
+
+class LocalStorageBackend:
+    """
+    Filesystem stand-in for S3, used by tests and benchmarks.
+
+    Objects are written to `<LOCAL_STORAGE_ROOT>/<bucket>/<key>` and served
+    from `<LOCAL_STORAGE_BASE_URL><bucket>/<key>`.
+    """
+
+    name = "local"
+    # No multipart upload methods: issue_direct_upload refuses 'multipart'
+    supports_multipart = False
+
+    def __init__(self, root=None, base_url=None):
+        self.root = os.path.abspath(root or settings.LOCAL_STORAGE_ROOT)
+        self.base_url = base_url or settings.LOCAL_STORAGE_BASE_URL
+
+    def path_for(self, bucket, key):
+        path = os.path.abspath(os.path.join(self.root, bucket, key))
+        # Keys come from request data, never let them escape the storage root
+        if not path.startswith(os.path.join(self.root, bucket) + os.sep):
+            raise ValueError(f"Invalid object key `{key}`")
+        return path
+
+    def upload_fileobj(self, fileobj, bucket, key, content_type=None, public=True):
+        path = self.path_for(bucket, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as destination:
+            shutil.copyfileobj(fileobj, destination)
+
+    def download_fileobj(self, bucket, key, fileobj):
+        with open(self.path_for(bucket, key), 'rb') as source:
+            shutil.copyfileobj(source, fileobj)
+
+    def delete_object(self, bucket, key):
+        path = self.path_for(bucket, key)
+        # S3 deletes are idempotent, keep the same semantics
+        if os.path.exists(path):
+            os.remove(path)
+
+    def list_keys(self, bucket, prefix=''):
+        bucket_root = os.path.join(self.root, bucket)
+        for dirpath, _, filenames in os.walk(bucket_root):
+            for filename in filenames:
+                key = os.path.relpath(os.path.join(dirpath, filename), bucket_root).replace(os.sep, '/')
+                if key.startswith(prefix):
+                    yield key
+
+    def url_for(self, bucket, key):
+        return f"{self.base_url}{bucket}/{key}"
+
+    def head_object(self, bucket, key):
+        path = self.path_for(bucket, key)
+        if not os.path.isfile(path):
+            return None
+        return {
+            'size': os.path.getsize(path),
+            'content_type': mimetypes.guess_type(path)[0] or '',
+            'etag': '',
+        }
+
+    # Direct uploads have no browser-facing endpoint on disk: the returned
+    # targets describe where the object lands so tests can write it with
+    # `upload_fileobj` and then exercise the completion step.
+
+    def generate_presigned_post(self, bucket, key, content_type, max_size, expires_in, public=True):
+        return {'url': self.url_for(bucket, key), 'fields': {'key': key, 'Content-Type': content_type}}
+
+    def generate_presigned_put(self, bucket, key, content_type, content_length, expires_in, public=True):
+        return {'url': self.url_for(bucket, key), 'headers': {'Content-Type': content_type}}
+
+
+STORAGE_BACKENDS = {
+    S3StorageBackend.name: S3StorageBackend,
+    LocalStorageBackend.name: LocalStorageBackend,
+}
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+    """Return the process-wide storage backend selected by `FILE_STORAGE_BACKEND`."""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                backend_class = STORAGE_BACKENDS.get(settings.FILE_STORAGE_BACKEND)
+                if backend_class is None:
+                    raise ValueError(f"Unknown FILE_STORAGE_BACKEND `{settings.FILE_STORAGE_BACKEND}`")
+                _storage = backend_class()
+    return _storage
+
+
+def reset_storage():
+    """Drop the cached backend, e.g. after overriding storage settings in tests."""
+    global _storage
+    with _storage_lock:
+        _storage = None
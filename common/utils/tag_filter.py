@@ -0,0 +1,89 @@
+from django.db.models import Count, Exists, OuterRef, Q
+
+
+TAG_MATCH_ANY = 'any'
+TAG_MATCH_ALL = 'all'
+
+
+def parse_tag_params(request):
+    """
+    Read `?tags=a,b&match=any|all` from a request.
+    Tags are matched against either the tag name or its slug.
+    """
+    tags_param = request.query_params.get("tags", "")
+    values = list(dict.fromkeys(tag.strip() for tag in tags_param.split(",") if tag.strip()))
+    match = request.query_params.get("match", TAG_MATCH_ANY)
+    if match not in (TAG_MATCH_ANY, TAG_MATCH_ALL):
+        match = TAG_MATCH_ANY
+    return values, match
+
+
+def _tags_relation(model):
+    """(through model, column pointing at `model`, column pointing at the tag, tag model)"""
+    field = model._meta.get_field('tags')
+    return (
+        field.remote_field.through,
+        field.m2m_field_name(),
+        field.m2m_reverse_field_name(),
+        field.related_model,
+    )
+
+
+def filter_by_tags(queryset, values, match=TAG_MATCH_ANY):
+    """
+    Keep objects tagged with any (or all) of `values` (tag names or slugs).
+
+    Membership is tested with EXISTS semi-joins on the M2M table, so each
+    object appears once and no DISTINCT is needed.
+    """
+    if not values:
+        return queryset.none()
+
+    through, source, target, tag_model = _tags_relation(queryset.model)
+    tags = tag_model.objects.filter(Q(name__in=values) | Q(slug__in=values)).values_list('id', 'name', 'slug')
+
+    # Requested value -> ids of the tags it names (by name or by slug)
+    ids_by_value = {}
+    for tag_id, name, slug in tags:
+        for value in {name, slug} & set(values):
+            ids_by_value.setdefault(value, set()).add(tag_id)
+
+    if not ids_by_value:
+        return queryset.none()
+
+    def tagged(ids):
+        return Exists(through.objects.filter(**{source: OuterRef('pk'), f'{target}__in': ids}))
+
+    if match == TAG_MATCH_ALL:
+        if len(ids_by_value) < len(values):
+            # A requested tag doesn't exist, nothing can carry all of them
+            return queryset.none()
+        for ids in ids_by_value.values():
+            queryset = queryset.filter(tagged(ids))
+        return queryset
+
+    return queryset.filter(tagged(set().union(*ids_by_value.values())))
+
+
+def tag_facets(queryset):
+    """
+    Per-tag counts over the objects in `queryset`, most used first:
+    [{'id': 1, 'name': 'AI', 'slug': 'ai', 'count': 12}, ...]
+    """
+    through, source, target, _ = _tags_relation(queryset.model)
+    rows = (
+        through.objects
+        .filter(**{f'{source}__in': queryset.order_by().values('pk')})
+        .values(f'{target}_id', f'{target}__name', f'{target}__slug')
+        .annotate(count=Count(f'{source}_id'))
+        .order_by('-count', f'{target}__name')
+    )
+    return [
+        {
+            'id': row[f'{target}_id'],
+            'name': row[f'{target}__name'],
+            'slug': row[f'{target}__slug'],
+            'count': row['count'],
+        }
+        for row in rows
+    ]
@@ -0,0 +1,59 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from common.utils.image_variants import upload_image_with_variants
+from common.utils.s3_utils import upload_image_to_s3
+
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def get_upload_executor():
+    """
+    Shared, bounded thread pool for S3 uploads.
+
+    Uploads are network bound, so threads overlap the S3 round-trips while the
+    pool size caps how many connections a single worker process can open.
+    """
+    global _executor, _executor_pid
+    pid = os.getpid()
+    if _executor is None or _executor_pid != pid:
+        with _executor_lock:
+            if _executor is None or _executor_pid != pid:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.S3_UPLOAD_MAX_WORKERS,
+                    thread_name_prefix='s3-upload',
+                )
+                _executor_pid = pid
+    return _executor
+
+
+def upload_files_to_s3(files, folder, bucket, variants=False):
+    """
+    Upload `files` concurrently to `bucket` under `folder`.
+
+    Returns one result per file, in the same order as `files`, shaped like the
+    `upload_image_to_s3` response plus the file `index` and original `name`:
+    {'error': False, 'url': ..., 'key': ..., 'index': 0, 'name': 'page.jpg'}
+
+    With `variants=True` each image also gets responsive variants and its
+    result a `variants` map (see `upload_image_with_variants`).
+    """
+    upload = upload_image_with_variants if variants else upload_image_to_s3
+    executor = get_upload_executor()
+    names = [upload_file.name for upload_file in files]
+    futures = [
+        executor.submit(upload, image_file=upload_file, folder=folder, bucket=bucket)
+        for upload_file in files
+    ]
+
+    results = []
+    for index, future in enumerate(futures):
+        response = future.result()
+        results.append({**response, 'index': index, 'name': names[index]})
+    return results
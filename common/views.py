@@ -3,6 +3,7 @@ from rest_framework import exceptions
 from user.models import UserAuth
 from rest_framework.permissions import BasePermission
 from common.constants import AUTH_TYPE_ADMIN, AUTH_TYPE_USER, AUTH_TYPE_SUBSCRIBER
+from common.utils.principal_cache import get_principal
 
 class CustomJWTAuthentication(JWTAuthentication):
     def get_user(self, validated_token):
@@ -16,7 +17,9 @@ class CustomJWTAuthentication(JWTAuthentication):
             if user_id is None:
                 raise exceptions.AuthenticationFailed("Token contained no recognizable user identification")
 
-            user = UserAuth.objects.get(id=user_id)
+            user = get_principal(user_id)
+            if user is None:
+                raise exceptions.AuthenticationFailed("User not found")
             if not user.is_active:
                 raise exceptions.AuthenticationFailed("User account is inactive")
 
@@ -8,6 +8,7 @@ class TopContributor(models.Model):
     long_description = models.TextField(blank=True)
     image_url = models.URLField(blank=True, null=True)
     image_key = models.CharField(max_length=255, blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True)
     job = models.CharField(max_length=255)
     job_abbreviation = models.CharField(max_length=50, blank=True)
     priority = models.IntegerField(default=0)
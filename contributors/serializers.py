@@ -2,12 +2,15 @@
 
 from rest_framework import serializers
 from .models import TopContributor
+from common.serializers import ImageSrcsetField
 
 class TopContributorSerializer(serializers.ModelSerializer):
+    image_srcset = ImageSrcsetField(source='image_variants')
+
     class Meta:
         model = TopContributor
         fields = [
             'id', 'name', 'short_description', 'long_description',
-            'image_url', 'image_key', 'job', 'job_abbreviation', 'priority',
+            'image_url', 'image_key', 'image_variants', 'image_srcset', 'job', 'job_abbreviation', 'priority',
             'created_at'
         ]
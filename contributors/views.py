@@ -10,13 +10,16 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from common.views import CustomJWTAuthentication, IsAdminUser  # Your custom JWT class if any
 
 from common.constants import S3_CONTRIBUTORS_BUCKET_NAME, S3_BLOG_BUCKET_NAME
-from common.utils.s3_utils import upload_image_to_s3, delete_image_from_s3
+from common.utils.image_variants import upload_image_with_variants, delete_image_variants
+from common.utils.s3_utils import delete_image_from_s3
+from common.utils.response_cache import cached_response
 
 # Public GET view with optional ?length=<number>
 class TopContributorListAPIView(APIView):
     authentication_classes = []
     permission_classes = [AllowAny]
 
+    @cached_response('contributors.topcontributor')
     def get(self, request):
         length = request.query_params.get('length')
         contributors = TopContributor.objects.all()
@@ -89,13 +92,14 @@ class S3ContributorsImageManager(APIView):
             return Response({'error': 'No file provided'}, status=400)
 
         bucket = S3_BLOG_BUCKET_NAME
-        response = upload_image_to_s3(image_file=upload_file, folder=folder, bucket=bucket)
+        response = upload_image_with_variants(image_file=upload_file, folder=folder, bucket=bucket)
 
         if not response['error']:
             return Response({
                 'message': response['message'],
                 'url': response['url'],
-                'key': response['key']
+                'key': response['key'],
+                'variants': response['variants'],
             }, status=200)
         
         return Response({'message': response['message']}, status=400)
@@ -112,6 +116,7 @@ class S3ContributorsImageManager(APIView):
 
         bucket = S3_BLOG_BUCKET_NAME
         response = delete_image_from_s3(bucket=bucket, image_key=file_key)
+        delete_image_variants(bucket=bucket, image_key=file_key)
 
         if not response['error']:
             return Response({'message': response['message']}, status=200)
@@ -49,6 +49,7 @@ INSTALLED_APPS = [
     'corsheaders',
     'storages',
 
+    'common',
     'user',
     'blogs',
     'magazines',
@@ -70,7 +71,139 @@ AWS_QUERYSTRING_AUTH = False
 AWS_S3_FILE_OVERWRITE = False
 AWS_DEFAULT_ACL = None
 
+# Shared S3 client used by common.utils.storage
+AWS_S3_MAX_POOL_CONNECTIONS = int(os.getenv("AWS_S3_MAX_POOL_CONNECTIONS", 50))
+AWS_S3_CONNECT_TIMEOUT = float(os.getenv("AWS_S3_CONNECT_TIMEOUT", 5))
+AWS_S3_READ_TIMEOUT = float(os.getenv("AWS_S3_READ_TIMEOUT", 60))
+AWS_S3_RETRY_MAX_ATTEMPTS = int(os.getenv("AWS_S3_RETRY_MAX_ATTEMPTS", 5))
+AWS_S3_RETRY_MODE = os.getenv("AWS_S3_RETRY_MODE", "adaptive")  # 'legacy', 'standard' or 'adaptive'
+AWS_S3_MULTIPART_THRESHOLD_MB = int(os.getenv("AWS_S3_MULTIPART_THRESHOLD_MB", 8))
+AWS_S3_MULTIPART_CHUNKSIZE_MB = int(os.getenv("AWS_S3_MULTIPART_CHUNKSIZE_MB", 8))
+AWS_S3_TRANSFER_MAX_CONCURRENCY = int(os.getenv("AWS_S3_TRANSFER_MAX_CONCURRENCY", 10))
+
+# Thread pool shared by batch upload endpoints (common.utils.upload_engine)
+S3_UPLOAD_MAX_WORKERS = int(os.getenv("S3_UPLOAD_MAX_WORKERS", 16))
+
+# Presigned direct-to-S3 uploads (common.utils.direct_upload)
+DIRECT_UPLOAD_EXPIRES_SECONDS = int(os.getenv("DIRECT_UPLOAD_EXPIRES_SECONDS", 900))
+DIRECT_UPLOAD_MULTIPART_THRESHOLD_MB = int(os.getenv("DIRECT_UPLOAD_MULTIPART_THRESHOLD_MB", 100))
+DIRECT_UPLOAD_PART_SIZE_MB = int(os.getenv("DIRECT_UPLOAD_PART_SIZE_MB", 16))
+PODCAST_AUDIO_MAX_UPLOAD_MB = int(os.getenv("PODCAST_AUDIO_MAX_UPLOAD_MB", 1024))
+EVENT_DOCUMENT_MAX_UPLOAD_MB = int(os.getenv("EVENT_DOCUMENT_MAX_UPLOAD_MB", 25))
+NOMINATION_FILE_MAX_UPLOAD_MB = int(os.getenv("NOMINATION_FILE_MAX_UPLOAD_MB", 50))
+
+# Responsive image variants rendered at upload time (common.utils.image_variants)
+IMAGE_VARIANT_WIDTHS = [int(width) for width in os.getenv("IMAGE_VARIANT_WIDTHS", "320,640,1280").split(",")]
+IMAGE_VARIANT_FORMATS = os.getenv("IMAGE_VARIANT_FORMATS", "webp,jpeg").split(",")
+IMAGE_VARIANT_QUALITY = int(os.getenv("IMAGE_VARIANT_QUALITY", 80))
+IMAGE_VARIANT_MAX_WORKERS = int(os.getenv("IMAGE_VARIANT_MAX_WORKERS", min(4, os.cpu_count() or 1)))
+IMAGE_VARIANT_TIMEOUT_SECONDS = int(os.getenv("IMAGE_VARIANT_TIMEOUT_SECONDS", 60))
+
+# Magazine PDF ingestion (magazines.ingestion)
+MAGAZINE_PDF_MAX_UPLOAD_MB = int(os.getenv("MAGAZINE_PDF_MAX_UPLOAD_MB", 300))
+MAGAZINE_INGEST_DPI = int(os.getenv("MAGAZINE_INGEST_DPI", 150))
+MAGAZINE_INGEST_JPEG_QUALITY = int(os.getenv("MAGAZINE_INGEST_JPEG_QUALITY", 85))
+MAGAZINE_INGEST_THUMBNAIL_WIDTH = int(os.getenv("MAGAZINE_INGEST_THUMBNAIL_WIDTH", 320))
+MAGAZINE_INGEST_MAX_WORKERS = int(os.getenv("MAGAZINE_INGEST_MAX_WORKERS", min(4, os.cpu_count() or 1)))
+MAGAZINE_INGEST_CHECKPOINT_PAGES = int(os.getenv("MAGAZINE_INGEST_CHECKPOINT_PAGES", 10))
+MAGAZINE_INGEST_STALE_MINUTES = int(os.getenv("MAGAZINE_INGEST_STALE_MINUTES", 15))
+# Run new jobs on a thread of the web process; when off, only `resume_magazine_ingestion` runs them
+MAGAZINE_INGEST_IN_BACKGROUND = os.getenv("MAGAZINE_INGEST_IN_BACKGROUND", "True") == "True"
+
+# Full-text search over published content (misc.search)
+# The server's innodb_ft_min_token_size: shorter terms are matched as substrings instead
+SEARCH_MYSQL_MIN_TOKEN_SIZE = int(os.getenv("SEARCH_MYSQL_MIN_TOKEN_SIZE", 3))
+# Characters of extracted blog content / podcast transcript kept per search document
+SEARCH_BODY_MAX_CHARS = int(os.getenv("SEARCH_BODY_MAX_CHARS", 200000))
+
+# Per-request SQL instrumentation (common.middleware.QueryInstrumentationMiddleware)
+QUERY_INSTRUMENTATION_ENABLED = os.getenv("QUERY_INSTRUMENTATION_ENABLED", "True") == "True"
+# Same SQL template this many times in one request is reported as a likely N+1
+QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", 5))
+# Queries allowed per request unless the view sets `query_budget` or is listed in QUERY_BUDGETS (0 = no limit)
+QUERY_BUDGET_DEFAULT = int(os.getenv("QUERY_BUDGET_DEFAULT", 50)) or None
+# {url name or dotted view path: max queries}
+QUERY_BUDGETS = {}
+# 'log' warns when a budget is exceeded, 'raise' fails the request (tests / CI)
+QUERY_BUDGET_ACTION = os.getenv("QUERY_BUDGET_ACTION", "log")
+
+# Authenticated-user cache used by CustomJWTAuthentication (common.utils.principal_cache)
+PRINCIPAL_CACHE_ENABLED = os.getenv("PRINCIPAL_CACHE_ENABLED", "True") == "True"
+# Shared tier, only used when CACHE_SHARED (signals invalidate it for every worker)
+PRINCIPAL_CACHE_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", 300))
+# In-process tier; signals can't reach other processes, so this bounds how long another worker
+# may still see a deactivated user or a removed role (capped at 60s by principal_cache)
+PRINCIPAL_CACHE_LOCAL_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_LOCAL_TTL_SECONDS", 10))
+PRINCIPAL_CACHE_LOCAL_MAXSIZE = int(os.getenv("PRINCIPAL_CACHE_LOCAL_MAXSIZE", 10000))
+
+# Cached public GET responses with tag invalidation (common.utils.response_cache)
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "True") == "True"
+RESPONSE_CACHE_SECONDS = int(os.getenv("RESPONSE_CACHE_SECONDS", 600))
+# A miss is rebuilt by one request; others wait up to RESPONSE_CACHE_LOCK_WAIT_SECONDS for it
+RESPONSE_CACHE_LOCK_SECONDS = int(os.getenv("RESPONSE_CACHE_LOCK_SECONDS", 10))
+RESPONSE_CACHE_LOCK_WAIT_SECONDS = float(os.getenv("RESPONSE_CACHE_LOCK_WAIT_SECONDS", 2))
+
+# Rows fetched per query by the streaming admin user export
+USER_EXPORT_CHUNK_SIZE = int(os.getenv("USER_EXPORT_CHUNK_SIZE", 2000))
+
+# Google sign-in (user.google_auth)
+# OAuth client ids accepted as the `aud` of Google ID tokens, comma-separated
+GOOGLE_CLIENT_IDS = [client_id for client_id in os.getenv("GOOGLE_CLIENT_IDS", "").split(",") if client_id]
+# 'auto': verify ID tokens locally, send access tokens to userinfo; 'id_token' / 'userinfo' force one path
+GOOGLE_SIGNIN_MODE = os.getenv("GOOGLE_SIGNIN_MODE", "auto")
+GOOGLE_JWKS_URL = os.getenv("GOOGLE_JWKS_URL", "https://www.googleapis.com/oauth2/v3/certs")
+GOOGLE_JWKS_CACHE_SECONDS = int(os.getenv("GOOGLE_JWKS_CACHE_SECONDS", 3600))
+GOOGLE_USERINFO_URL = os.getenv("GOOGLE_USERINFO_URL", "https://www.googleapis.com/oauth2/v2/userinfo")
+GOOGLE_HTTP_TIMEOUT_SECONDS = int(os.getenv("GOOGLE_HTTP_TIMEOUT_SECONDS", 5))
+GOOGLE_HTTP_POOL_SIZE = int(os.getenv("GOOGLE_HTTP_POOL_SIZE", 10))
+GOOGLE_ID_TOKEN_LEEWAY_SECONDS = int(os.getenv("GOOGLE_ID_TOKEN_LEEWAY_SECONDS", 30))
+
+# 's3' in production, 'local' to keep uploads on disk (tests, benchmarks)
+FILE_STORAGE_BACKEND = os.getenv("FILE_STORAGE_BACKEND", "s3")
+LOCAL_STORAGE_ROOT = os.getenv("LOCAL_STORAGE_ROOT", os.path.join(BASE_DIR, 'media/local_storage/'))
+LOCAL_STORAGE_BASE_URL = os.getenv("LOCAL_STORAGE_BASE_URL", "/media/local_storage/")
+
+# Public event detail responses, cached by slug (misc.event_cache)
+EVENT_DETAIL_CACHE_SECONDS = int(os.getenv("EVENT_DETAIL_CACHE_SECONDS", 300))
+EVENT_SLUG_CACHE_SECONDS = int(os.getenv("EVENT_SLUG_CACHE_SECONDS", 3600))
+# Event registrations (misc.registrations): buffer and batch-insert during bursts.
+# Buffered registrations not yet flushed are lost if the worker dies.
+EVENT_REGISTRATION_BUFFERED = os.getenv("EVENT_REGISTRATION_BUFFERED", "False") == "True"
+EVENT_REGISTRATION_FLUSH_SIZE = int(os.getenv("EVENT_REGISTRATION_FLUSH_SIZE", 200))
+EVENT_REGISTRATION_FLUSH_SECONDS = float(os.getenv("EVENT_REGISTRATION_FLUSH_SECONDS", 2))
+# Rows fetched per query by the streaming registration export
+EVENT_REGISTRATION_EXPORT_CHUNK_SIZE = int(os.getenv("EVENT_REGISTRATION_EXPORT_CHUNK_SIZE", 2000))
+
+# Real view counts (misc.view_counter): buffered per process, flushed as one UPDATE per model
+VIEW_COUNTER_ENABLED = os.getenv("VIEW_COUNTER_ENABLED", "True") == "True"
+VIEW_COUNTER_FLUSH_SECONDS = float(os.getenv("VIEW_COUNTER_FLUSH_SECONDS", 10))
+# Flush early once this many distinct items are pending
+VIEW_COUNTER_MAX_PENDING = int(os.getenv("VIEW_COUNTER_MAX_PENDING", 1000))
+
+# Trending ranking (misc.trending): hourly view buckets decayed into TrendingScore by `compute_trending`
+TRENDING_HALF_LIFE_HOURS = float(os.getenv("TRENDING_HALF_LIFE_HOURS", 24))
+# Buckets older than this are ignored and pruned
+TRENDING_WINDOW_HOURS = int(os.getenv("TRENDING_WINDOW_HOURS", 168))
+TRENDING_KEEP_PER_KIND = int(os.getenv("TRENDING_KEEP_PER_KIND", 200))
+TRENDING_DEFAULT_RESULTS = int(os.getenv("TRENDING_DEFAULT_RESULTS", 10))
+TRENDING_MAX_RESULTS = int(os.getenv("TRENDING_MAX_RESULTS", 50))
+
+# Nomination form definitions used to validate submissions (nominations.validation)
+NOMINATION_FORM_CACHE_SECONDS = int(os.getenv("NOMINATION_FORM_CACHE_SECONDS", 300))
+# Rows fetched per query by the submission export and filter-value reindexing
+NOMINATION_EXPORT_CHUNK_SIZE = int(os.getenv("NOMINATION_EXPORT_CHUNK_SIZE", 2000))
+
 OMNISEND_API_KEY = os.getenv("OMNISEND_API_KEY")
+OMNISEND_CONTACTS_URL = os.getenv("OMNISEND_CONTACTS_URL", "https://api.omnisend.com/v5/contacts")
+OMNISEND_HTTP_TIMEOUT_SECONDS = int(os.getenv("OMNISEND_HTTP_TIMEOUT_SECONDS", 10))
+# Outbox drained by `sync_omnisend_contacts` (user.omnisend)
+OMNISEND_OUTBOX_BATCH_SIZE = int(os.getenv("OMNISEND_OUTBOX_BATCH_SIZE", 50))
+OMNISEND_SYNC_CONCURRENCY = int(os.getenv("OMNISEND_SYNC_CONCURRENCY", 4))
+OMNISEND_MAX_ATTEMPTS = int(os.getenv("OMNISEND_MAX_ATTEMPTS", 8))
+OMNISEND_RETRY_BASE_SECONDS = int(os.getenv("OMNISEND_RETRY_BASE_SECONDS", 30))
+OMNISEND_RETRY_MAX_SECONDS = int(os.getenv("OMNISEND_RETRY_MAX_SECONDS", 3600))
+# A claimed entry not finished within this long is picked up by another worker
+OMNISEND_OUTBOX_LOCK_SECONDS = int(os.getenv("OMNISEND_OUTBOX_LOCK_SECONDS", 300))
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
@@ -113,6 +246,7 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 MIDDLEWARE = [
+    'common.middleware.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -163,6 +297,32 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Redis is shared by every worker, so a signal's invalidation reaches them all.
+# Without REDIS_URL each process gets its own LocMemCache; CACHE_SHARED is then
+# False and the principal, response, nomination form and event caches stop
+# trusting it (common.utils.cache_backend).
+
+REDIS_URL = os.getenv("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': os.getenv("CACHE_KEY_PREFIX", "worthminds"),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': int(os.getenv("LOCAL_CACHE_MAX_ENTRIES", 20000))},
+        }
+    }
+CACHE_SHARED = bool(REDIS_URL)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -206,3 +366,32 @@ MEDIA_URL = '/media/'
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {
+            'format': '%(asctime)s %(levelname)s %(name)s %(message)s',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'simple',
+        },
+    },
+    'loggers': {
+        'common.queries': {
+            'handlers': ['console'],
+            'level': os.getenv("QUERY_LOG_LEVEL", "INFO"),
+            'propagate': False,
+        },
+        # Background work in misc (registration buffer, view counter flushes)
+        'misc': {
+            'handlers': ['console'],
+            'level': os.getenv("MISC_LOG_LEVEL", "INFO"),
+            'propagate': False,
+        },
+    },
+}
@@ -0,0 +1,260 @@
+# magazines/ingestion.py
+
+import io
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from common.constants import S3_BLOG_BUCKET_NAME
+from common.utils.conditional import touch_updated_at
+from common.utils.response_cache import invalidate_model
+from common.utils.storage import get_storage
+from common.utils.upload_engine import get_upload_executor
+from .models import Magazine, MagazineIngestionJob, MagazinePage
+from .pdf_render import count_pdf_pages, open_worker_pdf, render_pdf_page
+
+
+def page_key(magazine_id, page_number):
+    return f"magazines/{magazine_id}/pages/page_{page_number:03d}.jpg"
+
+
+def thumbnail_key(magazine_id, page_number):
+    return f"magazines/{magazine_id}/pages/thumbnails/page_{page_number:03d}.jpg"
+
+
+def claim_job(job_id, stale_after=None):
+    """
+    Atomically move a job to RUNNING so only one runner processes it.
+
+    Pending and failed jobs can always be claimed. Running jobs can be
+    reclaimed once they have not checkpointed for `stale_after` (the runner
+    died). Returns the claimed job, or None if it is not claimable.
+    """
+    now = timezone.now()
+    claimable = Q(status__in=[MagazineIngestionJob.Status.PENDING, MagazineIngestionJob.Status.FAILED])
+    if stale_after is not None:
+        claimable |= Q(status=MagazineIngestionJob.Status.RUNNING, updated_at__lt=now - stale_after)
+
+    claimed = MagazineIngestionJob.objects.filter(claimable, pk=job_id).update(
+        status=MagazineIngestionJob.Status.RUNNING,
+        error='',
+        started_at=now,
+        finished_at=None,
+        updated_at=now,
+    )
+    if not claimed:
+        return None
+    return MagazineIngestionJob.objects.get(pk=job_id)
+
+
+def stale_after_default():
+    return timedelta(minutes=settings.MAGAZINE_INGEST_STALE_MINUTES)
+
+
+def requeue_job(job_id):
+    """
+    Put a failed or stalled job back to PENDING so a runner can claim it.
+    Returns False while another runner is still actively working on it.
+    """
+    now = timezone.now()
+    requeued = MagazineIngestionJob.objects.filter(
+        Q(status__in=[MagazineIngestionJob.Status.PENDING, MagazineIngestionJob.Status.FAILED])
+        | Q(status=MagazineIngestionJob.Status.RUNNING, updated_at__lt=now - stale_after_default()),
+        pk=job_id,
+    ).update(status=MagazineIngestionJob.Status.PENDING, updated_at=now)
+    return bool(requeued)
+
+
+def _checkpoint(job):
+    job.pages_done = len(job.progress.get('pages', {}))
+    job.save(update_fields=['progress', 'pages_done', 'page_count', 'updated_at'])
+
+
+def _upload_page(magazine_id, rendered):
+    storage = get_storage()
+    page_number = rendered['page']
+
+    key = page_key(magazine_id, page_number)
+    storage.upload_fileobj(io.BytesIO(rendered['image']), S3_BLOG_BUCKET_NAME, key, content_type='image/jpeg')
+
+    thumb_key = thumbnail_key(magazine_id, page_number)
+    storage.upload_fileobj(io.BytesIO(rendered['thumbnail']), S3_BLOG_BUCKET_NAME, thumb_key, content_type='image/jpeg')
+
+    return page_number, {
+        'key': key,
+        'url': storage.url_for(S3_BLOG_BUCKET_NAME, key),
+        'width': rendered['width'],
+        'thumbnail_key': thumb_key,
+        'thumbnail_url': storage.url_for(S3_BLOG_BUCKET_NAME, thumb_key),
+        'thumbnail_width': rendered['thumbnail_width'],
+    }
+
+
+def _render_and_upload(job, pdf_path, page_numbers):
+    """
+    Render pages in worker processes and upload them on the shared upload
+    thread pool as soon as each one is ready.
+
+    Only this thread touches `job`, and it checkpoints progress every
+    MAGAZINE_INGEST_CHECKPOINT_PAGES pages. The number of rendered pages
+    waiting in memory is capped at twice the worker count.
+    """
+    pages = job.progress.setdefault('pages', {})
+    upload_executor = get_upload_executor()
+    max_workers = settings.MAGAZINE_INGEST_MAX_WORKERS
+    render_args = (
+        settings.MAGAZINE_INGEST_DPI,
+        settings.MAGAZINE_INGEST_THUMBNAIL_WIDTH,
+        settings.MAGAZINE_INGEST_JPEG_QUALITY,
+    )
+
+    pool = ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=open_worker_pdf,
+        initargs=(pdf_path,),
+    )
+    queue = iter(page_numbers)
+    renders = set()
+    uploads = set()
+    unsaved = 0
+
+    def submit_next_render():
+        page_number = next(queue, None)
+        if page_number is not None:
+            renders.add(pool.submit(render_pdf_page, page_number, *render_args))
+
+    try:
+        for _ in range(max_workers * 2):
+            submit_next_render()
+
+        while renders or uploads:
+            done, _ = wait(renders | uploads, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in renders:
+                    renders.discard(future)
+                    uploads.add(upload_executor.submit(_upload_page, job.magazine_id, future.result()))
+                    submit_next_render()
+                else:
+                    uploads.discard(future)
+                    page_number, entry = future.result()
+                    pages[str(page_number)] = entry
+                    unsaved += 1
+
+            if unsaved >= settings.MAGAZINE_INGEST_CHECKPOINT_PAGES:
+                _checkpoint(job)
+                unsaved = 0
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        # Keep whatever finished, even when a page failed, so a retry skips it
+        wait(uploads)
+        for future in uploads:
+            if not future.exception():
+                page_number, entry = future.result()
+                pages[str(page_number)] = entry
+        _checkpoint(job)
+
+
+def _finalize(job):
+    """Replace the magazine's pages with the rendered ones in one transaction."""
+    pages = job.progress['pages']
+    page_objs = []
+    for page_number in range(1, job.page_count + 1):
+        entry = pages[str(page_number)]
+        page_objs.append(MagazinePage(
+            magazine_id=job.magazine_id,
+            page_number=page_number,
+            image_url=entry['url'],
+            image_key=entry['key'],
+            # Same srcset-ready shape as the upload-time image variants
+            image_variants={
+                'jpeg': {
+                    str(entry['thumbnail_width']): entry['thumbnail_url'],
+                    str(entry['width']): entry['url'],
+                }
+            },
+        ))
+
+    with transaction.atomic():
+        # Lock the magazine so concurrent page edits can't interleave with the swap
+        Magazine.objects.select_for_update().get(pk=job.magazine_id)
+        MagazinePage.objects.filter(magazine_id=job.magazine_id).delete()
+        MagazinePage.objects.bulk_create(page_objs)
+        invalidate_model(MagazinePage)
+        touch_updated_at(Magazine, job.magazine_id)
+
+        job.status = MagazineIngestionJob.Status.COMPLETED
+        job.finished_at = timezone.now()
+        job.pages_done = len(pages)
+        job.save(update_fields=['status', 'finished_at', 'pages_done', 'updated_at'])
+
+
+def run_ingestion_job(job):
+    """
+    Process a claimed job to completion. Safe to call again after a crash:
+    pages already listed in `job.progress` are not rendered again.
+    """
+    job.progress.setdefault('pages', {})
+
+    try:
+        with tempfile.TemporaryDirectory(prefix='magazine-ingest-') as tmp_dir:
+            pdf_path = os.path.join(tmp_dir, 'source.pdf')
+            with open(pdf_path, 'wb') as pdf_file:
+                get_storage().download_fileobj(S3_BLOG_BUCKET_NAME, job.source_key, pdf_file)
+
+            if job.page_count is None:
+                job.page_count = count_pdf_pages(pdf_path)
+            _checkpoint(job)
+
+            remaining = [
+                page_number
+                for page_number in range(1, job.page_count + 1)
+                if str(page_number) not in job.progress['pages']
+            ]
+            if remaining:
+                _render_and_upload(job, pdf_path, remaining)
+
+        _finalize(job)
+    except Exception as e:
+        print('Magazine ingestion failed:', job.id, str(e))
+        job.status = MagazineIngestionJob.Status.FAILED
+        job.error = str(e) or e.__class__.__name__
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished_at', 'updated_at'])
+
+    return job
+
+
+def _run_in_background(job_id):
+    close_old_connections()
+    try:
+        job = claim_job(job_id)
+        if job:
+            run_ingestion_job(job)
+    finally:
+        connection.close()
+
+
+def start_ingestion_job(job):
+    """
+    Kick off `job` on a background thread of this process.
+
+    With MAGAZINE_INGEST_IN_BACKGROUND off, jobs stay pending until the
+    `resume_magazine_ingestion` command picks them up.
+    """
+    if not settings.MAGAZINE_INGEST_IN_BACKGROUND:
+        return
+    threading.Thread(
+        target=_run_in_background,
+        args=(job.id,),
+        name=f'magazine-ingest-{job.id}',
+        daemon=True,
+    ).start()
@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from magazines.ingestion import claim_job, run_ingestion_job, stale_after_default
+from magazines.models import MagazineIngestionJob
+
+
+class Command(BaseCommand):
+    help = "Run pending magazine PDF ingestion jobs and resume failed or stalled ones from their last checkpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--job-id", type=int, help="Only process this job")
+        parser.add_argument(
+            "--stale-minutes",
+            type=int,
+            help="Reclaim running jobs that have not checkpointed for this long "
+                 "(default: MAGAZINE_INGEST_STALE_MINUTES)",
+        )
+        parser.add_argument("--skip-failed", action="store_true", help="Leave failed jobs alone")
+
+    def handle(self, *args, **options):
+        stale_after = (
+            timedelta(minutes=options["stale_minutes"])
+            if options["stale_minutes"] is not None
+            else stale_after_default()
+        )
+
+        statuses = [MagazineIngestionJob.Status.PENDING]
+        if not options["skip_failed"]:
+            statuses.append(MagazineIngestionJob.Status.FAILED)
+
+        jobs = MagazineIngestionJob.objects.filter(
+            Q(status__in=statuses)
+            | Q(status=MagazineIngestionJob.Status.RUNNING, updated_at__lt=timezone.now() - stale_after)
+        )
+        if options["job_id"]:
+            jobs = jobs.filter(pk=options["job_id"])
+
+        completed = failed = 0
+        for job_id in jobs.order_by("created_at").values_list("id", flat=True):
+            job = claim_job(job_id, stale_after=stale_after)
+            if job is None:
+                # Another runner got there first
+                continue
+
+            self.stdout.write(f"Ingesting job {job.id} (magazine {job.magazine_id}, {job.pages_done} pages done)")
+            job = run_ingestion_job(job)
+
+            if job.status == MagazineIngestionJob.Status.COMPLETED:
+                completed += 1
+                self.stdout.write(self.style.SUCCESS(f"Job {job.id}: {job.page_count} pages"))
+            else:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f"Job {job.id} failed: {job.error}"))
+
+        self.stdout.write(self.style.SUCCESS(f"Completed {completed} jobs, {failed} failed"))
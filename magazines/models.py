@@ -30,6 +30,7 @@ class Magazine(models.Model):
 
     cover_image_url = models.URLField(blank=True, null=True)
     cover_image_key = models.CharField(max_length=255, blank=True, null=True)
+    cover_image_variants = models.JSONField(default=dict, blank=True)
 
     show_on_home = models.BooleanField(default=False)
     on_home_priority = models.IntegerField(default=0)
@@ -50,6 +51,7 @@ class MagazinePage(models.Model):
     page_number = models.PositiveIntegerField()
     image_url = models.URLField()
     image_key = models.CharField(max_length=255)
+    image_variants = models.JSONField(default=dict, blank=True)
 
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
@@ -73,6 +75,7 @@ class FeaturedPerson(models.Model):
 
     image_url = models.URLField(blank=True, null=True)
     image_key = models.CharField(max_length=255, blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True)
 
     linkedin_link = models.URLField(blank=True, null=True)
     x_link = models.URLField(blank=True, null=True)  # X (formerly Twitter)
@@ -84,3 +87,43 @@ class FeaturedPerson(models.Model):
 
     def __str__(self):
         return f"{self.title} ({self.job_abbreviation})"
+
+
+class MagazineIngestionJob(models.Model):
+    """
+    Turns one uploaded PDF into MagazinePage rows.
+
+    `progress` records every page that has been rendered and uploaded, so a
+    job that dies halfway through an issue resumes from the first missing
+    page instead of starting over.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        COMPLETED = "completed", "Completed"
+        FAILED = "failed", "Failed"
+
+    magazine = models.ForeignKey(Magazine, on_delete=models.CASCADE, related_name='ingestion_jobs')
+    source_key = models.CharField(max_length=255)  # PDF key in S3_BLOG_BUCKET_NAME
+
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    page_count = models.PositiveIntegerField(null=True, blank=True)
+    pages_done = models.PositiveIntegerField(default=0)
+    # {"pages": {"1": {"url": ..., "key": ..., "thumbnail_url": ..., "thumbnail_key": ...}, ...}}
+    progress = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return f"Ingestion {self.id} - Magazine {self.magazine_id} ({self.status})"
@@ -0,0 +1,59 @@
+# magazines/pdf_render.py
+#
+# Worker side of magazine ingestion. These functions run in spawned worker
+# processes, so this module must not import Django models.
+
+import io
+
+
+_worker_pdf = None
+
+
+def open_worker_pdf(pdf_path):
+    """Process pool initializer: open the source PDF once per worker."""
+    global _worker_pdf
+    import pypdfium2 as pdfium
+
+    _worker_pdf = pdfium.PdfDocument(pdf_path)
+
+
+def count_pdf_pages(pdf_path):
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def render_pdf_page(page_number, dpi, thumbnail_width, quality):
+    """
+    Rasterise one page (1-based) of the worker's PDF.
+    Returns the page and its thumbnail as JPEG bytes.
+    """
+    from PIL import Image
+
+    page = _worker_pdf[page_number - 1]
+    try:
+        image = page.render(scale=dpi / 72).to_pil().convert('RGB')
+    finally:
+        page.close()
+
+    full = io.BytesIO()
+    image.save(full, 'JPEG', quality=quality, optimize=True, progressive=True)
+
+    thumbnail_width = min(thumbnail_width, image.width)
+    thumbnail_height = max(1, round(image.height * thumbnail_width / image.width))
+    thumbnail = io.BytesIO()
+    image.resize((thumbnail_width, thumbnail_height), Image.LANCZOS).save(
+        thumbnail, 'JPEG', quality=quality, optimize=True
+    )
+
+    return {
+        'page': page_number,
+        'width': image.width,
+        'image': full.getvalue(),
+        'thumbnail_width': thumbnail_width,
+        'thumbnail': thumbnail.getvalue(),
+    }
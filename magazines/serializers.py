@@ -1,7 +1,9 @@
 # magazines/serializers.py
 
 from rest_framework import serializers
-from .models import MagazineTag, Magazine, FeaturedPerson, MagazinePage
+from .models import MagazineTag, Magazine, FeaturedPerson, MagazinePage, MagazineIngestionJob
+from common.serializers import ImageSrcsetField
+from common.utils.nested_writes import sync_children
 
 class MagazineTagSerializer(serializers.ModelSerializer):
     class Meta:
@@ -11,9 +13,11 @@ class MagazineTagSerializer(serializers.ModelSerializer):
 
 
 class MagazinePageSerializer(serializers.ModelSerializer):
+    image_srcset = ImageSrcsetField(source='image_variants')
+
     class Meta:
         model = MagazinePage
-        fields = ['page_number', 'image_url', 'image_key']
+        fields = ['page_number', 'image_url', 'image_key', 'image_variants', 'image_srcset']
 
 
 class MagazineSerializer(serializers.ModelSerializer):
@@ -22,6 +26,7 @@ class MagazineSerializer(serializers.ModelSerializer):
         queryset=MagazineTag.objects.all(), write_only=True, many=True, source='tags'
     )
     pages = MagazinePageSerializer(many=True, required=False)
+    cover_image_srcset = ImageSrcsetField(source='cover_image_variants')
 
     class Meta:
         model = Magazine
@@ -29,6 +34,7 @@ class MagazineSerializer(serializers.ModelSerializer):
             'id', 'name', 'description', 'published_date',
             'is_published', 'views',
             'cover_image_url', 'cover_image_key',
+            'cover_image_variants', 'cover_image_srcset',
             'show_on_home', 'on_home_priority', 'tags', 'tag_ids',
             'pages',
             'created_at', 'updated_at',
@@ -41,8 +47,7 @@ class MagazineSerializer(serializers.ModelSerializer):
         magazine = Magazine.objects.create(**validated_data)
         magazine.tags.set(tags)
 
-        for page in pages_data:
-            MagazinePage.objects.create(magazine=magazine, **page)
+        sync_children(magazine.pages, pages_data, key='page_number', existing=[])
 
         return magazine
 
@@ -58,21 +63,43 @@ class MagazineSerializer(serializers.ModelSerializer):
             instance.tags.set(tags)
 
         if pages_data is not None:
-            # clear and recreate all pages (or implement smarter diff logic)
-            instance.pages.all().delete()
-            for page in pages_data:
-                MagazinePage.objects.create(magazine=instance, **page)
+            # Pages are matched by page number; only changed pages are written
+            sync_children(instance.pages, pages_data, key='page_number')
 
         return instance
 
 
+class MagazineListSerializer(serializers.ModelSerializer):
+    """
+    Slim listing representation: no pages, just how many there are.
+    Expects the queryset to annotate `page_count` and prefetch `tags`.
+    """
+    tags = MagazineTagSerializer(many=True, read_only=True)
+    page_count = serializers.IntegerField(read_only=True)
+    cover_image_srcset = ImageSrcsetField(source='cover_image_variants')
+
+    class Meta:
+        model = Magazine
+        fields = [
+            'id', 'name', 'description', 'published_date',
+            'is_published', 'views',
+            'cover_image_url', 'cover_image_key',
+            'cover_image_variants', 'cover_image_srcset',
+            'show_on_home', 'on_home_priority', 'tags',
+            'page_count',
+            'created_at', 'updated_at',
+        ]
+
+
 class FeaturedPersonSerializer(serializers.ModelSerializer):
+    image_srcset = ImageSrcsetField(source='image_variants')
+
     class Meta:
         model = FeaturedPerson
         fields = [
             'id', 'magazine', 'title', 'short_description', 'long_description',
             'job_title', 'job_abbreviation',
-            'image_url', 'image_key',
+            'image_url', 'image_key', 'image_variants', 'image_srcset',
             'linkedin_link', 'x_link', 'facebook_link', 'instagram_link',
             'created_at', 'updated_at',
         ]
@@ -80,12 +107,34 @@ class FeaturedPersonSerializer(serializers.ModelSerializer):
 
 
 class FeaturedPersonDetailSerializer(serializers.ModelSerializer):
+    image_srcset = ImageSrcsetField(source='image_variants')
+
     class Meta:
         model = FeaturedPerson
         fields = '__all__'
 
 # Short serializer (for list fetch, excludes long_description)
 class FeaturedPersonListSerializer(serializers.ModelSerializer):
+    image_srcset = ImageSrcsetField(source='image_variants')
+
     class Meta:
         model = FeaturedPerson
-        exclude = ['long_description']
\ No newline at end of file
+        exclude = ['long_description']
+
+
+class MagazineIngestionJobSerializer(serializers.ModelSerializer):
+    percent = serializers.SerializerMethodField()
+
+    class Meta:
+        model = MagazineIngestionJob
+        fields = [
+            'id', 'magazine', 'source_key', 'status',
+            'page_count', 'pages_done', 'percent', 'error',
+            'started_at', 'finished_at', 'created_at', 'updated_at',
+        ]
+        read_only_fields = fields
+
+    def get_percent(self, obj):
+        if not obj.page_count:
+            return 0
+        return round(obj.pages_done * 100 / obj.page_count, 1)
@@ -1,3 +1,34 @@
-from django.test import TestCase
+import datetime
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+
+from magazines.models import Magazine
+from misc.models import SearchDocument
+from misc.view_counter import apply_view_counts
+
+
+# Views are applied directly below instead of through the background flusher
+@override_settings(VIEW_COUNTER_ENABLED=False)
+class PublicMagazineDetailConditionalTests(TestCase):
+    def setUp(self):
+        self.magazine = Magazine.objects.create(name="Spring issue", published_date=datetime.date(2024, 3, 1),
+                                                is_published=True, views=4)
+        self.url = f"/api/magazines/details/public/{self.magazine.pk}/"
+
+    def test_flushed_views_change_the_etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["views"], 4)
+        etag = response["ETag"]
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        apply_view_counts(SearchDocument.Kind.MAGAZINE, {self.magazine.pk: 3})
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["views"], 7)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+
+    def test_unpublished_magazine_is_not_found(self):
+        self.magazine.is_published = False
+        self.magazine.save()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
@@ -3,7 +3,8 @@
 from django.urls import path
 from .views import (
     MagazineTagListCreateView, MagazineTagDeleteView,
-    MagazineListCreateAPIView, MagazineDetailAPIView, PublicMagazinesByYearView, PublicMagazinesForHomeView, PublicMagazinesForCurrentView, S3MagazineFileManager, S3MagazineImageManager, S3MagazineFeaturedImageManager, FeaturedPeopleByMagazineView, CreateFeaturedPersonView, UpdateFeaturedPersonView, DeleteFeaturedPersonView, FeaturedPersonDetailView, PublicMagazineDetailView, MagazineYearsAPIView
+    MagazineListCreateAPIView, MagazineDetailAPIView, PublicMagazinesByYearView, PublicMagazinesForHomeView, PublicMagazinesForCurrentView, S3MagazineFileManager, S3MagazineImageManager, S3MagazineFeaturedImageManager, FeaturedPeopleByMagazineView, CreateFeaturedPersonView, UpdateFeaturedPersonView, DeleteFeaturedPersonView, FeaturedPersonDetailView, PublicMagazineDetailView, MagazineYearsAPIView,
+    MagazineIngestionView, MagazineIngestionJobDetailView, PublicMagazinePagesView,
 )
 
 urlpatterns = [
@@ -14,6 +15,8 @@ urlpatterns = [
     path('details/<int:pk>/', MagazineDetailAPIView.as_view(), name='magazine-detail'),
     path('details/public/<int:pk>/', PublicMagazineDetailView.as_view(), name='magazine-detail-public'),
 
+    path('<int:magazine_id>/pages/', PublicMagazinePagesView.as_view(), name='magazine-pages-window'),
+
     path('home/', PublicMagazinesForHomeView.as_view(), name='magazines-for-home'),
     path('home/current/', PublicMagazinesForCurrentView.as_view(), name='magazines-current'),
     path('year/<int:year>/', PublicMagazinesByYearView.as_view(), name='magazine-by-year'),
@@ -27,6 +30,9 @@ urlpatterns = [
     path('featured/<int:pk>/delete/', DeleteFeaturedPersonView.as_view(), name='delete-featured-person'),
 
 
+    path('<int:magazine_id>/ingest/', MagazineIngestionView.as_view(), name='magazine-ingest'),
+    path('ingest/<int:pk>/', MagazineIngestionJobDetailView.as_view(), name='magazine-ingest-job'),
+
     path('s3/pages/', S3MagazineFileManager.as_view(), name='magazine-s3-manager'),
     path('s3-image/', S3MagazineImageManager.as_view(), name='magazine-s3-manager'),
     path('s3-featured-image/', S3MagazineFeaturedImageManager.as_view(), name='magazine-s3-manager'),
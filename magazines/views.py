@@ -4,18 +4,30 @@ from rest_framework import status, generics
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny
-from magazines.models import Magazine, MagazineTag, FeaturedPerson, MagazinePage
-from .serializers import MagazineSerializer, MagazineTagSerializer, FeaturedPersonSerializer, FeaturedPersonDetailSerializer, FeaturedPersonListSerializer, MagazinePageSerializer
+from magazines.models import Magazine, MagazineTag, FeaturedPerson, MagazinePage, MagazineIngestionJob
+from .serializers import MagazineSerializer, MagazineListSerializer, MagazineTagSerializer, FeaturedPersonSerializer, FeaturedPersonDetailSerializer, FeaturedPersonListSerializer, MagazinePageSerializer, MagazineIngestionJobSerializer
 from common.views import CustomJWTAuthentication, IsAdminUser
 from datetime import datetime
 from common.constants import S3_MAGAZINE_BUCKET_NAME, S3_BLOG_BUCKET_NAME
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from common.utils.image_variants import upload_image_with_variants, delete_image_variants
 from common.utils.s3_utils import upload_image_to_s3, delete_image_from_s3
+from common.utils.storage import MB, get_storage
+from common.utils.tag_filter import filter_by_tags
+from common.utils.upload_engine import upload_files_to_s3
+from common.utils.response_cache import cached_response, invalidate_model
+from common.utils.conditional import conditional_response, detail_validators, touch_updated_at
 from django.conf import settings
 from django.shortcuts import get_object_or_404
+from django.db import transaction
+from functools import partial
+from .ingestion import requeue_job, start_ingestion_job
 
 from django.db.models.functions import ExtractYear
-from django.db.models import Count, Q
+from django.db.models import Count
+from misc.models import SearchDocument
+from misc.search import filter_by_search
+from misc.view_counter import record_view
 
 
 # --- TAG Views ---
@@ -27,6 +39,7 @@ class MagazineTagListCreateView(APIView):
             return [AllowAny()]
         return [IsAdminUser()]
 
+    @cached_response('magazines.magazinetag')
     def get(self, request):
         tags = MagazineTag.objects.all()
         serializer = MagazineTagSerializer(tags, many=True)
@@ -48,6 +61,11 @@ class MagazineTagDeleteView(generics.DestroyAPIView):
 
 
 # --- Magazine Views ---
+def with_list_data(magazines):
+    """Annotate/prefetch what MagazineListSerializer reads, in two queries total."""
+    return magazines.annotate(page_count=Count('pages', distinct=True)).prefetch_related('tags')
+
+
 class MagazinePageListCreateAPIView(generics.ListCreateAPIView):
     serializer_class = MagazinePageSerializer
     permission_classes = [IsAdminUser]
@@ -60,6 +78,7 @@ class MagazinePageListCreateAPIView(generics.ListCreateAPIView):
         magazine_id = self.kwargs['magazine_id']
         magazine = get_object_or_404(Magazine, id=magazine_id)
         serializer.save(magazine=magazine)
+        touch_updated_at(Magazine, magazine.pk)
 
 class MagazineListCreateAPIView(APIView):
     queryset = Magazine.objects.all().prefetch_related('pages', 'tags')
@@ -67,8 +86,8 @@ class MagazineListCreateAPIView(APIView):
     permission_classes = [IsAdminUser]
 
     def get(self, request):
-        magazines = Magazine.objects.all().order_by('-published_date')
-        serializer = MagazineSerializer(magazines, many=True)
+        magazines = with_list_data(Magazine.objects.all()).order_by('-published_date')
+        serializer = MagazineListSerializer(magazines, many=True)
         return Response(serializer.data)
 
     def post(self, request):
@@ -88,7 +107,8 @@ class MagazineDetailAPIView(APIView):
         return generics.get_object_or_404(Magazine, pk=pk)
 
     def get(self, request, pk):
-        magazine = self.get_object(pk)
+        # Prefetch for reads only: writes replace pages and would leave the cache stale
+        magazine = generics.get_object_or_404(self.queryset, pk=pk)
         serializer = MagazineSerializer(magazine)
         return Response(serializer.data)
 
@@ -112,7 +132,15 @@ class PublicMagazineDetailView(APIView):
     authentication_classes = []
 
     def get(self, request, pk):
-        magazine = get_object_or_404(Magazine, id=pk, is_published=True)
+        # The view counter flush doesn't move updated_at, so views are validated too
+        row = get_object_or_404(Magazine.objects.values('pk', 'updated_at', 'views'), id=pk, is_published=True)
+        record_view(SearchDocument.Kind.MAGAZINE, row['pk'])
+        return conditional_response(
+            request, detail_validators(request, row['pk'], row['updated_at'], row['views']), partial(self.build, pk),
+        )
+
+    def build(self, pk):
+        magazine = get_object_or_404(self.queryset, id=pk, is_published=True)
         serializer = MagazineSerializer(magazine)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -137,19 +165,18 @@ class PublicMagazinesByYearView(APIView):
         # Step 2: Apply slug filter (optional)
         slug = request.query_params.get("slug")
         if slug:
-            magazines = magazines.filter(tags__slug=slug)
+            magazines = filter_by_tags(magazines, [slug])
 
         # Step 3: Apply search filter (optional)
         search_query = request.query_params.get("search")
         if search_query:
-            magazines = magazines.filter(
-                Q(name__icontains=search_query) |
-                Q(description__icontains=search_query)
-            )
-
-        # Step 4: Order and serialize
-        magazines = magazines.order_by('-published_date')
-        serializer = MagazineSerializer(magazines, many=True)
+            magazines = filter_by_search(magazines, SearchDocument.Kind.MAGAZINE, search_query)
+
+        # Step 4: Order (newest first unless ranked by the search) and serialize
+        magazines = with_list_data(magazines)
+        if not search_query:
+            magazines = magazines.order_by('-published_date')
+        serializer = MagazineListSerializer(magazines, many=True)
         return Response(serializer.data, status=200)
 
     
@@ -167,6 +194,7 @@ class PublicMagazinesForCurrentView(APIView):
             'published_date': magazine.published_date,
             'cover_image_url': magazine.cover_image_url if magazine.cover_image_url else None,
             'cover_image_key': magazine.cover_image_key if magazine.cover_image_key else None,
+            'cover_image_variants': magazine.cover_image_variants,
             'description': magazine.description,
             'is_published': magazine.is_published,
             'show_on_home': magazine.show_on_home,
@@ -181,17 +209,69 @@ class PublicMagazinesForHomeView(APIView):
     permission_classes = [AllowAny]  # ✅ public
     authentication_classes = []
 
+    @cached_response('magazines.magazine', 'magazines.magazinetag', 'magazines.magazinepage')
     def get(self, request):
-        magazines = Magazine.objects.filter(show_on_home=True).order_by('on_home_priority')
+        magazines = with_list_data(Magazine.objects.filter(show_on_home=True)).order_by('on_home_priority')
 
-        serializer = MagazineSerializer(magazines, many=True)
+        serializer = MagazineListSerializer(magazines, many=True)
         return Response(serializer.data, status=200)
+
+
+class PublicMagazinePagesView(APIView):
+    """
+    A window of pages so the reader can load them lazily as the user flips:
+    /api/magazines/<id>/pages/?from=11&to=20  (1-based, inclusive)
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+    default_window = 10
+    max_window = 50
+
+    def get(self, request, magazine_id):
+        # Page writes touch the magazine's updated_at, so it validates the window too
+        row = get_object_or_404(Magazine.objects.values('pk', 'updated_at'), id=magazine_id, is_published=True)
+        return conditional_response(
+            request, detail_validators(request, row['pk'], row['updated_at']),
+            partial(self.build, request, magazine_id),
+        )
+
+    def build(self, request, magazine_id):
+        magazine = get_object_or_404(
+            Magazine.objects.annotate(page_count=Count('pages')),
+            id=magazine_id,
+            is_published=True,
+        )
+
+        try:
+            page_from = max(int(request.query_params.get('from', 1)), 1)
+            page_to = int(request.query_params.get('to', page_from + self.default_window - 1))
+        except ValueError:
+            return Response({'error': '`from` and `to` must be integers'}, status=400)
+
+        if page_to < page_from:
+            return Response({'error': '`to` must be greater than or equal to `from`'}, status=400)
+        page_to = min(page_to, page_from + self.max_window - 1)
+
+        pages = MagazinePage.objects.filter(
+            magazine_id=magazine.id,
+            page_number__gte=page_from,
+            page_number__lte=page_to,
+        ).order_by('page_number')
+
+        return Response({
+            'magazine_id': magazine.id,
+            'page_count': magazine.page_count,
+            'from': page_from,
+            'to': page_to,
+            'pages': MagazinePageSerializer(pages, many=True).data,
+        }, status=200)
     
 
 class MagazineYearsAPIView(APIView):
     permission_classes = [AllowAny]
     authentication_classes = []
 
+    @cached_response('magazines.magazine')
     def get(self, request):
         years = (
             Magazine.objects.filter(is_published=True)
@@ -300,25 +380,57 @@ class S3MagazineFileManager(APIView):
         bucket = S3_BLOG_BUCKET_NAME
         folder = f'magazines/{magazine_id}'
 
-        uploaded = []
-
         for index, image_file in enumerate(files):
             # Ensure ordering: page_001.jpg, page_002.jpg...
             page_number = index + 1
             file_ext = image_file.name.split('.')[-1].lower()
             image_file.name = f'page_{page_number:03d}.{file_ext}'
 
-            response = upload_image_to_s3(image_file=image_file, folder=folder, bucket=bucket)
-
-            if response['error']:
-                return Response({'error': f"Failed to upload page {page_number}", 'message': response['message']}, status=400)
+        # Pages upload concurrently, results come back in page order
+        results = upload_files_to_s3(files, folder=folder, bucket=bucket, variants=True)
 
+        uploaded = []
+        failed = []
+        for result in results:
+            page_number = result['index'] + 1
+            if result['error']:
+                failed.append({'page': page_number, 'message': result['message']})
+                continue
             uploaded.append({
-                'url': response['url'],
-                'key': response['key'],
+                'url': result['url'],
+                'key': result['key'],
+                'variants': result['variants'],
                 'page': page_number
             })
 
+        if failed:
+            return Response({
+                'error': f"Failed to upload {len(failed)} of {len(files)} pages",
+                'failed': failed,
+                'pages': uploaded,
+            }, status=400)
+
+        # The folder name may not be a saved magazine yet, rows are only kept for existing ones
+        magazine = Magazine.objects.filter(id=magazine_id).first() if str(magazine_id).isdigit() else None
+        if magazine:
+            with transaction.atomic():
+                MagazinePage.objects.filter(
+                    magazine=magazine,
+                    page_number__in=[page['page'] for page in uploaded],
+                ).delete()
+                MagazinePage.objects.bulk_create([
+                    MagazinePage(
+                        magazine=magazine,
+                        page_number=page['page'],
+                        image_url=page['url'],
+                        image_key=page['key'],
+                        image_variants=page['variants'],
+                    )
+                    for page in uploaded
+                ])
+                invalidate_model(MagazinePage)
+                touch_updated_at(Magazine, magazine.pk)
+
         return Response({
             'message': f"{len(uploaded)} pages uploaded",
             'pages': uploaded
@@ -337,6 +449,7 @@ class S3MagazineFileManager(APIView):
 
         bucket = S3_BLOG_BUCKET_NAME
         response = delete_image_from_s3(bucket=bucket, image_key=file_key)
+        delete_image_variants(bucket=bucket, image_key=file_key)
 
         if not response['error']:
             return Response({'message': 'Page deleted successfully'}, status=200)
@@ -378,9 +491,10 @@ class S3MagazineFileManager(APIView):
 
         # Delete from S3 first
         delete_image_from_s3(bucket=bucket, image_key=key)
+        delete_image_variants(bucket=bucket, image_key=key)
 
         # Upload to S3
-        response = upload_image_to_s3(image_file=image_file, folder=folder, bucket=bucket)
+        response = upload_image_with_variants(image_file=image_file, folder=folder, bucket=bucket)
 
         if response['error']:
             return Response({'error': 'Failed to replace page', 'message': response['message']}, status=400)
@@ -392,13 +506,16 @@ class S3MagazineFileManager(APIView):
             defaults={
                 'image_url': response['url'],
                 'image_key': response['key'],
+                'image_variants': response['variants'],
             }
         )
+        touch_updated_at(Magazine, magazine.pk)
 
         return Response({
             'message': 'Page replaced',
             'url': response['url'],
-            'key': response['key']
+            'key': response['key'],
+            'variants': response['variants'],
         }, status=200)
 
 
@@ -471,13 +588,14 @@ class S3MagazineImageManager(APIView):
             return Response({'error': 'No file provided'}, status=400)
 
         bucket = S3_BLOG_BUCKET_NAME
-        response = upload_image_to_s3(image_file=upload_file, folder=folder, bucket=bucket)
+        response = upload_image_with_variants(image_file=upload_file, folder=folder, bucket=bucket)
 
         if not response['error']:
             return Response({
                 'message': response['message'],
                 'url': response['url'],
-                'key': response['key']
+                'key': response['key'],
+                'variants': response['variants'],
             }, status=200)
         
         return Response({'message': response['message']}, status=400)
@@ -494,6 +612,7 @@ class S3MagazineImageManager(APIView):
 
         bucket = S3_BLOG_BUCKET_NAME
         response = delete_image_from_s3(bucket=bucket, image_key=file_key)
+        delete_image_variants(bucket=bucket, image_key=file_key)
 
         if not response['error']:
             return Response({'message': response['message']}, status=200)
@@ -520,13 +639,14 @@ class S3MagazineFeaturedImageManager(APIView):
             return Response({'error': 'No file provided'}, status=400)
 
         bucket = S3_BLOG_BUCKET_NAME
-        response = upload_image_to_s3(image_file=upload_file, folder=folder, bucket=bucket)
+        response = upload_image_with_variants(image_file=upload_file, folder=folder, bucket=bucket)
 
         if not response['error']:
             return Response({
                 'message': response['message'],
                 'url': response['url'],
-                'key': response['key']
+                'key': response['key'],
+                'variants': response['variants'],
             }, status=200)
         
         return Response({'message': response['message']}, status=400)
@@ -543,8 +663,87 @@ class S3MagazineFeaturedImageManager(APIView):
 
         bucket = S3_BLOG_BUCKET_NAME
         response = delete_image_from_s3(bucket=bucket, image_key=file_key)
+        delete_image_variants(bucket=bucket, image_key=file_key)
 
         if not response['error']:
             return Response({'message': response['message']}, status=200)
 
         return Response({'message': response['message']}, status=400)
+
+
+class MagazineIngestionView(APIView):
+    parser_classes = (MultiPartParser, FormParser, JSONParser)
+    authentication_classes = [CustomJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, magazine_id):
+        """List ingestion jobs of a magazine, newest first."""
+        jobs = MagazineIngestionJob.objects.filter(magazine_id=magazine_id)
+        serializer = MagazineIngestionJobSerializer(jobs, many=True)
+        return Response(serializer.data, status=200)
+
+    def post(self, request, magazine_id):
+        """
+        Turn one PDF into the magazine's pages. The pages are rendered, uploaded
+        and saved in the background; poll the returned job for progress.
+        Send either:
+        - file (form-data): the PDF
+        - key (JSON): a PDF already uploaded to the blog bucket
+        """
+        magazine = get_object_or_404(Magazine, pk=magazine_id)
+        bucket = S3_BLOG_BUCKET_NAME
+        pdf_file = request.FILES.get('file')
+        source_key = request.data.get('key')
+
+        if pdf_file:
+            if pdf_file.content_type != 'application/pdf':
+                return Response({'error': 'Only PDF files can be ingested'}, status=400)
+            if pdf_file.size > settings.MAGAZINE_PDF_MAX_UPLOAD_MB * MB:
+                return Response({'error': f'PDF exceeds size limit of {settings.MAGAZINE_PDF_MAX_UPLOAD_MB} MB'}, status=400)
+
+            response = upload_image_to_s3(image_file=pdf_file, folder=f'magazines/{magazine.id}/source', bucket=bucket)
+            if response['error']:
+                return Response({'error': 'Failed to store PDF', 'message': response['message']}, status=400)
+            source_key = response['key']
+
+        elif source_key:
+            head = get_storage().head_object(bucket, source_key)
+            if head is None:
+                return Response({'error': 'PDF not found'}, status=404)
+            if head['content_type'] != 'application/pdf':
+                return Response({'error': 'Only PDF files can be ingested'}, status=400)
+
+        else:
+            return Response({'error': 'Provide a PDF `file` or an uploaded `key`'}, status=400)
+
+        job = MagazineIngestionJob.objects.create(magazine=magazine, source_key=source_key)
+        start_ingestion_job(job)
+
+        return Response(MagazineIngestionJobSerializer(job).data, status=202)
+
+
+class MagazineIngestionJobDetailView(APIView):
+    authentication_classes = [CustomJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, pk):
+        """Progress of one ingestion job."""
+        job = get_object_or_404(MagazineIngestionJob, pk=pk)
+        return Response(MagazineIngestionJobSerializer(job).data, status=200)
+
+    def post(self, request, pk):
+        """
+        Resume a failed or stalled job from its last checkpoint.
+        Pages that were already uploaded are not rendered again.
+        """
+        job = get_object_or_404(MagazineIngestionJob, pk=pk)
+        if job.status == MagazineIngestionJob.Status.COMPLETED:
+            return Response({'error': 'Job already completed'}, status=400)
+
+        if not requeue_job(job.id):
+            return Response({'error': 'Job is still running'}, status=409)
+
+        job.refresh_from_db()
+        start_ingestion_job(job)
+
+        return Response(MagazineIngestionJobSerializer(job).data, status=202)
@@ -17,7 +17,7 @@ class EventDayAdmin(admin.ModelAdmin):
 @admin.register(Event)
 class EventAdmin(admin.ModelAdmin):
     inlines = [EventDayInline]
-    list_display = ('title', 'event_date', 'is_published', 'created_at')
+    list_display = ('title', 'event_date', 'is_published', 'registrations_count', 'created_at')
     list_filter = ('is_published', 'event_date')
     search_fields = ('title', 'short_description', 'long_description')
     readonly_fields = ('created_at', 'updated_at')
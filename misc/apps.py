@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class MiscConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'misc'
+
+    def ready(self):
+        from .signals import (
+            connect_event_cache_signals, connect_registration_signals, connect_search_signals,
+            connect_trending_signals,
+        )
+
+        connect_search_signals()
+        connect_event_cache_signals()
+        connect_registration_signals()
+        connect_trending_signals()
@@ -0,0 +1,68 @@
+# misc/event_cache.py
+#
+# Public event reads. Listings prefetch days -> activities and metrics in
+# three queries whatever the number of events; the serialized detail of a
+# published event is cached by slug, with what it needs for conditional GETs,
+# and dropped by misc.signals whenever the event, one of its days,
+# activities or metrics changes. That drop only reaches every worker with a
+# shared cache; with a per-process one each cached detail is first checked
+# against the event row's updated_at, which the same changes move.
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from common.utils.cache_backend import cache_is_shared
+
+from .models import Event
+from .serializers import EventSerializer
+
+
+EVENT_PREFETCH = ("days__activities", "metrics")
+
+# Request value -> (filter, ordering)
+EVENT_WINDOWS = {
+    "upcoming": ("event_date__gte", "event_date"),
+    "past": ("event_date__lt", "-event_date"),
+}
+
+
+def published_events(when=None):
+    """Published events, optionally only `upcoming` (today on) or `past` ones."""
+    events = Event.objects.filter(is_published=True).prefetch_related(*EVENT_PREFETCH)
+    if when in EVENT_WINDOWS:
+        lookup, ordering = EVENT_WINDOWS[when]
+        return events.filter(**{lookup: timezone.localdate()}).order_by(ordering, "id")
+    return events.order_by("-event_date", "id")
+
+
+def _detail_key(slug):
+    return f"event_detail:v2:{slug}"
+
+
+def _is_current(slug, entry):
+    updated_at = Event.objects.filter(pk=entry["id"], slug=slug, is_published=True).values_list("updated_at", flat=True).first()
+    return updated_at == entry["updated_at"]
+
+
+def get_event_detail(slug):
+    """
+    {"id", "updated_at", "data"} of the published event with this slug, or
+    None when there is none; `data` is the serialized event.
+    """
+    key = _detail_key(slug)
+    entry = cache.get(key)
+    if entry is not None and not cache_is_shared() and not _is_current(slug, entry):
+        entry = None
+    if entry is None:
+        event = published_events().filter(slug=slug).first()
+        if event is None:
+            return None
+        entry = {"id": event.id, "updated_at": event.updated_at, "data": EventSerializer(event).data}
+        cache.set(key, entry, settings.EVENT_DETAIL_CACHE_SECONDS)
+    return entry
+
+
+def invalidate_event_detail(slug):
+    if slug:
+        cache.delete(_detail_key(slug))
@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from misc.trending import compute_trending
+
+
+class Command(BaseCommand):
+    help = "Rebuild the trending ranking from the hourly view buckets (run e.g. every 10 minutes)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--no-prune", action="store_true", help="Keep view buckets older than the window")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        ranked = compute_trending(prune=not options["no_prune"])
+        summary = ", ".join(f"{count} {kind}" for kind, count in ranked.items())
+        self.stdout.write(self.style.SUCCESS(f"Ranked {summary} in {time.monotonic() - started:.2f}s"))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from misc.models import SearchDocument
+from misc.search import get_registry, index_instance, prune_fts_rows, remove_document
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search documents of published blogs, books, podcasts and magazines"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--kind", choices=SearchDocument.Kind.values, help="Only rebuild this content type")
+        parser.add_argument("--chunk-size", type=int, default=500, help="Objects loaded per query (default: 500)")
+
+    def handle(self, *args, **options):
+        registry = get_registry()
+        kinds = [options["kind"]] if options["kind"] else list(registry)
+
+        for kind in kinds:
+            model, _builder, searchable, _fields = registry[kind]
+
+            indexed = 0
+            for instance in model.objects.filter(searchable).iterator(chunk_size=options["chunk_size"]):
+                index_instance(kind, instance)
+                indexed += 1
+
+            # Documents whose object was deleted or unpublished while signals were not running
+            live_ids = model.objects.filter(searchable).values_list("pk", flat=True)
+            stale_ids = list(
+                SearchDocument.objects.filter(kind=kind).exclude(object_id__in=live_ids).values_list("object_id", flat=True)
+            )
+            for object_id in stale_ids:
+                remove_document(kind, object_id)
+
+            self.stdout.write(self.style.SUCCESS(f"{kind}: indexed {indexed}, removed {len(stale_ids)}"))
+
+        prune_fts_rows()
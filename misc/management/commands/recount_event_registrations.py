@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from misc.models import Event
+from misc.registrations import refresh_registration_counts
+
+
+class Command(BaseCommand):
+    help = "Recompute Event.registrations_count from the stored registrations"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--event", dest="slugs", action="append", help="Only this event slug (repeatable)")
+
+    def handle(self, *args, **options):
+        events = Event.objects.all()
+        if options["slugs"]:
+            events = events.filter(slug__in=options["slugs"])
+        event_ids = list(events.values_list("id", flat=True))
+        refresh_registration_counts(event_ids)
+        self.stdout.write(self.style.SUCCESS(f"Recounted registrations for {len(event_ids)} events"))
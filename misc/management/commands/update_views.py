@@ -1,30 +1,65 @@
 import random
+import time
+
 from django.core.management.base import BaseCommand
-from django.utils import timezone
 from blogs.models import Blog
 from books.models import Book
 from magazines.models import Magazine
 from podcasts.models import Podcast
+from misc.view_counter import views_increment
 
 
 class Command(BaseCommand):
     help = "Weekly update of views for Blog, Book, Magazine, and Podcast"
 
-    def handle(self, *args, **kwargs):
-        self.update_views(Blog.objects.all(), "Blog")
-        self.update_views(Book.objects.all(), "Book")
-        self.update_views(Magazine.objects.all(), "Magazine")
-        self.update_views(Podcast.objects.all(), "Podcast")
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Rows per UPDATE (default 1000)")
+        parser.add_argument("--dry-run", action="store_true", help="Compute the increments without writing them")
+
+    def handle(self, *args, **options):
+        chunk_size = max(1, options["chunk_size"])
+        dry_run = options["dry_run"]
+        started = time.monotonic()
+        for model in (Blog, Book, Magazine, Podcast):
+            self.update_views(model, chunk_size, dry_run)
+        self.stdout.write(f"Done in {time.monotonic() - started:.2f}s" + (" (dry run, nothing written)" if dry_run else ""))
+
+    def update_views(self, model, chunk_size, dry_run):
+        """
+        Stream id/priority only and add each chunk's increments with a single
+        UPDATE ... SET views = views + CASE id WHEN ... END, so no instance is
+        loaded or saved and the current views are never read back.
+        """
+        started = time.monotonic()
+        has_priority = any(field.name == "priority" for field in model._meta.concrete_fields)
+        fields = ("id", "priority") if has_priority else ("id",)
 
-    def update_views(self, queryset, model_name):
         updated_count = 0
-        for obj in queryset:
-            increment = self.calculate_increment(obj)
-            obj.views += increment
-            obj.save(update_fields=["views"])
-            updated_count += 1
+        added = 0
+        counts = {}
+
+        def write(counts):
+            if not dry_run:
+                model.objects.filter(pk__in=counts).update(views=views_increment(counts))
+
+        for row in model.objects.order_by().values_list(*fields, named=True).iterator(chunk_size=chunk_size):
+            counts[row.id] = self.calculate_increment(row)
+            if len(counts) >= chunk_size:
+                write(counts)
+                updated_count += len(counts)
+                added += sum(counts.values())
+                counts = {}
+        if counts:
+            write(counts)
+            updated_count += len(counts)
+            added += sum(counts.values())
+
+        verb = "Would update" if dry_run else "Updated"
         self.stdout.write(
-            self.style.SUCCESS(f"Updated {updated_count} {model_name} objects")
+            self.style.SUCCESS(
+                f"{verb} {updated_count} {model.__name__} objects (+{added} views) "
+                f"in {time.monotonic() - started:.2f}s"
+            )
         )
 
     def calculate_increment(self, obj):
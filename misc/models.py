@@ -5,6 +5,7 @@ from django.core.exceptions import ValidationError
 from django.utils.text import slugify
 import uuid
 from django.utils import timezone
+from common.utils.fulltext import FullTextIndex
 
 
 class Career(models.Model):
@@ -67,6 +68,7 @@ class Advertisement(models.Model):
     )
     image_url = models.URLField()
     image_key = models.CharField(max_length=255)
+    image_variants = models.JSONField(default=dict, blank=True)
     form_link = models.URLField()
 
     def clean(self):
@@ -94,15 +96,25 @@ class Event(models.Model):
     event_type = models.CharField(max_length=255, null=True, blank=True)
 
     is_published = models.BooleanField(default=False)
+    # Maintained by misc.registrations so admins don't need COUNT(*) over EventForm
+    registrations_count = models.PositiveIntegerField(default=0, editable=False)
 
     cover_image_url = models.URLField(null=True, blank=True)
     cover_image_key = models.CharField(max_length=255, null=True, blank=True)
+    cover_image_variants = models.JSONField(default=dict, blank=True)
     banner_image_url = models.URLField(null=True, blank=True)
     banner_image_key = models.CharField(max_length=255, null=True, blank=True)
+    banner_image_variants = models.JSONField(default=dict, blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Public listing: published events split into upcoming / past
+            models.Index(fields=["is_published", "event_date"], name="event_published_date_idx"),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.slug:
             base_slug = slugify(self.title)
@@ -157,6 +169,16 @@ class EventForm(models.Model):
 
     submitted_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            # One registration per email and event; resubmitting updates it (misc.registrations)
+            models.UniqueConstraint(fields=["event", "email"], name="unique_event_registration_email"),
+        ]
+        indexes = [
+            # Admin registration list: an event's registrations, newest first
+            models.Index(fields=["event", "submitted_at"], name="eventform_event_submitted_idx"),
+        ]
+
     def __str__(self):
         return f"{self.full_name} - {self.event.title}"
 
@@ -202,6 +224,7 @@ class EventGallery(models.Model):
 
     image_url = models.URLField()
     image_key = models.CharField(max_length=255, null=True, blank=True)
+    image_variants = models.JSONField(default=dict, blank=True)
 
     order = models.PositiveIntegerField(default=0)
     caption = models.CharField(max_length=255, blank=True, null=True)
@@ -224,6 +247,7 @@ class Partners(models.Model):
 
     logo_image_url = models.URLField(null=True, blank=True)
     logo_image_key = models.CharField(max_length=255, null=True, blank=True)
+    logo_image_variants = models.JSONField(default=dict, blank=True)
 
     partner_website_link = models.URLField()
 
@@ -235,6 +259,7 @@ class PartnerBannerImage(models.Model):
     partner = models.ForeignKey(Partners, related_name='banner_images', on_delete=models.CASCADE)
     image_url = models.URLField()
     image_key = models.CharField(max_length=255, null=True, blank=True)
+    image_variants = models.JSONField(default=dict, blank=True)
 
     def __str__(self):
         return f"{self.partner.name} - Banner Image"
@@ -248,3 +273,84 @@ class PartnerAward(models.Model):
 
     def __str__(self):
         return f"{self.partner.name} - {self.title}"
+
+
+class SearchDocument(models.Model):
+    """
+    Denormalised, full-text indexed copy of a published blog, book, podcast
+    or magazine. Kept in sync on save by misc.signals; see misc.search.
+    """
+
+    class Kind(models.TextChoices):
+        BLOG = "blog", "Blog"
+        BOOK = "book", "Book"
+        PODCAST = "podcast", "Podcast"
+        MAGAZINE = "magazine", "Magazine"
+
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    object_id = models.PositiveBigIntegerField()
+
+    title = models.CharField(max_length=255)
+    author = models.CharField(max_length=255, blank=True)
+    body = models.TextField(blank=True)  # description + extracted content/transcript text
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "object_id"], name="unique_search_document"),
+        ]
+        indexes = [
+            FullTextIndex(fields=["title", "author", "body"], name="search_document_fulltext"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}: {self.title}"
+
+
+class ContentViewBucket(models.Model):
+    """
+    Views of one blog, book, podcast or magazine during one hour. Filled by
+    the view counter flush; read and pruned by `compute_trending`.
+    """
+    kind = models.CharField(max_length=20, choices=SearchDocument.Kind.choices)
+    object_id = models.PositiveBigIntegerField()
+    bucket_start = models.DateTimeField()
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "object_id", "bucket_start"], name="unique_content_view_bucket"),
+        ]
+        indexes = [
+            models.Index(fields=["bucket_start"], name="content_view_bucket_start_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} @ {self.bucket_start}: {self.views}"
+
+
+class TrendingScore(models.Model):
+    """
+    Materialized trending ranking, rewritten by `compute_trending`. Carries
+    what a listing shows so /trending/ reads nothing else.
+    """
+    kind = models.CharField(max_length=20, choices=SearchDocument.Kind.choices)
+    object_id = models.PositiveBigIntegerField()
+    title = models.CharField(max_length=255)
+    image_url = models.URLField(max_length=500, blank=True, null=True)
+    score = models.FloatField()
+    recent_views = models.PositiveIntegerField(default=0)  # undecayed views within the window
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "object_id"], name="unique_trending_score"),
+        ]
+        indexes = [
+            models.Index(fields=["kind", "-score"], name="trending_kind_score_idx"),
+            models.Index(fields=["-score"], name="trending_score_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}: {self.score:.2f}"
@@ -0,0 +1,200 @@
+# misc/registrations.py
+#
+# Event registration (EventForm) ingestion. The event is resolved from its
+# slug through the cache (when it is shared by every worker), a repeat submission for the same (event, email)
+# updates the earlier registration instead of adding one, and
+# Event.registrations_count is kept current. With EVENT_REGISTRATION_BUFFERED
+# on, registrations are queued in-process and written in batches by a
+# background thread: much cheaper under a burst, but a worker that dies
+# loses what it hadn't flushed yet.
+
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, close_old_connections, connections, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from common.utils.cache_backend import cache_is_shared
+
+from .models import Event, EventForm
+
+
+logger = logging.getLogger(__name__)
+
+
+REGISTRATION_FIELDS = (
+    "full_name", "phone_number", "city_country",
+    "professional_title_organization", "linkedin_or_website", "updated_profile",
+)
+
+
+# Slug lookup
+
+def _slug_key(slug):
+    return f"event_id_by_slug:v1:{slug}"
+
+
+def get_event_id(slug):
+    """Id of the event with this slug, or None. Event slugs don't change, so it's cached."""
+    if not cache_is_shared():
+        # misc.signals forgets the slug of a deleted event in this process only
+        return Event.objects.filter(slug=slug).values_list("id", flat=True).first()
+    key = _slug_key(slug)
+    event_id = cache.get(key)
+    if event_id is None:
+        event_id = Event.objects.filter(slug=slug).values_list("id", flat=True).first()
+        if event_id is None:
+            return None
+        cache.set(key, event_id, settings.EVENT_SLUG_CACHE_SECONDS)
+    return event_id
+
+
+def forget_event_slug(slug):
+    if slug:
+        cache.delete(_slug_key(slug))
+
+
+# Writes
+
+def normalize_email(email):
+    return email.strip().lower()
+
+
+def save_registration(event_id, data):
+    """
+    Insert or update the registration of `data["email"]` for the event.
+    Returns (registration, created). Raises Event.DoesNotExist when the
+    event was deleted after its slug was resolved.
+    """
+    defaults = {field: data.get(field) for field in REGISTRATION_FIELDS if field in data}
+    try:
+        with transaction.atomic():
+            registration, created = EventForm.objects.update_or_create(
+                event_id=event_id, email=normalize_email(data["email"]), defaults=defaults,
+            )
+            if created:
+                Event.objects.filter(pk=event_id).update(registrations_count=F("registrations_count") + 1)
+    except IntegrityError:
+        if not Event.objects.filter(pk=event_id).exists():
+            raise Event.DoesNotExist(f"Event {event_id} no longer exists")
+        raise
+    return registration, created
+
+
+def refresh_registration_counts(event_ids):
+    """Recount registrations_count for `event_ids` in one UPDATE."""
+    counts = (
+        EventForm.objects.filter(event_id=OuterRef("pk"))
+        .order_by().values("event_id").annotate(n=Count("id")).values("n")
+    )
+    Event.objects.filter(pk__in=set(event_ids)).update(registrations_count=Coalesce(Subquery(counts), 0))
+
+
+def bulk_save_registrations(entries):
+    """
+    Upsert a batch of (event_id, data) with one INSERT ... ON CONFLICT /
+    ON DUPLICATE KEY UPDATE, then recount the events involved. Entries
+    whose event has been deleted meanwhile are dropped (and logged) rather
+    than failing the batch.
+    """
+    live_event_ids = set(
+        Event.objects.filter(pk__in={event_id for event_id, _data in entries}).values_list("id", flat=True)
+    )
+    rows = {}
+    for event_id, data in entries:
+        if event_id not in live_event_ids:
+            logger.warning("Dropped registration of %s: event %s no longer exists", data.get("email"), event_id)
+            continue
+        email = normalize_email(data["email"])
+        # The last submission for an (event, email) wins, as with save_registration
+        rows[(event_id, email)] = EventForm(
+            event_id=event_id, email=email,
+            **{field: data.get(field) for field in REGISTRATION_FIELDS},
+        )
+    if not rows:
+        return 0
+
+    features = connections[EventForm.objects.db].features
+    with transaction.atomic():
+        EventForm.objects.bulk_create(
+            list(rows.values()),
+            update_conflicts=True,
+            # MySQL picks the conflicting unique key itself and rejects a target
+            unique_fields=["event", "email"] if features.supports_update_conflicts_with_target else None,
+            update_fields=list(REGISTRATION_FIELDS),
+        )
+        refresh_registration_counts(event_id for event_id, _email in rows)
+    return len(rows)
+
+
+class RegistrationBuffer:
+    """
+    Process-local queue of registrations, flushed by a daemon thread every
+    EVENT_REGISTRATION_FLUSH_SECONDS or as soon as
+    EVENT_REGISTRATION_FLUSH_SIZE are waiting, and once more at exit.
+    """
+
+    def __init__(self):
+        self._entries = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def add(self, event_id, data):
+        with self._lock:
+            self._entries.append((event_id, data))
+            size = len(self._entries)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="registration-flusher", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+        if size >= settings.EVENT_REGISTRATION_FLUSH_SIZE:
+            self._wake.set()
+
+    def flush(self):
+        with self._lock:
+            entries, self._entries = self._entries, []
+        if not entries:
+            return 0
+        try:
+            return bulk_save_registrations(entries)
+        except Exception:
+            # One bad row fails the whole batch
+            logger.exception("Registration flush of %d entries failed, saving one by one", len(entries))
+        saved = 0
+        for event_id, data in entries:
+            try:
+                save_registration(event_id, data)
+                saved += 1
+            except Event.DoesNotExist:
+                logger.warning("Dropped registration of %s: event %s no longer exists", data.get("email"), event_id)
+            except Exception:
+                logger.exception("Dropped registration of %s for event %s", data.get("email"), event_id)
+        return saved
+
+    def _run(self):
+        while True:
+            self._wake.wait(settings.EVENT_REGISTRATION_FLUSH_SECONDS)
+            self._wake.clear()
+            close_old_connections()
+            self.flush()
+
+
+registration_buffer = RegistrationBuffer()
+
+
+def submit_registration(event_id, data):
+    """
+    Record a validated registration. Returns 'created' or 'updated' when it
+    was written right away, 'queued' when it went to the buffer. Raises
+    Event.DoesNotExist when the event is gone.
+    """
+    if settings.EVENT_REGISTRATION_BUFFERED:
+        registration_buffer.add(event_id, data)
+        return "queued"
+    _registration, created = save_registration(event_id, data)
+    return "created" if created else "updated"
@@ -0,0 +1,248 @@
+# misc/search.py
+#
+# Full-text search over published blogs, books, podcasts and magazines.
+# Each published object has one SearchDocument row (title / author / body)
+# carrying a FULLTEXT index on MySQL and an FTS5 shadow table on SQLite.
+# Rows are kept current by misc.signals; `rebuild_search_index` backfills.
+
+import html
+import re
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import OuterRef, Q, Subquery
+from django.db.models.expressions import RawSQL
+from django.utils.html import strip_tags
+
+from common.utils.fulltext import fts5_query, fts_table_name, mysql_boolean_query, mysql_indexed_terms, search_terms
+from .models import SearchDocument
+
+
+# Keys of Blog.content blocks that hold markup metadata rather than readable text
+SKIPPED_CONTENT_KEYS = {'id', 'type', 'url', 'src', 'href', 'image', 'image_url', 'image_key', 'key', 'style'}
+
+
+def extract_text(content):
+    """Plain text of every readable string in a Blog.content block tree."""
+    parts = []
+
+    def walk(value):
+        if isinstance(value, str):
+            value = value.strip()
+            if value and not value.startswith(('http://', 'https://')):
+                parts.append(html.unescape(strip_tags(value)))
+        elif isinstance(value, dict):
+            for key, item in value.items():
+                if key not in SKIPPED_CONTENT_KEYS:
+                    walk(item)
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                walk(item)
+
+    walk(content)
+    return re.sub(r'\s+', ' ', ' '.join(parts)).strip()
+
+
+def _body(*parts):
+    return '\n'.join(part for part in parts if part)[:settings.SEARCH_BODY_MAX_CHARS]
+
+
+def _blog_document(blog):
+    return {
+        'title': blog.title,
+        'author': blog.author or '',
+        'body': _body(blog.description, extract_text(blog.content)),
+    }
+
+
+def _book_document(book):
+    return {
+        'title': book.title,
+        'author': book.author_name or '',
+        'body': _body(book.description),
+    }
+
+
+def _podcast_document(podcast):
+    return {
+        'title': podcast.title,
+        'author': '',
+        'body': _body(podcast.description, podcast.transcript),
+    }
+
+
+def _magazine_document(magazine):
+    return {
+        'title': magazine.name,
+        'author': '',
+        'body': _body(magazine.description),
+    }
+
+
+def _registry():
+    from blogs.models import Blog
+    from books.models import Book
+    from magazines.models import Magazine
+    from podcasts.models import Podcast
+
+    # kind -> (model, document builder, searchable filter, fields the document depends on)
+    return {
+        SearchDocument.Kind.BLOG: (
+            Blog, _blog_document, Q(is_published=True, is_rejected=False),
+            {'title', 'author', 'description', 'content', 'is_published', 'is_rejected'},
+        ),
+        SearchDocument.Kind.BOOK: (
+            Book, _book_document, Q(is_published=True),
+            {'title', 'author_name', 'description', 'is_published'},
+        ),
+        SearchDocument.Kind.PODCAST: (
+            Podcast, _podcast_document, Q(is_published=True),
+            {'title', 'description', 'transcript', 'is_published'},
+        ),
+        SearchDocument.Kind.MAGAZINE: (
+            Magazine, _magazine_document, Q(is_published=True),
+            {'name', 'description', 'is_published'},
+        ),
+    }
+
+
+_REGISTRY = None
+
+
+def get_registry():
+    global _REGISTRY
+    if _REGISTRY is None:
+        _REGISTRY = _registry()
+    return _REGISTRY
+
+
+def kind_for_model(model):
+    for kind, (registered_model, *_rest) in get_registry().items():
+        if registered_model is model:
+            return kind
+    return None
+
+
+def indexed_fields(kind):
+    return get_registry()[kind][3]
+
+
+def is_searchable(kind, instance):
+    if kind == SearchDocument.Kind.BLOG:
+        return instance.is_published and not instance.is_rejected
+    return instance.is_published
+
+
+def _delete_fts_rows(doc_ids):
+    if connection.vendor != 'sqlite' or not doc_ids:
+        return
+    table = connection.ops.quote_name(fts_table_name(SearchDocument))
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {table} WHERE rowid = %s", [(doc_id,) for doc_id in doc_ids])
+
+
+def _write_fts_row(doc):
+    # SQLite only: FTS5 tables are not maintained by the database, rowid = SearchDocument.id
+    if connection.vendor != 'sqlite':
+        return
+    table = connection.ops.quote_name(fts_table_name(SearchDocument))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE rowid = %s", [doc.id])
+        cursor.execute(
+            f"INSERT INTO {table} (rowid, title, author, body) VALUES (%s, %s, %s, %s)",
+            [doc.id, doc.title, doc.author, doc.body],
+        )
+
+
+def prune_fts_rows():
+    """SQLite only: drop FTS rows left behind by documents deleted outside this module."""
+    if connection.vendor != 'sqlite':
+        return
+    table = connection.ops.quote_name(fts_table_name(SearchDocument))
+    docs = connection.ops.quote_name(SearchDocument._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE rowid NOT IN (SELECT id FROM {docs})")
+
+
+def remove_document(kind, object_id):
+    with transaction.atomic():
+        doc_ids = list(SearchDocument.objects.filter(kind=kind, object_id=object_id).values_list('id', flat=True))
+        _delete_fts_rows(doc_ids)
+        SearchDocument.objects.filter(id__in=doc_ids).delete()
+
+
+def index_instance(kind, instance):
+    """Create, refresh or drop the search document of one object."""
+    if not is_searchable(kind, instance):
+        remove_document(kind, instance.pk)
+        return None
+
+    builder = get_registry()[kind][1]
+    fields = builder(instance)
+    fields['title'] = (fields['title'] or '')[:255]
+    fields['author'] = (fields['author'] or '')[:255]
+
+    with transaction.atomic():
+        doc, _ = SearchDocument.objects.update_or_create(kind=kind, object_id=instance.pk, defaults=fields)
+        _write_fts_row(doc)
+    return doc
+
+
+def _substring_match(terms):
+    """Every term somewhere in the title, author or body."""
+    match = Q()
+    for term in terms:
+        match &= Q(title__icontains=term) | Q(author__icontains=term) | Q(body__icontains=term)
+    return match
+
+
+def matching_documents(kind, query):
+    """
+    SearchDocuments of `kind` matching every term of `query` (terms match as
+    prefixes: `pod` finds "podcast"), or None when the query has no terms.
+    Backends that rank annotate `score`, higher is better.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return None
+    docs = SearchDocument.objects.filter(kind=kind)
+
+    if connection.vendor == 'mysql':
+        indexed, skipped = mysql_indexed_terms(terms, settings.SEARCH_MYSQL_MIN_TOKEN_SIZE)
+        docs = docs.filter(_substring_match(skipped))
+        if not indexed:
+            return docs
+        return docs.annotate(score=RawSQL(
+            "MATCH (title, author, body) AGAINST (%s IN BOOLEAN MODE)", (mysql_boolean_query(indexed),)
+        )).filter(score__gt=0)
+
+    if connection.vendor == 'sqlite':
+        fts = connection.ops.quote_name(fts_table_name(SearchDocument))
+        match = fts5_query(terms)
+        # FTS5 rowid = SearchDocument.id; bm25() is lower for better matches.
+        # `id` is left unqualified so it resolves to the enclosing document row
+        return docs.filter(id__in=RawSQL(f"SELECT rowid FROM {fts} WHERE {fts} MATCH %s", (match,))).annotate(
+            score=RawSQL(f"SELECT -bm25({fts}) FROM {fts} WHERE {fts} MATCH %s AND {fts}.rowid = id", (match,)),
+        )
+
+    # No full-text support on this backend: unranked substring match
+    return docs.filter(_substring_match(terms))
+
+
+def filter_by_search(queryset, kind, query, rank=True):
+    """
+    Narrow `queryset` to the objects matching `query`, as a subquery, so the
+    caller's other filters and pagination see every match. With `rank`, order
+    the result by relevance; otherwise the caller's ordering applies.
+    """
+    docs = matching_documents(kind, query)
+    if docs is None:
+        return queryset.none()
+    queryset = queryset.filter(pk__in=docs.values('object_id'))
+    if rank:
+        if 'score' in docs.query.annotations:
+            score = Subquery(docs.filter(object_id=OuterRef('pk')).values('score')[:1])
+            queryset = queryset.order_by(score.desc(), '-pk')
+        else:
+            queryset = queryset.order_by('-pk')
+    return queryset
@@ -1,7 +1,11 @@
 from rest_framework import serializers
-from .models import Career, BlogNotification, Advertisement, Activity, Event, EventForm, Partners, PartnerBannerImage, PartnerAward, EventDay, EventMetric, EventGallery
+from .models import Career, BlogNotification, Advertisement, Activity, Event, EventForm, Partners, PartnerBannerImage, PartnerAward, EventDay, EventMetric, EventGallery, TrendingScore
 import json
+from django.db.models import prefetch_related_objects
 from rest_framework.utils import model_meta
+from common.serializers import ImageSrcsetField
+from common.utils.nested_writes import NestedDiff, sync_children
+from .registrations import get_event_id
 
 class CareerSerializer(serializers.ModelSerializer):
     work_mode_display = serializers.SerializerMethodField()
@@ -33,6 +37,8 @@ class BlogNotificationSerializer(serializers.ModelSerializer):
         ]
 
 class AdvertisementSerializer(serializers.ModelSerializer):
+    image_srcset = ImageSrcsetField(source='image_variants')
+
     class Meta:
         model = Advertisement
         fields = '__all__'
@@ -78,6 +84,8 @@ class EventMetricSerializer(serializers.ModelSerializer):
 class EventSerializer(serializers.ModelSerializer):
     days = EventDaySerializer(many=True)
     metrics = EventMetricSerializer(many=True, required=False)
+    cover_image_srcset = ImageSrcsetField(source="cover_image_variants")
+    banner_image_srcset = ImageSrcsetField(source="banner_image_variants")
 
     class Meta:
         model = Event
@@ -94,101 +102,67 @@ class EventSerializer(serializers.ModelSerializer):
             "location",
             "event_type",
             "is_published",
+            "registrations_count",
             "cover_image_url",
             "cover_image_key",
+            "cover_image_variants",
+            "cover_image_srcset",
             "banner_image_url",
             "banner_image_key",
+            "banner_image_variants",
+            "banner_image_srcset",
             "days",
             "metrics",
         ]
-        read_only_fields = ["slug"]
+        read_only_fields = ["slug", "registrations_count"]
 
     def create(self, validated_data):
         days_data = validated_data.pop("days", [])
         metrics_data = validated_data.pop("metrics", [])
         event = Event.objects.create(**validated_data)
 
-        for day_data in days_data:
-            activities_data = day_data.pop("activities", [])
-            day = EventDay.objects.create(event=event, **day_data)
-
-            for activity_data in activities_data:
-                Activity.objects.create(day=day, **activity_data)
-        
-        for metric in metrics_data:
-            EventMetric.objects.create(event=event, **metric)
+        self._write_days(event, [], days_data)
+        sync_children(event.metrics, metrics_data, existing=[])
 
         return event
-    
-    def update(self, instance, validated_data):
-        days_data = validated_data.pop("days", [])
-        metrics_data = validated_data.pop("metrics", [])
-
-        existing_metrics = {m.id: m for m in instance.metrics.all()}
-
-        for metric_data in metrics_data:
-            metric_id = metric_data.get("id")
 
-            if metric_id and metric_id in existing_metrics:
-                metric = existing_metrics.pop(metric_id)
-                for attr, value in metric_data.items():
-                    setattr(metric, attr, value)
-                metric.save()
-            else:
-                EventMetric.objects.create(event=instance, **metric_data)
-
-        # delete: existing metrics removed
-        for metric in existing_metrics.values():
-            metric.delete()
+    def update(self, instance, validated_data):
+        days_data = validated_data.pop("days", None)
+        metrics_data = validated_data.pop("metrics", None)
 
         # Update Event fields
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
         instance.save()
 
-        existing_days = {day.id: day for day in instance.days.all()}
-
-        for day_data in days_data:
-            activities_data = day_data.pop("activities", [])
-            day_id = day_data.get("id", None)
-
-            # UPDATE existing day
-            if day_id and day_id in existing_days:
-                day = existing_days.pop(day_id)
-
-                for attr, value in day_data.items():
-                    setattr(day, attr, value)
-                day.save()
-
-            # CREATE new day
-            else:
-                day = EventDay.objects.create(event=instance, **day_data)
-
-            # --- Activities ---
-            existing_activities = {a.id: a for a in day.activities.all()}
-
-            for activity_data in activities_data:
-                activity_id = activity_data.get("id", None)
-
-                if activity_id and activity_id in existing_activities:
-                    activity = existing_activities.pop(activity_id)
+        if metrics_data is not None:
+            sync_children(instance.metrics, metrics_data)
 
-                    for attr, value in activity_data.items():
-                        setattr(activity, attr, value)
-                    activity.save()
+        if days_data is not None:
+            # No-op when the view already prefetched them
+            prefetch_related_objects([instance], "days__activities")
+            self._write_days(instance, instance.days.all(), days_data)
 
-                else:
-                    Activity.objects.create(day=day, **activity_data)
+        # Children were written in bulk; reload them for the response in three queries
+        instance._prefetched_objects_cache = {}
+        prefetch_related_objects([instance], "days__activities", "metrics")
+        return instance
 
-            # DELETE removed activities
-            for activity in existing_activities.values():
-                activity.delete()
+    def _write_days(self, event, existing_days, days_data):
+        """Days, then all their activities, each as one diff: a handful of queries per edit."""
+        activities_data = [day_data.pop("activities", []) for day_data in days_data]
 
-        # DELETE removed days
-        for day in existing_days.values():
-            day.delete()
+        days_diff = NestedDiff(EventDay)
+        days = days_diff.add(existing_days, days_data, event=event)
+        new_days = {id(day) for day in days_diff.to_create}
+        # New days need their ids before their activities can be inserted
+        days_diff.apply(need_pks=True)
 
-        return instance
+        activities_diff = NestedDiff(Activity)
+        for day, day_activities in zip(days, activities_data):
+            existing = [] if id(day) in new_days else day.activities.all()
+            activities_diff.add(existing, day_activities, day=day)
+        activities_diff.apply()
 
 
 class EventFormSerializer(serializers.ModelSerializer):
@@ -203,13 +177,38 @@ class EventFormSerializer(serializers.ModelSerializer):
         read_only_fields = ['submitted_at']
 
 
+class EventRegistrationSerializer(serializers.ModelSerializer):
+    """
+    Validates a public registration. The event slug is resolved through the
+    cache rather than a queryset lookup, and duplicates are not rejected:
+    misc.registrations upserts on (event, email).
+    """
+    event = serializers.SlugField()
+
+    class Meta:
+        model = EventForm
+        exclude = ['id', 'submitted_at']
+        # Drop the generated (event, email) unique validator; a repeat submission updates
+        validators = []
+
+    def validate_event(self, value):
+        event_id = get_event_id(value)
+        if event_id is None:
+            raise serializers.ValidationError("Object with slug={} does not exist.".format(value), code="does_not_exist")
+        return event_id
+
+
 class EventGallerySerializer(serializers.ModelSerializer):
+    image_srcset = ImageSrcsetField(source="image_variants")
+
     class Meta:
         model = EventGallery
         fields = [
             "id",
             "image_url",
             "image_key",
+            "image_variants",
+            "image_srcset",
             "order",
             "caption",
             "created_at",
@@ -217,12 +216,17 @@ class EventGallerySerializer(serializers.ModelSerializer):
         
 
 class PartnerBannerImageSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(required=False)
+    image_srcset = ImageSrcsetField(source='image_variants')
+
     class Meta:
         model = PartnerBannerImage
-        fields = ['id', 'image_url', 'image_key']
+        fields = ['id', 'image_url', 'image_key', 'image_variants', 'image_srcset']
 
 
 class PartnerAwardSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(required=False)
+
     class Meta:
         model = PartnerAward
         fields = ['id', 'title', 'award_url']
@@ -231,6 +235,7 @@ class PartnerAwardSerializer(serializers.ModelSerializer):
 class PartnersSerializer(serializers.ModelSerializer):
     banner_images = PartnerBannerImageSerializer(many=True, required=False)
     awards = PartnerAwardSerializer(many=True, required=False)
+    logo_image_srcset = ImageSrcsetField(source='logo_image_variants')
 
     class Meta:
         model = Partners
@@ -242,6 +247,8 @@ class PartnersSerializer(serializers.ModelSerializer):
             'long_description',
             'logo_image_url',
             'logo_image_key',
+            'logo_image_variants',
+            'logo_image_srcset',
             'partner_website_link',
             'banner_images',
             'awards',
@@ -278,11 +285,8 @@ class PartnersSerializer(serializers.ModelSerializer):
 
         partner = Partners.objects.create(**validated_data)
 
-        for img_data in banner_images_data:
-            PartnerBannerImage.objects.create(partner=partner, **img_data)
-
-        for award_data in awards_data:
-            PartnerAward.objects.create(partner=partner, **award_data)
+        sync_children(partner.banner_images, banner_images_data, existing=[])
+        sync_children(partner.awards, awards_data, existing=[])
 
         return partner
 
@@ -295,14 +299,20 @@ class PartnersSerializer(serializers.ModelSerializer):
             setattr(instance, attr, value)
         instance.save()
 
+        # Rows are matched by id: unchanged images and awards are left alone
         if banner_images_data is not None:
-            instance.banner_images.all().delete()
-            for img_data in banner_images_data:
-                PartnerBannerImage.objects.create(partner=instance, **img_data)
+            sync_children(instance.banner_images, banner_images_data)
 
         if awards_data is not None:
-            instance.awards.all().delete()
-            for award_data in awards_data:
-                PartnerAward.objects.create(partner=instance, **award_data)
+            sync_children(instance.awards, awards_data)
 
         return instance
+
+
+class TrendingScoreSerializer(serializers.ModelSerializer):
+    type = serializers.CharField(source='kind')
+    id = serializers.IntegerField(source='object_id')
+
+    class Meta:
+        model = TrendingScore
+        fields = ['type', 'id', 'title', 'image_url', 'score', 'recent_views', 'computed_at']
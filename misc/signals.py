@@ -0,0 +1,137 @@
+# misc/signals.py
+
+import threading
+from functools import partial
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+
+from common.utils.conditional import touch_updated_at
+
+from .event_cache import invalidate_event_detail
+from .models import Activity, Event, EventDay, EventForm, EventMetric
+from .registrations import forget_event_slug
+from .search import get_registry, index_instance, indexed_fields, is_searchable, kind_for_model, remove_document
+from .trending import drop_trending
+
+
+def _reindex_on_save(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    kind = kind_for_model(sender)
+    # Saves that only touch e.g. `views` or `priority` leave the document unchanged
+    if update_fields is not None and not set(update_fields) & indexed_fields(kind):
+        return
+    transaction.on_commit(partial(index_instance, kind, instance))
+
+
+def _remove_on_delete(sender, instance, **kwargs):
+    kind = kind_for_model(sender)
+    transaction.on_commit(partial(remove_document, kind, instance.pk))
+
+
+def _drop_hidden_trending(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    kind = kind_for_model(sender)
+    # Unpublished items leave the ranking now rather than at the next compute_trending
+    if not is_searchable(kind, instance):
+        transaction.on_commit(partial(drop_trending, kind, instance.pk))
+
+
+def _drop_deleted_trending(sender, instance, **kwargs):
+    kind = kind_for_model(sender)
+    transaction.on_commit(partial(drop_trending, kind, instance.pk))
+
+
+def connect_search_signals():
+    for kind, (model, *_rest) in get_registry().items():
+        post_save.connect(_reindex_on_save, sender=model, dispatch_uid=f'search_index_save_{kind}')
+        post_delete.connect(_remove_on_delete, sender=model, dispatch_uid=f'search_index_delete_{kind}')
+
+
+def _invalidate_event(slug):
+    invalidate_event_detail(slug)
+    # Again after commit, in case a read re-cached the old detail meanwhile
+    transaction.on_commit(partial(invalidate_event_detail, slug))
+
+
+def _event_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _invalidate_event(instance.slug)
+
+
+def _event_deleted(sender, instance, **kwargs):
+    _invalidate_event(instance.slug)
+    forget_event_slug(instance.slug)
+
+
+def _registration_deleted(sender, instance, **kwargs):
+    Event.objects.filter(pk=instance.event_id, registrations_count__gt=0).update(
+        registrations_count=F("registrations_count") - 1,
+    )
+
+
+_pending_event_touches = threading.local()
+
+
+def _touch_event(event_id):
+    # None when the event itself was deleted; its own signal covers that
+    slug = Event.objects.filter(pk=event_id).values_list("slug", flat=True).first()
+    if slug is None:
+        return
+    # The event's ETag / Last-Modified cover its days, activities and metrics
+    touch_updated_at(Event, event_id)
+    invalidate_event_detail(slug)
+
+
+def _touch_event_on_commit(event_id):
+    """
+    Touch the event once, after commit, however many of its children the
+    transaction changed (e.g. an admin save rewriting every day and activity).
+    """
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        _touch_event(event_id)
+        return
+    # run_on_commit is replaced whenever its callbacks run or are rolled
+    # back, so ids recorded against another list belong to a finished transaction
+    pending = getattr(_pending_event_touches, "state", None)
+    if pending is None or pending[0] is not connection.run_on_commit:
+        pending = (connection.run_on_commit, set())
+        _pending_event_touches.state = pending
+    if event_id in pending[1]:
+        return
+    pending[1].add(event_id)
+    transaction.on_commit(partial(_touch_event, event_id))
+
+
+def _event_child_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if sender is Activity:
+        event_id = EventDay.objects.filter(pk=instance.day_id).values_list("event_id", flat=True).first()
+    else:
+        event_id = instance.event_id
+    if event_id is not None:
+        _touch_event_on_commit(event_id)
+
+
+def connect_trending_signals():
+    for kind, (model, *_rest) in get_registry().items():
+        post_save.connect(_drop_hidden_trending, sender=model, dispatch_uid=f'trending_save_{kind}')
+        post_delete.connect(_drop_deleted_trending, sender=model, dispatch_uid=f'trending_delete_{kind}')
+
+
+def connect_event_cache_signals():
+    post_save.connect(_event_changed, sender=Event, dispatch_uid='event_detail_cache_save')
+    post_delete.connect(_event_deleted, sender=Event, dispatch_uid='event_detail_cache_delete')
+    for model in (EventDay, Activity, EventMetric):
+        post_save.connect(_event_child_changed, sender=model, dispatch_uid=f'event_detail_cache_{model.__name__}_save')
+        post_delete.connect(_event_child_changed, sender=model, dispatch_uid=f'event_detail_cache_{model.__name__}_delete')
+
+
+def connect_registration_signals():
+    post_delete.connect(_registration_deleted, sender=EventForm, dispatch_uid='event_registration_count_delete')
@@ -1,3 +1,261 @@
-from django.test import TestCase
+import datetime
+import unittest
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from blogs.models import Blog
+from books.models import Book
+from magazines.models import Magazine
+from misc.models import ContentViewBucket, Event, EventForm, SearchDocument
+from misc.registrations import registration_buffer
+from misc.search import filter_by_search
+from misc.view_counter import ViewCounter
+from podcasts.models import Podcast
+
+
+@unittest.skipUnless(connection.vendor == "sqlite", "exercises the SQLite FTS5 search path")
+class SearchTests(TestCase):
+    def publish_blog(self, title, description="", is_published=True):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Blog.objects.create(title=title, slug=title.lower().replace(" ", "-"),
+                                       description=description, is_published=is_published)
+
+    def search(self, query, rank=True):
+        return [blog.title for blog in filter_by_search(Blog.objects.all(), SearchDocument.Kind.BLOG, query, rank=rank)]
+
+    def test_publish_and_unpublish_update_the_index(self):
+        draft = self.publish_blog("Composting basics", is_published=False)
+        self.assertFalse(SearchDocument.objects.filter(kind=SearchDocument.Kind.BLOG, object_id=draft.pk).exists())
+
+        draft.is_published = True
+        with self.captureOnCommitCallbacks(execute=True):
+            draft.save()
+        self.assertTrue(SearchDocument.objects.filter(kind=SearchDocument.Kind.BLOG, object_id=draft.pk).exists())
+        self.assertEqual(self.search("composting"), ["Composting basics"])
+
+        draft.is_published = False
+        with self.captureOnCommitCallbacks(execute=True):
+            draft.save()
+        self.assertFalse(SearchDocument.objects.filter(kind=SearchDocument.Kind.BLOG, object_id=draft.pk).exists())
+        self.assertEqual(self.search("composting"), [])
+
+    def test_deleted_object_leaves_the_index(self):
+        blog = self.publish_blog("Composting basics")
+        with self.captureOnCommitCallbacks(execute=True):
+            blog.delete()
+        self.assertFalse(SearchDocument.objects.exists())
+        self.assertEqual(self.search("composting"), [])
+
+    def test_terms_match_as_prefixes(self):
+        self.publish_blog("Podcasting for beginners")
+        self.publish_blog("Gardening notes")
+        self.assertEqual(self.search("pod"), ["Podcasting for beginners"])
+        self.assertEqual(self.search("podcasting"), ["Podcasting for beginners"])
+        self.assertEqual(self.search("casting"), [])
+
+    def test_every_term_is_required(self):
+        self.publish_blog("Machine learning in practice")
+        self.publish_blog("Machine shop safety")
+        self.publish_blog("Learning to cook")
+        self.assertEqual(self.search("machine learning"), ["Machine learning in practice"])
+        self.assertEqual(self.search("mach learn"), ["Machine learning in practice"])
+
+    def test_results_are_ranked_by_relevance(self):
+        self.publish_blog("Weekly notes", description="Among many other topics, one short note on compost bins.")
+        self.publish_blog("Compost", description="Compost, compost and more compost.")
+        self.publish_blog("Unrelated", description="Nothing to see here.")
+        self.assertEqual(self.search("compost"), ["Compost", "Weekly notes"])
+
+    def test_unranked_search_keeps_the_caller_ordering(self):
+        self.publish_blog("Compost", description="Compost, compost and more compost.")
+        self.publish_blog("Another compost post")
+        blogs = filter_by_search(Blog.objects.order_by("title"), SearchDocument.Kind.BLOG, "compost", rank=False)
+        self.assertEqual([blog.title for blog in blogs], ["Another compost post", "Compost"])
+
+    def test_query_without_terms_matches_nothing(self):
+        self.publish_blog("Compost")
+        self.assertEqual(self.search("  *+-\"  "), [])
+
+    def test_search_runs_before_other_filters(self):
+        # More matches than one page: filters and pagination see every match
+        for index in range(12):
+            self.publish_blog(f"Compost {index}")
+        response = self.client.get("/api/blogs/published/", {"search": "compost", "page_size": 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["count"], 12)
+
+    def test_blog_list_search(self):
+        self.publish_blog("Composting basics")
+        self.publish_blog("Gardening notes")
+        self.publish_blog("Composting drafts", is_published=False)
+        response = self.client.get("/api/blogs/published/", {"search": "compost"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([blog["title"] for blog in response.json()["results"]], ["Composting basics"])
+
+    def test_book_list_search(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Book.objects.create(title="The Compost Handbook", author_name="A. Gardener",
+                                published_date=datetime.date(2024, 1, 1), is_published=True)
+            Book.objects.create(title="Bees", author_name="A. Gardener",
+                                published_date=datetime.date(2024, 1, 1), is_published=True)
+        response = self.client.get("/api/books/published/", {"search": "compost"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([book["title"] for book in response.json()["results"]], ["The Compost Handbook"])
+
+        response = self.client.get("/api/books/published/", {"search": "gardener"})
+        self.assertEqual(len(response.json()["results"]), 2)
+
+    def test_podcast_list_search(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Podcast.objects.create(title="Episode 1", transcript="Today we talk about compost.",
+                                   duration=datetime.timedelta(minutes=30),
+                                   published_date=datetime.date(2024, 1, 1), is_published=True)
+            Podcast.objects.create(title="Episode 2", transcript="Today we talk about bees.",
+                                   duration=datetime.timedelta(minutes=30),
+                                   published_date=datetime.date(2024, 1, 1), is_published=True)
+        response = self.client.get("/api/podcasts/public/", {"search": "compost"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([podcast["title"] for podcast in response.json()["results"]], ["Episode 1"])
+
+    def test_magazine_year_search(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Magazine.objects.create(name="Spring compost issue", published_date=datetime.date(2024, 3, 1),
+                                    is_published=True)
+            Magazine.objects.create(name="Summer issue", published_date=datetime.date(2024, 6, 1),
+                                    is_published=True)
+            Magazine.objects.create(name="Compost revisited", published_date=datetime.date(2023, 3, 1),
+                                    is_published=True)
+        response = self.client.get("/api/magazines/year/2024/", {"search": "compost"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([magazine["name"] for magazine in response.json()], ["Spring compost issue"])
+
+
+class RegistrationTests(TestCase):
+    def setUp(self):
+        self.event = Event.objects.create(title="Summit", slug="summit", short_description="Summit",
+                                          long_description="Summit", event_date=datetime.date(2030, 5, 1))
+
+    def register(self, email, slug="summit", **fields):
+        data = {
+            "event": slug, "email": email, "full_name": "Ada Lovelace", "phone_number": "555-0100",
+            "city_country": "London, UK", "professional_title_organization": "Analyst",
+        }
+        data.update(fields)
+        return self.client.post("/api/misc/eventforms/submit/", data, content_type="application/json")
+
+    def test_new_registration_counts_once(self):
+        response = self.register("ada@example.com")
+        self.assertEqual(response.status_code, 201)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registrations_count, 1)
+
+    def test_duplicate_email_updates_without_counting(self):
+        self.assertEqual(self.register("ada@example.com").status_code, 201)
+        response = self.register(" ADA@example.com ", full_name="Ada King")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"message": "Registration updated."})
+
+        registration = EventForm.objects.get(event=self.event)
+        self.assertEqual((registration.email, registration.full_name), ("ada@example.com", "Ada King"))
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registrations_count, 1)
+
+    def test_unknown_event_is_not_found(self):
+        response = self.register("ada@example.com", slug="no-such-event")
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(EventForm.objects.exists())
+
+    def test_invalid_registration_is_rejected(self):
+        response = self.register("not-an-email")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("email", response.json())
+
+    @override_settings(EVENT_REGISTRATION_BUFFERED=True, EVENT_REGISTRATION_FLUSH_SIZE=1000,
+                       EVENT_REGISTRATION_FLUSH_SECONDS=3600)
+    def test_buffered_registrations_are_written_on_flush(self):
+        self.addCleanup(registration_buffer.flush)
+        other = Event.objects.create(title="Meetup", slug="meetup", short_description="Meetup",
+                                     long_description="Meetup", event_date=datetime.date(2030, 6, 1))
+        gone = Event.objects.create(title="Cancelled", slug="cancelled", short_description="Cancelled",
+                                    long_description="Cancelled", event_date=datetime.date(2030, 7, 1))
+
+        self.assertEqual(self.register("ada@example.com").status_code, 202)
+        self.assertEqual(self.register("ADA@example.com", full_name="Ada King").status_code, 202)
+        self.assertEqual(self.register("grace@example.com").status_code, 202)
+        self.assertEqual(self.register("ada@example.com", slug="meetup").status_code, 202)
+        self.assertEqual(self.register("ada@example.com", slug="cancelled").status_code, 202)
+        self.assertFalse(EventForm.objects.exists())
+
+        gone.delete()
+        self.assertEqual(registration_buffer.flush(), 3)
+        self.assertEqual(
+            set(EventForm.objects.values_list("event__slug", "email", "full_name")),
+            {("summit", "ada@example.com", "Ada King"), ("summit", "grace@example.com", "Ada Lovelace"),
+             ("meetup", "ada@example.com", "Ada Lovelace")},
+        )
+        self.event.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.event.registrations_count, other.registrations_count), (2, 1))
+        self.assertEqual(registration_buffer.flush(), 0)
+
+
+class ViewCounterFlushTests(TestCase):
+    def setUp(self):
+        self.blog = Blog.objects.create(title="Published", slug="published", is_published=True)
+        self.draft = Blog.objects.create(title="Draft", slug="draft", is_published=False)
+        self.counter = ViewCounter()
+        now = mock.patch("misc.view_counter.timezone.now",
+                         return_value=timezone.now().replace(hour=12, minute=30))
+        now.start()
+        self.addCleanup(now.stop)
+
+    def pending(self, counts, kind=SearchDocument.Kind.BLOG):
+        # Queue counts without starting the background flusher, so the test drives flush()
+        self.counter._requeue(kind, counts)
+
+    def bucket_views(self, blog):
+        return list(ContentViewBucket.objects.filter(kind=SearchDocument.Kind.BLOG, object_id=blog.pk)
+                    .values_list("views", flat=True))
+
+    def test_out_of_range_id_is_dropped_and_the_rest_applied(self):
+        self.pending({self.blog.pk: 3, 2 ** 70: 5})
+        with self.assertLogs("misc.view_counter", "WARNING") as logs:
+            self.assertEqual(self.counter.flush(), 1)
+        self.assertIn(f"Dropped 5 views of blog {2 ** 70}", logs.output[-1])
+        self.blog.refresh_from_db()
+        self.assertEqual(self.blog.views, 3)
+        self.assertEqual(self.bucket_views(self.blog), [3])
+        self.assertEqual(ContentViewBucket.objects.count(), 1)
+        # Nothing requeued: the next flush has no work
+        self.assertEqual(self.counter._counts, {})
+        self.assertEqual(self.counter.flush(), 0)
+
+    def test_unpublished_ids_are_ignored(self):
+        self.pending({self.draft.pk: 4, self.draft.pk + 1000: 2})
+        self.assertEqual(self.counter.flush(), 0)
+        self.draft.refresh_from_db()
+        self.assertEqual(self.draft.views, 0)
+        self.assertFalse(ContentViewBucket.objects.exists())
+        self.assertEqual(self.counter._counts, {})
+
+    def test_buckets_sum_across_flushes(self):
+        self.pending({self.blog.pk: 2})
+        self.counter.flush()
+        self.pending({self.blog.pk: 5})
+        self.counter.flush()
+        self.blog.refresh_from_db()
+        self.assertEqual(self.blog.views, 7)
+        self.assertEqual(self.bucket_views(self.blog), [7])
+
+    def test_failed_flush_is_requeued(self):
+        self.pending({self.blog.pk: 2})
+        with mock.patch("misc.view_counter.apply_view_counts", side_effect=RuntimeError("database away")), \
+                self.assertLogs("misc.view_counter", "ERROR"):
+            self.assertEqual(self.counter.flush(), 0)
+        self.assertEqual(self.counter._counts, {(SearchDocument.Kind.BLOG, self.blog.pk): 2})
+        self.assertEqual(self.counter.flush(), 1)
+        self.blog.refresh_from_db()
+        self.assertEqual(self.blog.views, 2)
@@ -0,0 +1,111 @@
+# misc/trending.py
+#
+# Trending blogs, books, podcasts and magazines. Views land in hourly
+# ContentViewBucket rows (misc.view_counter); `compute_trending` periodically
+# turns the last TRENDING_WINDOW_HOURS of buckets into an exponentially
+# decayed score per item,
+#
+#     score = sum(views * 0.5 ** (age_hours / TRENDING_HALF_LIFE_HOURS))
+#
+# and rewrites the TrendingScore table with the best TRENDING_KEEP_PER_KIND
+# items of each kind. /trending/ only reads that table in score order.
+
+import heapq
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ContentViewBucket, SearchDocument, TrendingScore
+from .search import get_registry
+
+
+# kind -> (title field, image field) copied into TrendingScore
+TRENDING_DISPLAY_FIELDS = {
+    SearchDocument.Kind.BLOG: ("title", "cover_image"),
+    SearchDocument.Kind.BOOK: ("title", "image_url"),
+    SearchDocument.Kind.PODCAST: ("title", "cover_image_url"),
+    SearchDocument.Kind.MAGAZINE: ("name", "cover_image_url"),
+}
+LOOKUP_CHUNK_SIZE = 1000
+
+
+def decayed_scores(now, window_start):
+    """{(kind, object_id): (score, views)} over the buckets since `window_start`."""
+    half_life = settings.TRENDING_HALF_LIFE_HOURS
+    scores = defaultdict(float)
+    views = defaultdict(int)
+    buckets = (
+        ContentViewBucket.objects.filter(bucket_start__gte=window_start)
+        .values_list("kind", "object_id", "bucket_start", "views")
+        .iterator(chunk_size=5000)
+    )
+    for kind, object_id, start, n in buckets:
+        age_hours = max((now - start).total_seconds() / 3600, 0)
+        scores[(kind, object_id)] += n * 0.5 ** (age_hours / half_life)
+        views[(kind, object_id)] += n
+    return {key: (score, views[key]) for key, score in scores.items()}
+
+
+def _trending_rows(kind, scored, now):
+    """TrendingScore rows for the published items among `scored` ({id: (score, views)})."""
+    model, _builder, visible, _fields = get_registry()[kind]
+    title_field, image_field = TRENDING_DISPLAY_FIELDS[kind]
+    ids = list(scored)
+    rows = []
+    for start in range(0, len(ids), LOOKUP_CHUNK_SIZE):
+        chunk = ids[start:start + LOOKUP_CHUNK_SIZE]
+        for object_id, title, image_url in model.objects.filter(visible, pk__in=chunk).order_by().values_list("pk", title_field, image_field):
+            score, views = scored[object_id]
+            rows.append(TrendingScore(
+                kind=kind, object_id=object_id, title=(title or "")[:255], image_url=image_url,
+                score=score, recent_views=views, computed_at=now,
+            ))
+    return rows
+
+
+def compute_trending(now=None, prune=True):
+    """
+    Rebuild the TrendingScore table from the view buckets and, with `prune`,
+    drop buckets that have left the window. Returns {kind: items ranked}.
+    """
+    now = now or timezone.now()
+    window_start = now - timedelta(hours=settings.TRENDING_WINDOW_HOURS)
+
+    by_kind = defaultdict(dict)
+    for (kind, object_id), value in decayed_scores(now, window_start).items():
+        by_kind[kind][object_id] = value
+
+    rows = []
+    ranked = {}
+    for kind in get_registry():
+        # Look up a few spare items in case some of the best have been unpublished
+        keep = settings.TRENDING_KEEP_PER_KIND
+        best = dict(heapq.nlargest(keep * 2, by_kind[kind].items(), key=lambda item: item[1][0]))
+        kind_rows = sorted(_trending_rows(kind, best, now), key=lambda row: -row.score)[:keep]
+        ranked[kind] = len(kind_rows)
+        rows.extend(kind_rows)
+
+    with transaction.atomic():
+        TrendingScore.objects.all().delete()
+        TrendingScore.objects.bulk_create(rows, batch_size=500)
+
+    if prune:
+        ContentViewBucket.objects.filter(bucket_start__lt=window_start).delete()
+    return ranked
+
+
+def trending(kind=None, limit=None):
+    """Top `limit` ranked items, of one kind or all, best first."""
+    limit = min(limit or settings.TRENDING_DEFAULT_RESULTS, settings.TRENDING_MAX_RESULTS)
+    entries = TrendingScore.objects.all()
+    if kind:
+        entries = entries.filter(kind=kind)
+    return entries.order_by("-score")[:limit]
+
+
+def drop_trending(kind, object_id):
+    """Take an item off the ranking right away, e.g. when it is unpublished or deleted."""
+    TrendingScore.objects.filter(kind=kind, object_id=object_id).delete()
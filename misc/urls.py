@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import CareerListCreateAPIView, CareerDetailAPIView, PublishedCareerListCreateAPIView, BlogNotificationListAPIView, AdvertisementPublicView, AdvertisementAdminView, S3ImageManager, EventDetailView, EventDetailAdminView, ActivityAdminView, EventFormCreateView, EventFormListAdminView, S3DocumentManager, EventCreateAdminView, PartnersListCreateView, PartnerDetailView, EventGalleryListView, EventGalleryAdminView, EventGalleryReorderView
+from .views import ContentViewBeaconView, TrendingView, CareerListCreateAPIView, CareerDetailAPIView, PublishedCareerListCreateAPIView, BlogNotificationListAPIView, AdvertisementPublicView, AdvertisementAdminView, S3ImageManager, EventDetailView, EventListAdminView, EventDetailAdminView, ActivityAdminView, EventFormCreateView, EventFormListAdminView, EventFormExportAdminView, S3DocumentManager, EventCreateAdminView, PartnersListCreateView, PartnerDetailView, EventGalleryListView, EventGalleryAdminView, EventGalleryReorderView, S3DocumentDirectUploadView, S3DocumentDirectUploadCompleteView
 
 urlpatterns = [
     path('careers/', CareerListCreateAPIView.as_view(), name='career-list-create'),
@@ -18,10 +18,13 @@ urlpatterns = [
     # EventForm submission (public)
     path('eventforms/submit/', EventFormCreateView.as_view(), name='eventform-submit'),
     path('eventforms/document/', S3DocumentManager.as_view(), name='eventform-document-manager'),
+    path('eventforms/document/direct/', S3DocumentDirectUploadView.as_view(), name='eventform-document-direct-upload'),
+    path('eventforms/document/direct/complete/', S3DocumentDirectUploadCompleteView.as_view(), name='eventform-document-direct-upload-complete'),
     path('events/manage/admin/images/', S3ImageManager.as_view(), name='events-image-manager'),
 
     # Event admin endpoints
     path('events/', EventDetailView.as_view(), name='event-details'),
+    path('events/admin/', EventListAdminView.as_view(), name='event-admin-list'),
     path('events/<slug:slug>/', EventDetailView.as_view(), name='event-details-slug'),
     path('events/admin/create/', EventCreateAdminView.as_view(), name='event-admin-create'),
     path('events/admin/<slug:slug>/', EventDetailAdminView.as_view(), name='event-admin-detail'),
@@ -35,6 +38,14 @@ urlpatterns = [
 
     # EventForm view (admin only)
     path('eventforms/all/<slug:slug>/', EventFormListAdminView.as_view(), name='eventform-list'),
+    path('eventforms/all/<slug:slug>/export/', EventFormExportAdminView.as_view(), name='eventform-export'),
+
+    # View counting beacon
+    path('views/', ContentViewBeaconView.as_view(), name='content-view-beacon'),
+
+    # Trending content
+    path('trending/', TrendingView.as_view(), name='trending'),
+    path('trending/<str:kind>/', TrendingView.as_view(), name='trending-kind'),
 
     # Partners
     path('partners/', PartnersListCreateView.as_view(), name='partners-list-create'),
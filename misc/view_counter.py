@@ -0,0 +1,178 @@
+# misc/view_counter.py
+#
+# Real view counts for blogs, books, podcasts and magazines. Recording a view
+# only bumps an in-process counter; a background thread applies the pending
+# counts every VIEW_COUNTER_FLUSH_SECONDS with one UPDATE per model (and adds
+# them to the hourly ContentViewBucket rows misc.trending ranks from):
+#
+#     UPDATE blog SET views = views + CASE id WHEN 1 THEN 3 WHEN 7 THEN 1 END
+#     WHERE id IN (1, 7) AND is_published ...
+#
+# Every worker process keeps and flushes its own counters. The UPDATE adds to
+# whatever the row holds, so flushes from different processes never overwrite
+# each other. Counts not yet flushed when a worker dies are lost, which is
+# acceptable for view statistics.
+
+import atexit
+import logging
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import DataError, close_old_connections, transaction
+from django.utils import timezone
+from django.db.models import Case, F, IntegerField, Value, When
+
+from .models import ContentViewBucket, SearchDocument
+from .search import get_registry
+
+
+logger = logging.getLogger(__name__)
+
+CONTENT_KINDS = SearchDocument.Kind
+FLUSH_CHUNK_SIZE = 500
+# Primary keys are BigAutoField
+MAX_OBJECT_ID = 2 ** 63 - 1
+# Raised for a value the database can't store (e.g. an out-of-range id); retrying won't help
+VIEW_DATA_ERRORS = (DataError, OverflowError, ValueError, TypeError)
+
+
+def parse_object_id(value):
+    """`value` as a valid primary key (ASCII digits, 1..MAX_OBJECT_ID), or None."""
+    value = str(value)
+    if not (value.isascii() and value.isdigit()):
+        return None
+    object_id = int(value)
+    return object_id if 0 < object_id <= MAX_OBJECT_ID else None
+
+
+def views_increment(counts, key="pk"):
+    """CASE expression adding counts[row.<key>] to each row's views (0 for other rows)."""
+    return F("views") + Case(
+        *[When(**{key: object_id}, then=Value(n)) for object_id, n in counts.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def apply_view_counts(kind, counts):
+    """
+    Add {object_id: views} to `kind`'s rows with one UPDATE per chunk of ids.
+    Unknown and unpublished ids are ignored. Returns the rows updated.
+    All chunks are applied in one transaction: when one fails none is
+    written, so a retry doesn't count the others twice.
+    """
+    model, _builder, visible, _fields = get_registry()[kind]
+    ids = list(counts)
+    updated = 0
+    with transaction.atomic():
+        for start in range(0, len(ids), FLUSH_CHUNK_SIZE):
+            chunk = {object_id: counts[object_id] for object_id in ids[start:start + FLUSH_CHUNK_SIZE]}
+            updated += model.objects.filter(visible, pk__in=chunk).update(views=views_increment(chunk))
+    return updated
+
+
+def bucket_start(when):
+    """Start of the hourly ContentViewBucket `when` falls in."""
+    return when.replace(minute=0, second=0, microsecond=0)
+
+
+def record_view_buckets(kind, counts, when=None):
+    """
+    Add {object_id: views} to the current hour's buckets: insert missing
+    rows with 0 views, then add the counts with one UPDATE, so concurrent
+    flushes from other processes are summed rather than overwritten.
+    Only published objects get buckets.
+    """
+    model, _builder, visible, _fields = get_registry()[kind]
+    start = bucket_start(when or timezone.now())
+    ids = list(counts)
+    for offset in range(0, len(ids), FLUSH_CHUNK_SIZE):
+        chunk = ids[offset:offset + FLUSH_CHUNK_SIZE]
+        chunk = {object_id: counts[object_id] for object_id in model.objects.filter(visible, pk__in=chunk).order_by().values_list("pk", flat=True)}
+        if not chunk:
+            continue
+        ContentViewBucket.objects.bulk_create(
+            [ContentViewBucket(kind=kind, object_id=object_id, bucket_start=start) for object_id in chunk],
+            ignore_conflicts=True,
+        )
+        ContentViewBucket.objects.filter(kind=kind, bucket_start=start, object_id__in=chunk).update(
+            views=views_increment(chunk, key="object_id"),
+        )
+
+
+class ViewCounter:
+    """Pending views of this process, keyed by (kind, object id)."""
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def record(self, kind, object_id, n=1):
+        with self._lock:
+            self._counts[(kind, object_id)] += n
+            pending = len(self._counts)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="view-counter-flusher", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+        if pending >= settings.VIEW_COUNTER_MAX_PENDING:
+            self._wake.set()
+
+    def flush(self):
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        by_kind = {}
+        for (kind, object_id), n in counts.items():
+            by_kind.setdefault(kind, {})[object_id] = n
+
+        updated = 0
+        for kind, kind_counts in by_kind.items():
+            try:
+                updated += apply_view_counts(kind, kind_counts)
+            except VIEW_DATA_ERRORS:
+                # A bad id fails the whole UPDATE: apply the ids one by one and drop the bad ones
+                logger.warning("View count flush for %s hit a data error, applying ids one by one", kind, exc_info=True)
+                applied, kind_counts = kind_counts, {}
+                for object_id, n in applied.items():
+                    try:
+                        updated += apply_view_counts(kind, {object_id: n})
+                        kind_counts[object_id] = n
+                    except VIEW_DATA_ERRORS:
+                        logger.warning("Dropped %d views of %s %r", n, kind, object_id, exc_info=True)
+                    except Exception:
+                        logger.exception("View count flush for %s %r failed, requeued", kind, object_id)
+                        self._requeue(kind, {object_id: n})
+            except Exception:
+                logger.exception("View count flush for %s failed, requeued", kind)
+                self._requeue(kind, kind_counts)
+                continue
+            try:
+                record_view_buckets(kind, kind_counts)
+            except Exception:
+                # The totals are already written; requeueing would count these views twice
+                logger.exception("Trending buckets for %s not recorded", kind)
+        return updated
+
+    def _requeue(self, kind, kind_counts):
+        with self._lock:
+            for object_id, n in kind_counts.items():
+                self._counts[(kind, object_id)] += n
+
+    def _run(self):
+        while True:
+            self._wake.wait(settings.VIEW_COUNTER_FLUSH_SECONDS)
+            self._wake.clear()
+            close_old_connections()
+            self.flush()
+
+
+view_counter = ViewCounter()
+
+
+def record_view(kind, object_id):
+    object_id = parse_object_id(object_id)
+    if settings.VIEW_COUNTER_ENABLED and object_id is not None:
+        view_counter.record(kind, object_id)
@@ -2,15 +2,28 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from .models import Career, Advertisement, Event, Activity, EventForm, Partners
-from .serializers import CareerSerializer, BlogNotification, BlogNotificationSerializer, AdvertisementSerializer, EventFormSerializer, ActivitySerializer, EventSerializer, EventGallerySerializer, PartnersSerializer, EventGallery
+from .serializers import CareerSerializer, BlogNotification, BlogNotificationSerializer, AdvertisementSerializer, EventFormSerializer, EventRegistrationSerializer, ActivitySerializer, EventSerializer, EventGallerySerializer, PartnersSerializer, EventGallery, TrendingScoreSerializer
 from django.shortcuts import get_object_or_404
 from common.views import CustomJWTAuthentication, IsAdminUser
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.generics import ListAPIView
-from rest_framework.pagination import PageNumberPagination
-from common.constants import S3_BLOG_BUCKET_NAME
+from common.pagination import OptionalKeysetPagination
+from common.constants import S3_BLOG_BUCKET_NAME, DIRECT_UPLOAD_DOCUMENT_CONTENT_TYPES, DIRECT_UPLOAD_EVENT_DOCUMENT_FOLDER
+from common.utils.image_variants import upload_image_with_variants, delete_image_variants
 from common.utils.s3_utils import delete_image_from_s3, upload_image_to_s3
+from common.utils.upload_engine import upload_files_to_s3
+from common.utils.direct_upload import issue_direct_upload, complete_direct_upload
+from common.utils.storage import MB
+from common.utils.streaming import stream_csv
+from common.utils.response_cache import cached_response
+from common.utils.conditional import conditional_response, detail_validators, list_validators
+from django.conf import settings
+from django.db.models import Q
+from .event_cache import EVENT_PREFETCH, get_event_detail, invalidate_event_detail, published_events
+from .registrations import submit_registration
+from .trending import trending
+from .view_counter import CONTENT_KINDS, parse_object_id, record_view
 import json
 
 class CareerListCreateAPIView(APIView):
@@ -67,6 +80,7 @@ class PublishedCareerListCreateAPIView(APIView):
     permission_classes = [AllowAny]
     authentication_classes = []
 
+    @cached_response('misc.career')
     def get(self, request):
         careers = Career.objects.filter(is_published=True).order_by('priority')
         serializer = CareerSerializer(careers, many=True)
@@ -79,7 +93,7 @@ class BlogNotificationListAPIView(APIView):
 
     def get(self, request):
         user = request.user
-        notifications = BlogNotification.objects.filter(user=user).order_by('-created_at')
+        notifications = BlogNotification.objects.filter(user=user).select_related('blog').order_by('-created_at')
         serializer = BlogNotificationSerializer(notifications, many=True)
         return Response(serializer.data)
 
@@ -89,6 +103,7 @@ class AdvertisementPublicView(APIView):
     authentication_classes = []
     permission_classes = [AllowAny]
 
+    @cached_response('misc.advertisement')
     def get(self, request):
         orientation = request.query_params.get("orientation")
 
@@ -146,18 +161,34 @@ class EventDetailView(APIView):
 
     def get(self, request, slug=None):
         if slug:
-            try:
-                event = Event.objects.get(slug=slug)
-                serializer = EventSerializer(event, context={"request": request})
-                return Response(serializer.data)
-            except Event.DoesNotExist:
+            # Cached by slug; misc.signals drops it when the event or its children change
+            entry = get_event_detail(slug)
+            if entry is None:
                 return Response({"error": "Event not found"}, status=status.HTTP_404_NOT_FOUND)
-        else:
-            events = Event.objects.all()
-            serializer = EventSerializer(events, many=True)
-            return Response(serializer.data)
+            return conditional_response(
+                request, detail_validators(request, entry["id"], entry["updated_at"]),
+                lambda: Response(entry["data"]),
+            )
+
+        # ?when=upcoming|past; anything else lists all published events
+        events = published_events(request.query_params.get("when"))
+        return conditional_response(
+            request, list_validators(request, events),
+            lambda: Response(EventSerializer(events, many=True).data),
+        )
+
+
+# Admin: every event, published or not
+class EventListAdminView(APIView):
+    authentication_classes = [CustomJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        events = Event.objects.prefetch_related(*EVENT_PREFETCH).order_by("-event_date", "id")
+        serializer = EventSerializer(events, many=True)
+        return Response(serializer.data)
+
 
-            
 # Create separate class for creating new events
 class EventCreateAdminView(APIView):
     authentication_classes = [CustomJWTAuthentication]
@@ -188,9 +219,15 @@ class EventDetailAdminView(APIView):
         except Event.DoesNotExist:
             return None
 
+    def get(self, request, slug):
+        event = Event.objects.prefetch_related(*EVENT_PREFETCH).filter(slug=slug).first()
+        if event is None:
+            return Response({"error": "Event not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(EventSerializer(event).data)
+
     def put(self, request, slug):
         try:
-            event = Event.objects.prefetch_related("days__activities").get(slug=slug)
+            event = Event.objects.prefetch_related(*EVENT_PREFETCH).get(slug=slug)
         except Event.DoesNotExist:
             return Response(
                 {"error": "Event not found"},
@@ -201,6 +238,8 @@ class EventDetailAdminView(APIView):
 
         if serializer.is_valid():
             event = serializer.save()
+            # Days, activities and metrics are written in bulk, without model signals
+            invalidate_event_detail(event.slug)
             return Response(EventSerializer(event).data)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -213,7 +252,7 @@ class EventDetailAdminView(APIView):
         return Response(status=204)
 
 
-class EventGalleryPagination(PageNumberPagination):
+class EventGalleryPagination(OptionalKeysetPagination):
     page_size = 12
     page_size_query_param = "page_size"
     max_page_size = 50
@@ -248,28 +287,38 @@ class EventGalleryAdminView(APIView):
             return Response({"error": "No images provided"}, status=400)
 
         created_items = []
+        failed = []
 
-        for index, image in enumerate(images):
-            upload = upload_image_to_s3(
-                image_file=image,
-                folder="event_gallery",
-                bucket=S3_BLOG_BUCKET_NAME
-            )
+        # Images upload concurrently, results come back in request order
+        uploads = upload_files_to_s3(images, folder="event_gallery", bucket=S3_BLOG_BUCKET_NAME, variants=True)
 
+        for upload in uploads:
+            index = upload["index"]
             if upload["error"]:
+                failed.append({"name": upload["name"], "message": upload["message"]})
                 continue
 
-            gallery = EventGallery.objects.create(
+            created_items.append(EventGallery(
                 event=event,
                 image_url=upload["url"],
                 image_key=upload["key"],
+                image_variants=upload["variants"],
                 caption=captions[index] if index < len(captions) else "",
                 order=int(orders[index]) if index < len(orders) else index
-            )
+            ))
 
-            created_items.append(gallery)
+        EventGallery.objects.bulk_create(created_items)
+
+        if created_items and created_items[0].pk is None:
+            # MySQL does not return primary keys from bulk inserts
+            created_items = list(EventGallery.objects.filter(
+                event=event,
+                image_key__in=[item.image_key for item in created_items]
+            ).order_by("order", "id"))
 
         serializer = EventGallerySerializer(created_items, many=True)
+        if failed:
+            return Response({"uploaded": serializer.data, "failed": failed}, status=207)
         return Response(serializer.data, status=201)
     
     def delete(self, request, pk):
@@ -282,6 +331,8 @@ class EventGalleryAdminView(APIView):
             bucket=S3_BLOG_BUCKET_NAME,
             image_key=image.image_key
         )
+        if image.image_key:
+            delete_image_variants(bucket=S3_BLOG_BUCKET_NAME, image_key=image.image_key)
 
         image.delete()
         return Response(status=204)
@@ -338,13 +389,94 @@ class EventFormCreateView(APIView):
     permission_classes = [AllowAny]
 
     def post(self, request):
-        serializer = EventFormSerializer(data=request.data)
+        serializer = EventRegistrationSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            data = dict(serializer.validated_data)
+            try:
+                result = submit_registration(data.pop("event"), data)
+            except Event.DoesNotExist:
+                return Response({"error": "Event not found"}, status=status.HTTP_404_NOT_FOUND)
+            if result == "updated":
+                return Response({"message": "Registration updated."}, status=status.HTTP_200_OK)
+            if result == "queued":
+                return Response({"message": "Form submitted successfully."}, status=status.HTTP_202_ACCEPTED)
             return Response({"message": "Form submitted successfully."}, status=status.HTTP_201_CREATED)
+        # An unknown event is a 404, like one deleted while the registration was saved
+        if any(error.code == "does_not_exist" for error in serializer.errors.get("event", [])):
+            return Response({"error": "Event not found"}, status=status.HTTP_404_NOT_FOUND)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class ContentViewBeaconView(APIView):
+    """
+    Anyone: count one view of a blog, book, podcast or magazine.
+    POST /api/misc/views/?type=blog&id=12 (or the same keys as a JSON body),
+    so it works with navigator.sendBeacon. The public detail endpoints already
+    count their own views; use this only for pages rendered without them.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        kind = request.query_params.get("type") or request.data.get("type")
+        object_id = request.query_params.get("id") or request.data.get("id")
+        if kind not in CONTENT_KINDS.values:
+            return Response({"error": f"type must be one of {', '.join(CONTENT_KINDS.values)}"}, status=status.HTTP_400_BAD_REQUEST)
+        object_id = parse_object_id(object_id)
+        if object_id is None:
+            return Response({"error": "id must be a positive integer"}, status=status.HTTP_400_BAD_REQUEST)
+        record_view(kind, object_id)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class TrendingView(APIView):
+    """
+    Anyone: trending content, best first, as ranked by the last
+    `compute_trending` run. GET /api/misc/trending/ mixes all kinds,
+    /api/misc/trending/<blog|book|podcast|magazine>/ narrows to one;
+    ?limit= (default TRENDING_DEFAULT_RESULTS, at most TRENDING_MAX_RESULTS).
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request, kind=None):
+        if kind is not None and kind not in CONTENT_KINDS.values:
+            return Response({"error": f"type must be one of {', '.join(CONTENT_KINDS.values)}"}, status=status.HTTP_404_NOT_FOUND)
+        limit = request.query_params.get("limit", "")
+        if limit and not limit.isdigit():
+            return Response({"error": "limit must be a positive integer"}, status=status.HTTP_400_BAD_REQUEST)
+        entries = trending(kind, int(limit) if limit else None)
+        return Response(TrendingScoreSerializer(entries, many=True).data)
+
+
+class EventFormPagination(OptionalKeysetPagination):
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+
+EVENT_FORM_CSV_FIELDS = [
+    "full_name", "email", "phone_number", "city_country", "professional_title_organization",
+    "linkedin_or_website", "updated_profile", "submitted_at",
+]
+
+
+def event_forms_queryset(event, params):
+    """
+    Registrations of `event`, newest first, optionally narrowed by
+    ?search= over name, email and organisation.
+    """
+    forms = EventForm.objects.filter(event=event).order_by("-submitted_at", "-id")
+    search = (params.get("search") or "").strip()
+    if search:
+        forms = forms.filter(
+            Q(full_name__icontains=search)
+            | Q(email__icontains=search)
+            | Q(professional_title_organization__icontains=search)
+        )
+    return forms
+
+
 class EventFormListAdminView(APIView):
     authentication_classes = [CustomJWTAuthentication]
     permission_classes = [IsAdminUser]
@@ -355,9 +487,33 @@ class EventFormListAdminView(APIView):
         except Event.DoesNotExist:
             return Response({"error": "Event not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        forms = EventForm.objects.filter(event=event).order_by("-submitted_at")
-        serializer = EventFormSerializer(forms, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        forms = event_forms_queryset(event, request.query_params).select_related("event")
+        paginator = EventFormPagination()
+        page = paginator.paginate_queryset(forms, request)
+        serializer = EventFormSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+
+class EventFormExportAdminView(APIView):
+    """
+    Stream an event's registrations (same ?search= as the list) as CSV.
+    Rows are read with a chunked iterator, so memory stays flat.
+    """
+    authentication_classes = [CustomJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, slug):
+        try:
+            event = Event.objects.get(slug=slug)
+        except Event.DoesNotExist:
+            return Response({"error": "Event not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        rows = (
+            event_forms_queryset(event, request.query_params)
+            .values_list(*EVENT_FORM_CSV_FIELDS)
+            .iterator(chunk_size=settings.EVENT_REGISTRATION_EXPORT_CHUNK_SIZE)
+        )
+        return stream_csv(rows, EVENT_FORM_CSV_FIELDS, f"{event.slug}-registrations.csv")
 
 
 class S3DocumentManager(APIView):
@@ -412,6 +568,64 @@ class S3DocumentManager(APIView):
             return Response({'message':response['message']}, status=400)
         
 
+
+class S3DocumentDirectUploadView(APIView):
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        """
+        Issue a presigned upload target for an event form document.
+        Example: POST {"filename": "cv.pdf", "content_type": "application/pdf", "size": 12345}
+        """
+        filename = request.data.get('filename')
+        content_type = request.data.get('content_type')
+        size = request.data.get('size')
+
+        if not filename or not content_type or size is None:
+            return Response({'error': '`filename`, `content_type` and `size` are required'}, status=400)
+
+        response = issue_direct_upload(
+            bucket=S3_BLOG_BUCKET_NAME,
+            folder=DIRECT_UPLOAD_EVENT_DOCUMENT_FOLDER,
+            filename=filename,
+            content_type=content_type,
+            size=size,
+            allowed_content_types=DIRECT_UPLOAD_DOCUMENT_CONTENT_TYPES,
+            max_size_bytes=settings.EVENT_DOCUMENT_MAX_UPLOAD_MB * MB,
+            method=request.data.get('method'),
+        )
+
+        if response['error']:
+            print('Response error message:', response['message'])
+            return Response({'message': response['message']}, status=400)
+
+        return Response(response, status=200)
+
+
+class S3DocumentDirectUploadCompleteView(APIView):
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        """
+        Verify a direct document upload before it is referenced from a form submission.
+        Example: POST {"key": "eventforms/documents/<uuid>.pdf"}
+        """
+        response = complete_direct_upload(
+            bucket=S3_BLOG_BUCKET_NAME,
+            key=request.data.get('key'),
+            expected_prefix=f"{DIRECT_UPLOAD_EVENT_DOCUMENT_FOLDER}/",
+            allowed_content_types=DIRECT_UPLOAD_DOCUMENT_CONTENT_TYPES,
+            max_size_bytes=settings.EVENT_DOCUMENT_MAX_UPLOAD_MB * MB,
+            upload_id=request.data.get('upload_id'),
+            parts=request.data.get('parts'),
+        )
+
+        if response['error']:
+            print('Response error message:', response['message'])
+            return Response({'message': response['message']}, status=400)
+
+        return Response({'message': response['message'], 'url': response['url'], 'key': response['key']}, status=200)
+
 class S3ImageManager(APIView):
     parser_classes = (MultiPartParser, FormParser)
     authentication_classes = [CustomJWTAuthentication]
@@ -430,11 +644,11 @@ class S3ImageManager(APIView):
             return Response({'error': 'No image file provided'}, status=400)
 
         bucket = S3_BLOG_BUCKET_NAME
-        response = upload_image_to_s3(image_file=image_file, folder=folder, bucket=bucket)
+        response = upload_image_with_variants(image_file=image_file, folder=folder, bucket=bucket)
 
         if not response['error']:
             print('Response message:', response['message'], 'url:', response['url'])
-            return Response({'message': response['message'], 'url': response['url'], 'key': response['key']}, status=200)
+            return Response({'message': response['message'], 'url': response['url'], 'key': response['key'], 'variants': response['variants']}, status=200)
         
         if response['error']:
             print('Response error message:', response['message'])
@@ -455,6 +669,8 @@ class S3ImageManager(APIView):
 
         response = delete_image_from_s3(bucket=bucket, image_key=image_key)
 
+        delete_image_variants(bucket=bucket, image_key=image_key)
+
         if not response['error']:
             print('Response message:', response['message'], image_key)
             return Response({'message':response['message']}, status=200)
@@ -476,6 +692,7 @@ class PartnersListCreateView(APIView):
             return [AllowAny()]
         return [IsAdminUser()]
 
+    @cached_response('misc.partners', 'misc.partnerbannerimage', 'misc.partneraward')
     def get(self, request):
         partners = Partners.objects.all()
         serializer = PartnersSerializer(partners, many=True)
@@ -12,6 +12,7 @@ class NominationFormFieldInline(admin.TabularInline):
         "label",
         "field_type",
         "required",
+        "is_filterable",
         "space_occupancy",
         "options",
         "help_text",
@@ -24,7 +25,7 @@ class NominationFormAdmin(admin.ModelAdmin):
     list_display = ("name", "is_active", "created_at", "updated_at")
     list_filter = ("is_active",)
     search_fields = ("name", "description")
-    readonly_fields = ("created_at", "updated_at")
+    readonly_fields = ("version", "created_at", "updated_at")
     inlines = [NominationFormFieldInline]
 
 
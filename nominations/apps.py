@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class NominationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'nominations'
+
+    def ready(self):
+        from .signals import connect_nomination_signals
+
+        connect_nomination_signals()
@@ -13,6 +13,9 @@ class NominationForm(models.Model):
     name = models.CharField(max_length=255, unique=True)
     description = models.TextField(blank=True, default="")
     is_active = models.BooleanField(default=True)
+    # Bumped whenever a field is added, changed or removed; keys the compiled
+    # submit validators (nominations.validation)
+    version = models.PositiveIntegerField(default=1, editable=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -25,6 +28,15 @@ class NominationForm(models.Model):
     def __str__(self) -> str:
         return self.name
 
+    def save(self, *args, **kwargs):
+        # `version` only moves through the F() update in nominations.signals;
+        # saving a form loaded before a field change must not roll it back.
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                f.name for f in self._meta.concrete_fields if not f.primary_key and f.name != "version"
+            ]
+        super().save(*args, **kwargs)
+
 
 class NominationFormField(models.Model):
     class FieldType(models.TextChoices):
@@ -112,6 +124,12 @@ class NominationFormField(models.Model):
         blank=True,
         help_text=_("For file fields, maximum size allowed per file in MB."),
     )
+    # Submissions can be filtered on this field's value in the admin API;
+    # values are copied into NominationResponseValue on submit.
+    is_filterable = models.BooleanField(
+        default=False,
+        help_text=_("Allow filtering submissions by this field's value."),
+    )
 
     class Meta:
         verbose_name = _("Nomination Form Field")
@@ -150,6 +168,43 @@ class Nominations(models.Model):
         verbose_name = _("Nomination Submission")
         verbose_name_plural = _("Nomination Submissions")
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["form", "created_at"], name="nomination_form_created_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.form.name} - {self.id}"
+
+
+class NominationResponseValue(models.Model):
+    """
+    Indexed copy of a submission's value for one filterable field.
+
+    `Nominations.responses` is a JSON blob that can't be indexed per form
+    key, so each value of a field marked `is_filterable` gets a row here
+    (one per selected option for multi-choice fields). Maintained by
+    nominations.response_values.
+    """
+
+    nomination = models.ForeignKey(
+        Nominations,
+        on_delete=models.CASCADE,
+        related_name="filter_values",
+    )
+    form = models.ForeignKey(
+        NominationForm,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    key = models.SlugField(max_length=100)
+    value = models.CharField(max_length=255)
+
+    class Meta:
+        verbose_name = _("Nomination Response Value")
+        verbose_name_plural = _("Nomination Response Values")
+        indexes = [
+            models.Index(fields=["form", "key", "value", "nomination"], name="nomination_value_lookup_idx"),
+        ]
 
     def __str__(self) -> str:
-        return f"{self.form.name} - {self.id}"
\ No newline at end of file
+        return f"{self.nomination_id}: {self.key}={self.value}"
\ No newline at end of file
@@ -0,0 +1,155 @@
+# nominations/response_values.py
+#
+# Filtering and exporting submissions by response value. Values of fields
+# marked `is_filterable` are copied into NominationResponseValue rows, one per
+# value, so `?responses.<key>=<value>` is an indexed lookup instead of a scan
+# over every submission's JSON.
+
+import json
+
+from django.conf import settings
+from django.db.models import Subquery
+
+from .models import NominationFormField, NominationResponseValue, Nominations
+from .validation import get_form_state
+
+
+RESPONSE_FILTER_PREFIX = "responses."
+VALUE_MAX_LENGTH = NominationResponseValue._meta.get_field("value").max_length
+
+
+def filterable_keys(state):
+    return {spec["key"] for spec in state["fields"] if spec.get("is_filterable")}
+
+
+def filter_values(value):
+    """Indexed string forms of one response value. Files and other objects are not indexed."""
+    values = value if isinstance(value, list) else [value]
+    result = []
+    for item in values:
+        if item is None or item == "" or isinstance(item, (dict, list)):
+            continue
+        if isinstance(item, bool):
+            item = "true" if item else "false"
+        result.append(str(item)[:VALUE_MAX_LENGTH])
+    return list(dict.fromkeys(result))
+
+
+def _value_rows(nomination_id, form_id, responses, keys):
+    return [
+        NominationResponseValue(nomination_id=nomination_id, form_id=form_id, key=key, value=value)
+        for key in keys
+        for value in filter_values(responses.get(key))
+    ]
+
+
+def sync_response_values(nomination, created=False):
+    """Rewrite the indexed values of one submission. Filterable keys come from the cached form state."""
+    state = get_form_state(nomination.form_id)
+    keys = filterable_keys(state) if state else set()
+    if not created:
+        NominationResponseValue.objects.filter(nomination_id=nomination.pk).delete()
+    if keys and isinstance(nomination.responses, dict):
+        NominationResponseValue.objects.bulk_create(
+            _value_rows(nomination.pk, nomination.form_id, nomination.responses, keys)
+        )
+
+
+def reindex_keys(form_id, keys, chunk_size=None):
+    """
+    Rebuild the indexed values of `keys` for every submission of a form,
+    e.g. after a field was marked filterable. Returns the rows written.
+    """
+    keys = set(keys)
+    if not keys:
+        return 0
+    chunk_size = chunk_size or settings.NOMINATION_EXPORT_CHUNK_SIZE
+    NominationResponseValue.objects.filter(form_id=form_id, key__in=keys).delete()
+
+    written = 0
+    batch = []
+    submissions = Nominations.objects.filter(form_id=form_id).values_list("id", "responses")
+    for nomination_id, responses in submissions.iterator(chunk_size=chunk_size):
+        if isinstance(responses, dict):
+            batch.extend(_value_rows(nomination_id, form_id, responses, keys))
+        if len(batch) >= chunk_size:
+            NominationResponseValue.objects.bulk_create(batch)
+            written += len(batch)
+            batch = []
+    if batch:
+        NominationResponseValue.objects.bulk_create(batch)
+        written += len(batch)
+    return written
+
+
+def drop_keys(form_id, keys):
+    if keys:
+        NominationResponseValue.objects.filter(form_id=form_id, key__in=set(keys)).delete()
+
+
+def parse_response_filters(query_params):
+    """{key: [values]} from `?responses.<key>=<value>` params; repeating a key matches any of its values."""
+    filters = {}
+    for param in query_params:
+        if param.startswith(RESPONSE_FILTER_PREFIX):
+            key = param[len(RESPONSE_FILTER_PREFIX):]
+            values = [v for v in query_params.getlist(param) if v != ""]
+            if key and values:
+                filters[key] = values
+    return filters
+
+
+def filter_by_responses(queryset, form_id, filters):
+    """
+    Narrow `queryset` to submissions matching every filter. Returns
+    (queryset, error); only keys of fields marked filterable are accepted.
+    """
+    if not filters:
+        return queryset, None
+    if form_id is None:
+        return queryset, {"responses": "Filtering on responses requires `form`."}
+
+    state = get_form_state(form_id)
+    allowed = filterable_keys(state) if state else set()
+    unknown = sorted(set(filters) - allowed)
+    if unknown:
+        return queryset, {"responses": f"Not filterable: {', '.join(unknown)}."}
+
+    for key, values in filters.items():
+        matches = NominationResponseValue.objects.filter(
+            form_id=form_id, key=key, value__in=[v[:VALUE_MAX_LENGTH] for v in values],
+        ).values("nomination_id")
+        queryset = queryset.filter(pk__in=Subquery(matches))
+    return queryset, None
+
+
+# Export
+
+def export_columns(state):
+    """(key, header) for every response-carrying field, in form order."""
+    return [
+        (spec["key"], spec.get("label") or spec["key"])
+        for spec in state["fields"]
+        if spec["field_type"] not in NominationFormField.DISPLAY_ONLY_TYPES
+    ]
+
+
+def export_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return "; ".join(str(export_cell(item)) for item in value)
+    if isinstance(value, dict):
+        # Uploaded files are {"key", "url", ...}
+        return value.get("url") or json.dumps(value)
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return value
+
+
+def export_rows(queryset, columns, chunk_size=None):
+    chunk_size = chunk_size or settings.NOMINATION_EXPORT_CHUNK_SIZE
+    rows = queryset.values_list("id", "created_at", "responses").iterator(chunk_size=chunk_size)
+    for nomination_id, created_at, responses in rows:
+        responses = responses if isinstance(responses, dict) else {}
+        yield [nomination_id, created_at.isoformat()] + [export_cell(responses.get(key)) for key, _ in columns]
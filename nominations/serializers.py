@@ -1,6 +1,11 @@
 from rest_framework import serializers
 
+from common.utils.nested_writes import sync_children
+
 from .models import NominationForm, NominationFormField, Nominations
+from .response_values import drop_keys, reindex_keys
+from .signals import bump_form_version
+from .validation import FormPlan
 
 
 class NominationFormFieldSerializer(serializers.ModelSerializer):
@@ -22,6 +27,7 @@ class NominationFormFieldSerializer(serializers.ModelSerializer):
             "allow_multiple_files",
             "max_files",
             "max_file_size_mb",
+            "is_filterable",
         )
         read_only_fields = ("id",)
 
@@ -42,17 +48,17 @@ class NominationFormSerializer(serializers.ModelSerializer):
             "name",
             "description",
             "is_active",
+            "version",
             "created_at",
             "updated_at",
             "fields",
         )
-        read_only_fields = ("id", "created_at", "updated_at")
+        read_only_fields = ("id", "version", "created_at", "updated_at")
 
     def create(self, validated_data):
         fields_data = validated_data.pop("fields", [])
         form = NominationForm.objects.create(**validated_data)
-        for fd in fields_data:
-            NominationFormField.objects.create(form=form, **fd)
+        sync_children(form.fields, fields_data, key="key", existing=[])
         return form
 
     def update(self, instance, validated_data):
@@ -61,9 +67,15 @@ class NominationFormSerializer(serializers.ModelSerializer):
             setattr(instance, attr, value)
         instance.save()
         if fields_data is not None:
-            instance.fields.all().delete()
-            for fd in fields_data:
-                NominationFormField.objects.create(form=instance, **fd)
+            existing = list(instance.fields.all())
+            old_keys = {f.key for f in existing if f.is_filterable}
+            new_keys = {fd["key"] for fd in fields_data if fd.get("is_filterable")}
+            # Fields are matched by key and written in bulk, so no per-field signals fire
+            sync_children(instance.fields, fields_data, key="key", existing=existing)
+            bump_form_version(instance.pk)
+            instance.refresh_from_db(fields=["version"])
+            drop_keys(instance.pk, old_keys - new_keys)
+            reindex_keys(instance.pk, new_keys - old_keys)
         return instance
 
 
@@ -87,62 +99,16 @@ class NominationSubmitSerializer(serializers.Serializer):
     responses = serializers.JSONField(required=True)
 
     def validate(self, attrs):
-        form: NominationForm = self.context["form"]
+        # Compiled from the form's fields once per form version (nominations.validation)
+        plan: FormPlan = self.context["plan"]
         responses = attrs.get("responses") or {}
         if not isinstance(responses, dict):
             raise serializers.ValidationError(
                 {"responses": "Must be a JSON object (key/value pairs)."}
             )
 
-        errors = {}
-        for field in form.fields.all():
-            # Section titles and notes are display-only — they hold no user
-            # response and must never be validated or required on submit.
-            if field.field_type in NominationFormField.DISPLAY_ONLY_TYPES:
-                continue
-
-            value = responses.get(field.key)
-            if field.required and value in (None, "", []):
-                errors[field.key] = "This field is required."
-                continue
-
-            if value in (None, "", []):
-                continue
-
-            if field.field_type in {
-                NominationFormField.FieldType.TEXT,
-                NominationFormField.FieldType.TEXTAREA,
-                NominationFormField.FieldType.EMAIL,
-                NominationFormField.FieldType.URL,
-            }:
-                text_value = str(value)
-                if field.max_text_length and len(text_value) > field.max_text_length:
-                    errors[field.key] = (
-                        f"Maximum length is {field.max_text_length} characters."
-                    )
-
-            if field.field_type == NominationFormField.FieldType.FILE:
-                files = value if isinstance(value, list) else [value]
-                if not field.allow_multiple_files and len(files) > 1:
-                    errors[field.key] = "Only one file is allowed for this field."
-                    continue
-                if field.max_files and len(files) > field.max_files:
-                    errors[field.key] = (
-                        f"Maximum number of files allowed is {field.max_files}."
-                    )
-                    continue
-
-                for file_item in files:
-                    if not isinstance(file_item, dict):
-                        errors[field.key] = "Each uploaded file must be an object."
-                        break
-                    if not file_item.get("key") or not file_item.get("url"):
-                        errors[field.key] = (
-                            "Each uploaded file must include `key` and `url`."
-                        )
-                        break
-
+        errors = plan.validate(responses)
         if errors:
             raise serializers.ValidationError(errors)
 
-        return attrs
\ No newline at end of file
+        return attrs
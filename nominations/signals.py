@@ -0,0 +1,67 @@
+# nominations/signals.py
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from .models import NominationForm, NominationFormField, Nominations
+from .response_values import reindex_keys, sync_response_values
+from .validation import invalidate_form_state
+
+
+def _invalidate(form_id):
+    invalidate_form_state(form_id)
+    # Again after commit, in case a submit re-cached the old definition meanwhile
+    transaction.on_commit(lambda: invalidate_form_state(form_id))
+
+
+def bump_form_version(form_id):
+    """For field writes that bypass signals (bulk_create / bulk_update)."""
+    NominationForm.objects.filter(pk=form_id).update(version=F("version") + 1)
+    _invalidate(form_id)
+
+
+def _bump_form_version(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    bump_form_version(instance.form_id)
+
+
+def _form_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # name / is_active are part of the cached definition too
+    _invalidate(instance.pk)
+
+
+def _note_filterable_change(sender, instance, raw=False, **kwargs):
+    if raw or not instance.is_filterable:
+        instance._reindex_values = False
+        return
+    # Newly filterable (or renamed) fields need their values indexed for past submissions
+    instance._reindex_values = instance.pk is None or not NominationFormField.objects.filter(
+        pk=instance.pk, key=instance.key, is_filterable=True,
+    ).exists()
+
+
+def _reindex_filterable_field(sender, instance, raw=False, **kwargs):
+    if raw or not getattr(instance, "_reindex_values", False):
+        return
+    form_id, key = instance.form_id, instance.key
+    transaction.on_commit(lambda: reindex_keys(form_id, [key]))
+
+
+def _sync_submission_values(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    sync_response_values(instance, created=created)
+
+
+def connect_nomination_signals():
+    post_save.connect(_bump_form_version, sender=NominationFormField, dispatch_uid="nomination_field_save_version")
+    post_delete.connect(_bump_form_version, sender=NominationFormField, dispatch_uid="nomination_field_delete_version")
+    post_save.connect(_form_changed, sender=NominationForm, dispatch_uid="nomination_form_save_invalidate")
+    post_delete.connect(_form_changed, sender=NominationForm, dispatch_uid="nomination_form_delete_invalidate")
+    pre_save.connect(_note_filterable_change, sender=NominationFormField, dispatch_uid="nomination_field_filterable_check")
+    post_save.connect(_reindex_filterable_field, sender=NominationFormField, dispatch_uid="nomination_field_filterable_reindex")
+    post_save.connect(_sync_submission_values, sender=Nominations, dispatch_uid="nomination_submission_values")
@@ -1,3 +1,278 @@
-from django.test import TestCase
+import csv
+import io
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from nominations import validation
+from nominations.models import NominationForm, NominationFormField, NominationResponseValue
+from nominations.validation import compile_plan, get_form_plan, get_form_state
+from user.models import UserAuth
+
+
+FieldType = NominationFormField.FieldType
+
+
+def field_spec(key, field_type, **overrides):
+    spec = {
+        "key": key, "label": key.title(), "field_type": field_type, "required": False,
+        "max_text_length": None, "options": [], "allow_multiple_files": False, "max_files": None,
+        "is_filterable": False,
+    }
+    spec.update(overrides)
+    return spec
+
+
+def clear_form_caches():
+    # Test databases reuse form ids, so cached states and plans must not outlive a test
+    cache.clear()
+    with validation._plans_lock:
+        validation._plans.clear()
+
+
+class FieldValidationTests(SimpleTestCase):
+    def assertValidates(self, spec, valid=(), invalid=()):
+        plan = compile_plan(1, 1, [spec])
+        for value in valid:
+            self.assertEqual(plan.validate({spec["key"]: value}), {}, f"{spec['field_type']}: {value!r}")
+        for value in invalid:
+            self.assertIn(spec["key"], plan.validate({spec["key"]: value}), f"{spec['field_type']}: {value!r}")
+
+    def test_text(self):
+        for field_type in (FieldType.TEXT, FieldType.TEXTAREA):
+            self.assertValidates(
+                field_spec("name", field_type, max_text_length=5),
+                valid=["Ada", 12345, 1.5, True],
+                invalid=["Ada Lovelace", 123456, ["Ada"], {"name": "Ada"}],
+            )
+
+    def test_text_length_is_measured_on_the_text_form(self):
+        plan = compile_plan(1, 1, [field_spec("phone", FieldType.TEXT, max_text_length=7)])
+        self.assertEqual(plan.validate({"phone": 5551234}), {})
+        self.assertEqual(plan.validate({"phone": 55512345}), {"phone": "Maximum length is 7 characters."})
+
+    def test_email(self):
+        self.assertValidates(
+            field_spec("email", FieldType.EMAIL, max_text_length=20),
+            valid=["ada@example.com"],
+            invalid=["not-an-email", 12345, "ada.lovelace@example.com", ["ada@example.com"]],
+        )
+
+    def test_url(self):
+        self.assertValidates(
+            field_spec("site", FieldType.URL),
+            valid=["https://example.com/a"],
+            invalid=["example", 42, {"url": "https://example.com"}],
+        )
+
+    def test_number(self):
+        self.assertValidates(
+            field_spec("score", FieldType.NUMBER),
+            valid=[3, 2.5, "4.5", " 7 "],
+            invalid=["four", True, float("nan"), "inf", [1]],
+        )
+
+    def test_integer(self):
+        self.assertValidates(
+            field_spec("count", FieldType.INTEGER),
+            valid=[3, 4.0, "12", "-3", "+3", "12345678901234567890"],
+            invalid=[2.5, "2.5", "twelve", False],
+        )
+
+    def test_boolean(self):
+        self.assertValidates(
+            field_spec("agree", FieldType.BOOLEAN),
+            valid=[True, False, "true", "False"],
+            invalid=["yes", 2, ["true"]],
+        )
+
+    def test_date_and_datetime(self):
+        self.assertValidates(
+            field_spec("day", FieldType.DATE),
+            valid=["2024-02-29"],
+            invalid=["2023-02-29", "29/02/2024", 20240229],
+        )
+        self.assertValidates(
+            field_spec("at", FieldType.DATETIME),
+            valid=["2024-02-29T10:30:00", "2024-02-29T10:30:00+02:00"],
+            invalid=["2024-02-29T25:00:00", "tomorrow", 1709200000],
+        )
+
+    def test_single_choice_with_both_option_formats(self):
+        plain = ["Red", "Green"]
+        labelled = [{"value": "red", "label": "Red"}, {"value": "green", "label": "Green"}, {"label": "Blue"}]
+        self.assertValidates(field_spec("colour", FieldType.SINGLE_CHOICE, options=plain),
+                             valid=["Red", "Green"], invalid=["red", "Blue", ["Red"]])
+        self.assertValidates(field_spec("colour", FieldType.SINGLE_CHOICE, options=labelled),
+                             valid=["red", "green", "Blue"], invalid=["Red", "purple", {"value": "red"}])
+
+    def test_multi_choice_with_both_option_formats(self):
+        plain = ["Red", "Green", 3]
+        labelled = [{"value": "red", "label": "Red"}, {"value": 3, "label": "Three"}]
+        self.assertValidates(field_spec("colours", FieldType.MULTI_CHOICE, options=plain),
+                             valid=[["Red", "Green"], "Red", [3], ["3"]], invalid=[["Red", "Blue"], [["Red"]]])
+        self.assertValidates(field_spec("colours", FieldType.MULTI_CHOICE, options=labelled),
+                             valid=[["red", 3]], invalid=[["Red"], ["Three"]])
+
+    def test_file(self):
+        upload = {"key": "nominations/a.pdf", "url": "https://cdn.example.com/a.pdf"}
+        self.assertValidates(
+            field_spec("cv", FieldType.FILE),
+            valid=[upload, [upload]],
+            invalid=[[upload, upload], "a.pdf", {"key": "nominations/a.pdf"}],
+        )
+        self.assertValidates(
+            field_spec("docs", FieldType.FILE, allow_multiple_files=True, max_files=2),
+            valid=[[upload, upload]],
+            invalid=[[upload, upload, upload]],
+        )
+
+    def test_required_and_display_only_fields(self):
+        plan = compile_plan(1, 1, [
+            field_spec("intro", FieldType.SECTION_TITLE, required=True),
+            field_spec("name", FieldType.TEXT, required=True),
+            field_spec("notes", FieldType.TEXTAREA),
+        ])
+        self.assertEqual([key for key, *_rest in plan.fields], ["name", "notes"])
+        for empty in (None, "", []):
+            self.assertEqual(plan.validate({"name": empty}), {"name": "This field is required."})
+        self.assertEqual(plan.validate({"name": "Ada"}), {})
+
+
+class FormPlanCacheTests(TestCase):
+    def setUp(self):
+        clear_form_caches()
+        self.addCleanup(clear_form_caches)
+        self.form = NominationForm.objects.create(name="Awards")
+        NominationFormField.objects.create(form=self.form, key="name", label="Name", field_type=FieldType.TEXT)
+
+    def submit(self, responses):
+        return self.client.post(f"/api/nominations/forms/{self.form.pk}/submit/", {"responses": responses},
+                                content_type="application/json")
+
+    def test_field_change_bumps_the_version_and_recompiles_the_plan(self):
+        state = get_form_state(self.form.pk)
+        plan = get_form_plan(state)
+        self.assertIs(get_form_plan(get_form_state(self.form.pk)), plan)
+        self.assertEqual(self.submit({"name": "Ada"}).status_code, 201)
+
+        NominationFormField.objects.create(form=self.form, key="email", label="Email",
+                                           field_type=FieldType.EMAIL, required=True)
+        new_state = get_form_state(self.form.pk)
+        self.assertEqual(new_state["version"], state["version"] + 1)
+        new_plan = get_form_plan(new_state)
+        self.assertIsNot(new_plan, plan)
+        self.assertEqual([key for key, *_rest in new_plan.fields], ["name", "email"])
+
+        response = self.submit({"name": "Ada"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"email": ["This field is required."]})
+        self.assertEqual(self.submit({"name": "Ada", "email": "ada@example.com"}).status_code, 201)
+
+    def test_inactive_form_is_not_accepted(self):
+        self.assertEqual(self.submit({"name": "Ada"}).status_code, 201)
+        self.form.is_active = False
+        self.form.save()
+        self.assertEqual(self.submit({"name": "Ada"}).status_code, 404)
+
+
+class ResponseValueTests(TestCase):
+    def setUp(self):
+        clear_form_caches()
+        self.addCleanup(clear_form_caches)
+        self.admin = UserAuth.objects.create_superuser(unique_id="admin", email="admin@example.com")
+        self.api = APIClient()
+        self.api.force_authenticate(self.admin)
+        self.form = NominationForm.objects.create(name="Awards")
+        self.category = NominationFormField.objects.create(
+            form=self.form, key="category", label="Category", field_type=FieldType.SINGLE_CHOICE,
+            options=["Science", "Arts"], is_filterable=True, order=2,
+        )
+        self.country = NominationFormField.objects.create(
+            form=self.form, key="country", label="Country", field_type=FieldType.TEXT, order=3,
+        )
+        NominationFormField.objects.create(
+            form=self.form, key="intro", label="About you", field_type=FieldType.SECTION_TITLE, order=0,
+        )
+        NominationFormField.objects.create(
+            form=self.form, key="name", label="Full name", field_type=FieldType.TEXT, order=1,
+        )
+
+    def submit(self, **responses):
+        response = self.client.post(f"/api/nominations/forms/{self.form.pk}/submit/", {"responses": responses},
+                                    content_type="application/json")
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()["id"]
+
+    def filtered(self, **filters):
+        params = {"form": self.form.pk, **{f"responses.{key}": value for key, value in filters.items()}}
+        return self.api.get("/api/nominations/admin/submissions/", params)
+
+    def filtered_ids(self, **filters):
+        response = self.filtered(**filters)
+        self.assertEqual(response.status_code, 200, response.content)
+        return {item["id"] for item in response.json()["results"]}
+
+    def test_submit_then_filter(self):
+        science = self.submit(name="Ada", category="Science", country="UK")
+        self.submit(name="Frida", category="Arts", country="MX")
+        self.assertEqual(self.filtered_ids(category="Science"), {science})
+        self.assertEqual(self.filtered_ids(category="Music"), set())
+        self.assertEqual(NominationResponseValue.objects.filter(nomination_id=science).count(), 1)
+
+    def test_filter_without_form_is_rejected(self):
+        response = self.api.get("/api/nominations/admin/submissions/", {"responses.category": "Science"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_non_filterable_key_is_rejected(self):
+        self.submit(name="Ada", category="Science", country="UK")
+        response = self.filtered(country="UK")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"responses": "Not filterable: country."})
+
+    def test_marking_a_field_filterable_indexes_past_submissions(self):
+        uk = self.submit(name="Ada", category="Science", country="UK")
+        self.submit(name="Frida", category="Arts", country="MX")
+        self.assertEqual(self.filtered(country="UK").status_code, 400)
+
+        self.country.is_filterable = True
+        with self.captureOnCommitCallbacks(execute=True):
+            self.country.save()
+        self.assertEqual(self.filtered_ids(country="UK"), {uk})
+
+        self.country.is_filterable = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.country.save()
+        self.assertEqual(self.filtered(country="UK").status_code, 400)
+
+    def test_renaming_a_filterable_key(self):
+        self.submit(name="Ada", category="Science", country="UK")
+        fields = [
+            {"key": "name", "label": "Full name", "field_type": FieldType.TEXT, "order": 1},
+            {"key": "field", "label": "Field", "field_type": FieldType.SINGLE_CHOICE, "order": 2,
+             "options": ["Science", "Arts"], "is_filterable": True},
+        ]
+        response = self.api.patch(f"/api/nominations/admin/forms/{self.form.pk}/", {"fields": fields}, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+
+        self.assertFalse(NominationResponseValue.objects.filter(form=self.form, key="category").exists())
+        self.assertEqual(self.filtered(category="Science").status_code, 400)
+        renamed = self.submit(name="Grace", field="Science")
+        self.assertEqual(self.filtered_ids(field="Science"), {renamed})
+
+    def test_csv_export_follows_the_form_field_order(self):
+        first = self.submit(country="UK", name="Ada", category="Science")
+        second = self.submit(category="Arts", name="=HYPERLINK(1)")
+        response = self.api.get("/api/nominations/admin/submissions/export/", {"form": self.form.pk, "type": "csv"})
+        self.assertEqual(response.status_code, 200)
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(rows[0], ["id", "submitted_at", "Full name", "Category", "Country"])
+        by_id = {row[0]: row[2:] for row in rows[1:]}
+        self.assertEqual(by_id[str(first)], ["Ada", "Science", "UK"])
+        self.assertEqual(by_id[str(second)], ["'=HYPERLINK(1)", "Arts", ""])
+
+        response = self.api.get("/api/nominations/admin/submissions/export/",
+                                {"form": self.form.pk, "type": "csv", "responses.category": "Arts"})
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual([row[0] for row in rows[1:]], [str(second)])
@@ -1,11 +1,14 @@
 from django.urls import path
 
 from .views import (
+    NominationFieldDirectUploadCompleteView,
+    NominationFieldDirectUploadView,
     NominationFieldFileUploadView,
     NominationFieldTypeListView,
     NominationFormAdminDetailView,
     NominationFormAdminListCreateView,
     NominationsAdminDetailView,
+    NominationsAdminExportView,
     NominationsAdminListView,
     NominationSubmitView,
     PublicNominationFormDetailView,
@@ -19,10 +22,21 @@ urlpatterns = [
         NominationFieldFileUploadView.as_view(),
         name="nomination-field-file-upload",
     ),
+    path(
+        "forms/<int:form_id>/fields/<slug:field_key>/upload/direct/",
+        NominationFieldDirectUploadView.as_view(),
+        name="nomination-field-direct-upload",
+    ),
+    path(
+        "forms/<int:form_id>/fields/<slug:field_key>/upload/direct/complete/",
+        NominationFieldDirectUploadCompleteView.as_view(),
+        name="nomination-field-direct-upload-complete",
+    ),
     # Admin (JWT + staff)
     path("admin/forms/", NominationFormAdminListCreateView.as_view(), name="nomination-form-admin-list-create"),
     path("admin/forms/<int:pk>/", NominationFormAdminDetailView.as_view(), name="nomination-form-admin-detail"),
     path("admin/submissions/", NominationsAdminListView.as_view(), name="nomination-submissions-admin-list"),
+    path("admin/submissions/export/", NominationsAdminExportView.as_view(), name="nomination-submissions-admin-export"),
     path("admin/submissions/<int:pk>/", NominationsAdminDetailView.as_view(), name="nomination-submissions-admin-detail"),
     # Public
     path("forms/", PublicNominationFormListView.as_view(), name="nomination-form-public-list"),
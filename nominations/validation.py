@@ -0,0 +1,280 @@
+# nominations/validation.py
+#
+# Submit-time validation of nomination responses. Each form's fields are
+# compiled once into a FormPlan (one check function per field) and cached
+# per (form id, version); `NominationForm.version` is bumped by
+# nominations.signals whenever a field changes. The form's current version
+# and field definitions live in the Django cache. With a shared cache a
+# submit reads nothing from the database; with a per-process one the signals'
+# invalidation only reaches one worker, so the cached copy is checked against
+# the form row (one indexed single-row query) before it is used.
+
+import math
+import threading
+from dataclasses import dataclass
+from datetime import date
+
+from cachetools import LRUCache
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.validators import EmailValidator, URLValidator
+from django.utils.dateparse import parse_datetime
+
+from common.utils.cache_backend import cache_is_shared
+
+from .models import NominationForm, NominationFormField
+
+
+FieldType = NominationFormField.FieldType
+
+FIELD_SPEC_ATTRS = (
+    "key", "label", "field_type", "required", "max_text_length", "options",
+    "allow_multiple_files", "max_files", "is_filterable",
+)
+
+_validate_email = EmailValidator()
+_validate_url = URLValidator()
+
+
+class FieldError(Exception):
+    pass
+
+
+def _is_empty(value):
+    return value in (None, "", [])
+
+
+def option_values(options):
+    """
+    Allowed values of a choice field. Both stored formats are accepted:
+    ["Option A", "Option B"] and [{"value": "a", "label": "Option A"}, ...]
+    """
+    values = set()
+    for option in options or []:
+        if isinstance(option, dict):
+            value = option.get("value", option.get("label"))
+        else:
+            value = option
+        if value is not None:
+            values.add(str(value))
+    return values
+
+
+# Field checks. Each takes the compiled field spec and a non-empty value
+# and raises FieldError with the message to show.
+
+def _check_text(spec, value):
+    # Scalars are stored as given and measured as text, e.g. a phone number sent as 5551234
+    if isinstance(value, (list, dict)):
+        raise FieldError("Must be text.")
+    text = str(value)
+    if spec["max_text_length"] and len(text) > spec["max_text_length"]:
+        raise FieldError(f"Maximum length is {spec['max_text_length']} characters.")
+    return text
+
+
+def _check_email(spec, value):
+    text = _check_text(spec, value)
+    try:
+        _validate_email(text)
+    except ValidationError:
+        raise FieldError("Enter a valid email address.")
+
+
+def _check_url(spec, value):
+    text = _check_text(spec, value)
+    try:
+        _validate_url(text)
+    except ValidationError:
+        raise FieldError("Enter a valid URL.")
+
+
+def _as_number(value):
+    if isinstance(value, bool):
+        raise FieldError("Must be a number.")
+    if isinstance(value, (int, float)):
+        number = value
+    elif isinstance(value, str):
+        try:
+            number = float(value.strip())
+        except ValueError:
+            raise FieldError("Must be a number.")
+    else:
+        raise FieldError("Must be a number.")
+    if not math.isfinite(number):
+        raise FieldError("Must be a number.")
+    return number
+
+
+def _check_number(spec, value):
+    _as_number(value)
+
+
+def _check_integer(spec, value):
+    if isinstance(value, str) and value.strip().lstrip("+-").isdigit():
+        return
+    number = _as_number(value)
+    if not float(number).is_integer():
+        raise FieldError("Must be a whole number.")
+
+
+def _check_boolean(spec, value):
+    if value not in (True, False, "true", "false", "True", "False"):
+        raise FieldError("Must be true or false.")
+
+
+def _check_date(spec, value):
+    try:
+        date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise FieldError("Enter a valid date (YYYY-MM-DD).")
+
+
+def _check_datetime(spec, value):
+    try:
+        parsed = parse_datetime(value) if isinstance(value, str) else None
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise FieldError("Enter a valid date and time (ISO 8601).")
+
+
+def _check_single_choice(spec, value):
+    if isinstance(value, (list, dict)):
+        raise FieldError("Select one option.")
+    if spec["choices"] and str(value) not in spec["choices"]:
+        raise FieldError(f"`{value}` is not one of the available options.")
+
+
+def _check_multi_choice(spec, value):
+    values = value if isinstance(value, list) else [value]
+    for item in values:
+        if isinstance(item, (list, dict)):
+            raise FieldError("Select options from the list.")
+        if spec["choices"] and str(item) not in spec["choices"]:
+            raise FieldError(f"`{item}` is not one of the available options.")
+
+
+def _check_file(spec, value):
+    files = value if isinstance(value, list) else [value]
+    if not spec["allow_multiple_files"] and len(files) > 1:
+        raise FieldError("Only one file is allowed for this field.")
+    if spec["max_files"] and len(files) > spec["max_files"]:
+        raise FieldError(f"Maximum number of files allowed is {spec['max_files']}.")
+    for file_item in files:
+        if not isinstance(file_item, dict):
+            raise FieldError("Each uploaded file must be an object.")
+        if not file_item.get("key") or not file_item.get("url"):
+            raise FieldError("Each uploaded file must include `key` and `url`.")
+
+
+FIELD_CHECKS = {
+    FieldType.TEXT: _check_text,
+    FieldType.TEXTAREA: _check_text,
+    FieldType.EMAIL: _check_email,
+    FieldType.URL: _check_url,
+    FieldType.NUMBER: _check_number,
+    FieldType.INTEGER: _check_integer,
+    FieldType.BOOLEAN: _check_boolean,
+    FieldType.DATE: _check_date,
+    FieldType.DATETIME: _check_datetime,
+    FieldType.SINGLE_CHOICE: _check_single_choice,
+    FieldType.MULTI_CHOICE: _check_multi_choice,
+    FieldType.FILE: _check_file,
+}
+
+
+@dataclass(frozen=True)
+class FormPlan:
+    form_id: int
+    version: int
+    # (key, required, check, spec) per response-carrying field, in form order
+    fields: tuple
+
+    def validate(self, responses):
+        """Return {field key: message} for every invalid response."""
+        errors = {}
+        for key, required, check, spec in self.fields:
+            value = responses.get(key)
+            if _is_empty(value):
+                if required:
+                    errors[key] = "This field is required."
+                continue
+            try:
+                check(spec, value)
+            except FieldError as e:
+                errors[key] = str(e)
+        return errors
+
+
+def compile_plan(form_id, version, field_specs):
+    fields = []
+    for spec in field_specs:
+        if spec["field_type"] in NominationFormField.DISPLAY_ONLY_TYPES:
+            # Section titles and notes hold no user response
+            continue
+        spec = dict(spec, choices=option_values(spec["options"]))
+        check = FIELD_CHECKS.get(spec["field_type"], _check_text)
+        fields.append((spec["key"], spec["required"], check, spec))
+    return FormPlan(form_id=form_id, version=version, fields=tuple(fields))
+
+
+# Cache
+
+_plans = LRUCache(maxsize=256)
+_plans_lock = threading.Lock()
+
+
+def _state_key(form_id):
+    return f"nomination_form:v2:{form_id}"
+
+
+def _load_state(form_id):
+    form = NominationForm.objects.filter(pk=form_id).prefetch_related("fields").first()
+    if form is None:
+        return None
+    return {
+        "id": form.id,
+        "name": form.name,
+        "is_active": form.is_active,
+        "version": form.version,
+        "fields": [
+            {attr: getattr(field, attr) for attr in FIELD_SPEC_ATTRS}
+            for field in form.fields.all()
+        ],
+    }
+
+
+def _is_current(state):
+    row = NominationForm.objects.filter(pk=state["id"]).values_list("version", "is_active", "name").first()
+    return row == (state["version"], state["is_active"], state["name"])
+
+
+def get_form_state(form_id):
+    """The form's name, is_active, version and field specs; cached until the form or a field changes."""
+    key = _state_key(form_id)
+    state = cache.get(key)
+    if state is not None and not cache_is_shared() and not _is_current(state):
+        state = None
+    if state is None:
+        state = _load_state(form_id)
+        if state is None:
+            return None
+        cache.set(key, state, settings.NOMINATION_FORM_CACHE_SECONDS)
+    return state
+
+
+def get_form_plan(state):
+    plan_key = (state["id"], state["version"])
+    with _plans_lock:
+        plan = _plans.get(plan_key)
+    if plan is None:
+        plan = compile_plan(state["id"], state["version"], state["fields"])
+        with _plans_lock:
+            _plans[plan_key] = plan
+    return plan
+
+
+def invalidate_form_state(form_id):
+    cache.delete(_state_key(form_id))
@@ -1,3 +1,6 @@
+from django.conf import settings
+from django.db import transaction
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from rest_framework import status
 from rest_framework.permissions import AllowAny
@@ -5,8 +8,13 @@ from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from common.constants import S3_BLOG_BUCKET_NAME
+from common.constants import S3_BLOG_BUCKET_NAME, DIRECT_UPLOAD_NOMINATION_CONTENT_TYPES
+from common.pagination import KeysetPagination
+from common.utils.direct_upload import complete_direct_upload, issue_direct_upload
 from common.utils.s3_utils import upload_image_to_s3, delete_image_from_s3
+from common.utils.storage import MB
+from common.utils.streaming import stream_csv, stream_xlsx
+from common.utils.upload_engine import upload_files_to_s3
 from common.views import CustomJWTAuthentication, IsAdminUser
 from .models import NominationForm, NominationFormField, Nominations
 from .serializers import (
@@ -14,6 +22,8 @@ from .serializers import (
     NominationsSerializer,
     NominationSubmitSerializer,
 )
+from .response_values import export_columns, export_rows, filter_by_responses, parse_response_filters
+from .validation import get_form_plan, get_form_state
 
 
 class NominationFormAdminListCreateView(APIView):
@@ -118,47 +128,110 @@ class NominationSubmitView(APIView):
     permission_classes = [AllowAny]
 
     def post(self, request, pk):
-        form = get_object_or_404(
-            NominationForm.objects.prefetch_related("fields"),
-            pk=pk,
-            is_active=True,
-        )
+        # Served from the cache: no queries until the insert
+        state = get_form_state(pk)
+        if state is None or not state["is_active"]:
+            raise Http404("No NominationForm matches the given query.")
+
         submit_serializer = NominationSubmitSerializer(
             data=request.data,
-            context={"form": form},
+            context={"plan": get_form_plan(state)},
         )
         if not submit_serializer.is_valid():
             return Response(submit_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        nomination = Nominations.objects.create(
-            form=form,
-            responses=submit_serializer.validated_data["responses"],
-        )
+        form = NominationForm(id=state["id"], name=state["name"], is_active=state["is_active"], version=state["version"])
+        form._state.adding = False
+        with transaction.atomic():
+            # The post_save signal adds the filterable values in the same transaction
+            nomination = Nominations.objects.create(
+                form=form,
+                responses=submit_serializer.validated_data["responses"],
+            )
         return Response(
             NominationsSerializer(nomination).data,
             status=status.HTTP_201_CREATED,
         )
 
 
+class NominationSubmissionPagination(KeysetPagination):
+    page_size = 50
+    max_page_size = 200
+
+
+def _submissions_queryset(request):
+    """
+    Submissions narrowed by `?form=<id>` and `?responses.<key>=<value>`
+    filters. Returns (queryset, form_id, error response).
+    """
+    qs = Nominations.objects.select_related("form").order_by("-created_at")
+    form_id = request.query_params.get("form")
+    if form_id is not None:
+        try:
+            form_id = int(form_id)
+        except (TypeError, ValueError):
+            return None, None, Response(
+                {"form": "Invalid form id."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        qs = qs.filter(form_id=form_id)
+
+    qs, error = filter_by_responses(qs, form_id, parse_response_filters(request.query_params))
+    if error:
+        return None, None, Response(error, status=status.HTTP_400_BAD_REQUEST)
+    return qs, form_id, None
+
+
 class NominationsAdminListView(APIView):
-    """Admin: list all submissions; optional ?form=<id> to filter by form."""
+    """
+    Admin: list submissions newest first, cursor-paginated.
+    Optional ?form=<id>, and with it ?responses.<key>=<value> on filterable fields.
+    """
 
     authentication_classes = [CustomJWTAuthentication]
     permission_classes = [IsAdminUser]
 
     def get(self, request):
-        qs = Nominations.objects.select_related("form").order_by("-created_at")
-        form_id = request.query_params.get("form")
-        if form_id is not None:
-            try:
-                qs = qs.filter(form_id=int(form_id))
-            except (TypeError, ValueError):
-                return Response(
-                    {"form": "Invalid form id."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-        serializer = NominationsSerializer(qs, many=True)
-        return Response(serializer.data)
+        qs, _form_id, error = _submissions_queryset(request)
+        if error:
+            return error
+        paginator = NominationSubmissionPagination()
+        page = paginator.paginate_queryset(qs, request)
+        serializer = NominationsSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+
+class NominationsAdminExportView(APIView):
+    """
+    Admin: download a form's submissions as CSV or XLSX (?type=csv|xlsx).
+    Requires ?form=<id>; accepts the same response filters as the list.
+    Columns follow the form's field order.
+    """
+
+    authentication_classes = [CustomJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        export_type = request.query_params.get("type", "csv")
+        if export_type not in ("csv", "xlsx"):
+            return Response({"type": "Must be `csv` or `xlsx`."}, status=status.HTTP_400_BAD_REQUEST)
+        if request.query_params.get("form") is None:
+            return Response({"form": "This parameter is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        qs, form_id, error = _submissions_queryset(request)
+        if error:
+            return error
+        state = get_form_state(form_id)
+        if state is None:
+            raise Http404("No NominationForm matches the given query.")
+
+        columns = export_columns(state)
+        header = ["id", "submitted_at"] + [label for _key, label in columns]
+        rows = export_rows(qs.select_related(None), columns)
+        filename = f"nominations-{form_id}.{export_type}"
+        if export_type == "xlsx":
+            return stream_xlsx(rows, header, filename, sheet_name=state["name"])
+        return stream_csv(rows, header, filename)
 
 
 class NominationsAdminDetailView(APIView):
@@ -237,7 +310,8 @@ class NominationFieldFileUploadView(APIView):
             size_limit_bytes = field.max_file_size_mb * 1024 * 1024
 
         folder = request.data.get("folder", f"nominations/{form.id}/{field.key}")
-        uploaded_files = []
+
+        # Validate every file before uploading any of them
         for upload_file in files:
             if upload_file.content_type not in ("application/pdf",) and not (
                 upload_file.content_type or ""
@@ -263,27 +337,34 @@ class NominationFieldFileUploadView(APIView):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            upload_response = upload_image_to_s3(
-                image_file=upload_file,
-                folder=folder,
-                bucket=S3_BLOG_BUCKET_NAME,
-            )
-            if upload_response["error"]:
-                return Response(
-                    {"error": upload_response["message"]},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
+        upload_responses = upload_files_to_s3(
+            files,
+            folder=folder,
+            bucket=S3_BLOG_BUCKET_NAME,
+        )
 
-            uploaded_files.append(
-                {
-                    "name": upload_file.name,
-                    "content_type": upload_file.content_type,
-                    "size": upload_file.size,
-                    "key": upload_response["key"],
-                    "url": upload_response["url"],
-                }
+        failed = [
+            {"name": upload_response["name"], "message": upload_response["message"]}
+            for upload_response in upload_responses
+            if upload_response["error"]
+        ]
+        if failed:
+            return Response(
+                {"error": failed[0]["message"], "failed": failed},
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
+        uploaded_files = [
+            {
+                "name": upload_file.name,
+                "content_type": upload_file.content_type,
+                "size": upload_file.size,
+                "key": upload_response["key"],
+                "url": upload_response["url"],
+            }
+            for upload_file, upload_response in zip(files, upload_responses)
+        ]
+
         if field.allow_multiple_files:
             return Response({"files": uploaded_files}, status=status.HTTP_201_CREATED)
 
@@ -326,4 +407,98 @@ class NominationFieldFileUploadView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        return Response(status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+def _get_file_field(form_id, field_key):
+    form = get_object_or_404(NominationForm, pk=form_id, is_active=True)
+    return get_object_or_404(form.fields, key=field_key)
+
+
+def _file_field_size_limit(field):
+    if field.max_file_size_mb:
+        return field.max_file_size_mb * MB
+    return settings.NOMINATION_FILE_MAX_UPLOAD_MB * MB
+
+
+class NominationFieldDirectUploadView(APIView):
+    """
+    Anyone: get a presigned S3 target for a configured file field, so the
+    file is uploaded by the browser and never passes through this server.
+    """
+
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def post(self, request, form_id, field_key):
+        field = _get_file_field(form_id, field_key)
+
+        if field.field_type != NominationFormField.FieldType.FILE:
+            return Response(
+                {"error": "This field is not configured as file type."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        filename = request.data.get("filename")
+        content_type = request.data.get("content_type")
+        size = request.data.get("size")
+        if not filename or not content_type or size is None:
+            return Response(
+                {"error": "`filename`, `content_type` and `size` are required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        response = issue_direct_upload(
+            bucket=S3_BLOG_BUCKET_NAME,
+            folder=f"nominations/{form_id}/{field.key}",
+            filename=filename,
+            content_type=content_type,
+            size=size,
+            allowed_content_types=DIRECT_UPLOAD_NOMINATION_CONTENT_TYPES,
+            max_size_bytes=_file_field_size_limit(field),
+            method=request.data.get("method"),
+        )
+        if response["error"]:
+            return Response({"error": response["message"]}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(response, status=status.HTTP_200_OK)
+
+
+class NominationFieldDirectUploadCompleteView(APIView):
+    """
+    Anyone: verify a direct upload and return the same file metadata as
+    NominationFieldFileUploadView, ready to be saved in responses JSON.
+    """
+
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def post(self, request, form_id, field_key):
+        field = _get_file_field(form_id, field_key)
+
+        if field.field_type != NominationFormField.FieldType.FILE:
+            return Response(
+                {"error": "This field is not configured as file type."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        response = complete_direct_upload(
+            bucket=S3_BLOG_BUCKET_NAME,
+            key=request.data.get("key"),
+            expected_prefix=f"nominations/{form_id}/{field.key}/",
+            allowed_content_types=DIRECT_UPLOAD_NOMINATION_CONTENT_TYPES,
+            max_size_bytes=_file_field_size_limit(field),
+            upload_id=request.data.get("upload_id"),
+            parts=request.data.get("parts"),
+        )
+        if response["error"]:
+            return Response({"error": response["message"]}, status=status.HTTP_400_BAD_REQUEST)
+
+        uploaded_file = {
+            "name": request.data.get("filename") or response["key"].rsplit("/", 1)[-1],
+            "content_type": response["content_type"],
+            "size": response["size"],
+            "key": response["key"],
+            "url": response["url"],
+        }
+        return Response({"file": uploaded_file}, status=status.HTTP_201_CREATED)
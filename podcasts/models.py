@@ -32,6 +32,7 @@ class Podcast(models.Model):
 
     cover_image_url = models.URLField(blank=True, null=True)
     cover_image_key = models.CharField(max_length=255, blank=True, null=True)
+    cover_image_variants = models.JSONField(default=dict, blank=True)
 
     spotify_embed_url = models.URLField(blank=True, null=True)  # New field for Spotify embed
 
@@ -44,6 +45,10 @@ class Podcast(models.Model):
 
     class Meta:
         ordering = ['priority', '-published_date']
+        indexes = [
+            # Keyset pagination of the public listing: (published_date, id) within published podcasts
+            models.Index(fields=['is_published', 'published_date'], name='podcast_published_date_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -1,6 +1,7 @@
 # serializers.py
 from rest_framework import serializers
 from .models import Podcast, PodcastTag
+from common.serializers import ImageSrcsetField
 
 class PodcastTagSerializer(serializers.ModelSerializer):
     class Meta:
@@ -15,6 +16,7 @@ class PodcastSerializer(serializers.ModelSerializer):
         many=True,
         source='tags'
     )
+    cover_image_srcset = ImageSrcsetField(source='cover_image_variants')
 
     class Meta:
         model = Podcast
@@ -22,6 +24,7 @@ class PodcastSerializer(serializers.ModelSerializer):
             'id', 'title', 'description', 'transcript',
             'views', 'duration', 'published_date',
             'audio_url', 'audio_key', 'cover_image_url', 'cover_image_key',
+            'cover_image_variants', 'cover_image_srcset',
             'is_published', 'priority', 'spotify_embed_url',
             'tags', 'tag_ids'
         ]
@@ -29,6 +32,8 @@ class PodcastSerializer(serializers.ModelSerializer):
 
 
 class PodcastListSerializer(serializers.ModelSerializer):
+    cover_image_srcset = ImageSrcsetField(source='cover_image_variants')
+
     class Meta:
         model = Podcast
         exclude = ['transcript']  # Or use `fields` without transcript
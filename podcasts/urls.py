@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import PodcastTagListCreateView, PodcastTagDetailView, PodcastListCreateAPIView, PodcastDetailAPIView, PublicPublishedPodcastListAPIView, S3PodcastsFileManager, S3PodcastsImageManager, PublicPublishedPodcastListAPIViewByTags
+from .views import PodcastTagListCreateView, PodcastTagDetailView, PodcastListCreateAPIView, PodcastDetailAPIView, PublicPublishedPodcastListAPIView, S3PodcastsFileManager, S3PodcastsImageManager, PublicPublishedPodcastListAPIViewByTags, S3PodcastsDirectUploadView, S3PodcastsDirectUploadCompleteView
 
 urlpatterns = [
     path('tags/', PodcastTagListCreateView.as_view(), name='podcast-tag-list-create'),
@@ -11,5 +11,7 @@ urlpatterns = [
     path('public/by-tags/', PublicPublishedPodcastListAPIViewByTags.as_view(), name='podcast-public-list-by-tags'),
 
     path('s3/', S3PodcastsFileManager.as_view(), name='podcast-s3-manager'),
+    path('s3/direct/', S3PodcastsDirectUploadView.as_view(), name='podcast-s3-direct-upload'),
+    path('s3/direct/complete/', S3PodcastsDirectUploadCompleteView.as_view(), name='podcast-s3-direct-upload-complete'),
     path('s3-image/', S3PodcastsImageManager.as_view(), name='podcast-s3-image-manager'),
 ]
@@ -5,11 +5,19 @@ from rest_framework.permissions import AllowAny
 from .models import PodcastTag, Podcast
 from .serializers import PodcastTagSerializer, PodcastSerializer, PodcastListSerializer
 from common.views import CustomJWTAuthentication, IsAdminUser
-from common.constants import S3_PODCASTS_BUCKET_NAME, S3_BLOG_BUCKET_NAME
+from common.utils.response_cache import cached_response
+from common.constants import S3_PODCASTS_BUCKET_NAME, S3_BLOG_BUCKET_NAME, DIRECT_UPLOAD_AUDIO_CONTENT_TYPES, DIRECT_UPLOAD_PODCAST_AUDIO_FOLDER
 from rest_framework.parsers import MultiPartParser, FormParser
+from common.utils.image_variants import upload_image_with_variants, delete_image_variants
 from common.utils.s3_utils import upload_image_to_s3, delete_image_from_s3
-from rest_framework.pagination import PageNumberPagination
-from django.db.models import Q
+from common.utils.direct_upload import issue_direct_upload, complete_direct_upload
+from common.utils.storage import MB
+from common.utils.tag_filter import filter_by_tags, parse_tag_params, tag_facets
+from common.pagination import OptionalKeysetPagination
+from misc.models import SearchDocument
+from misc.search import filter_by_search
+from misc.view_counter import record_view
+from django.conf import settings
 
 class PodcastTagListCreateView(APIView):
     authentication_classes = [CustomJWTAuthentication]
@@ -19,6 +27,7 @@ class PodcastTagListCreateView(APIView):
             return [AllowAny()]
         return [IsAdminUser()]
 
+    @cached_response('podcasts.podcasttag')
     def get(self, request):
         tags = PodcastTag.objects.all()
         serializer = PodcastTagSerializer(tags, many=True)
@@ -89,7 +98,7 @@ class PodcastDetailAPIView(APIView):
 
 
 # Public View for Published Podcasts
-class StandardResultsSetPagination(PageNumberPagination):
+class StandardResultsSetPagination(OptionalKeysetPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 100
@@ -106,6 +115,7 @@ class PublicPublishedPodcastListAPIView(APIView):
 
         if podcast_id:
             podcast = generics.get_object_or_404(Podcast, pk=podcast_id, is_published=True)
+            record_view(SearchDocument.Kind.PODCAST, podcast.pk)
             serializer = PodcastSerializer(podcast)
             return Response(serializer.data)
 
@@ -113,13 +123,13 @@ class PublicPublishedPodcastListAPIView(APIView):
 
         podcasts = Podcast.objects.filter(is_published=True).defer('transcript')
 
-        # Apply search
+        # Apply search (ordered by relevance unless a sort is given)
+        rank_by_relevance = bool(search_query) and "sort" not in request.query_params
         if search_query:
-            podcasts = podcasts.filter(
-                Q(title__icontains=search_query) | Q(description__icontains=search_query)
-            )
+            podcasts = filter_by_search(podcasts, SearchDocument.Kind.PODCAST, search_query, rank=rank_by_relevance)
 
-        podcasts = podcasts.order_by(ordering)
+        if not rank_by_relevance:
+            podcasts = podcasts.order_by(ordering)
 
         paginator = StandardResultsSetPagination()
         paginated_qs = paginator.paginate_queryset(podcasts, request)
@@ -132,29 +142,28 @@ class PublicPublishedPodcastListAPIViewByTags(APIView):
     authentication_classes = []
 
     def get(self, request):
-        tags_param = request.query_params.get("tags", "")
+        tag_values, match = parse_tag_params(request)
         sort_order = request.query_params.get("sort", "newest")
         search_query = request.query_params.get("search", "")
 
-        tag_names = [tag.strip() for tag in tags_param.split(",") if tag.strip()]
-        tag_qs = PodcastTag.objects.filter(name__in=tag_names)
-
         ordering = "-published_date" if sort_order == "newest" else "published_date"
 
-        books = Podcast.objects.filter(is_published=True).filter(tags__in=tag_qs).distinct()
+        books = filter_by_tags(Podcast.objects.filter(is_published=True), tag_values, match)
 
-        # Apply search
+        # Apply search (ordered by relevance unless a sort is given)
+        rank_by_relevance = bool(search_query) and "sort" not in request.query_params
         if search_query:
-            books = books.filter(
-                Q(title__icontains=search_query) | Q(description__icontains=search_query)
-            )
+            books = filter_by_search(books, SearchDocument.Kind.PODCAST, search_query, rank=rank_by_relevance)
 
-        books = books.order_by(ordering)
+        if not rank_by_relevance:
+            books = books.order_by(ordering)
 
         paginator = StandardResultsSetPagination()
         page = paginator.paginate_queryset(books, request)
         serializer = PodcastListSerializer(page, many=True)
-        return paginator.get_paginated_response(serializer.data)
+        response = paginator.get_paginated_response(serializer.data)
+        response.data['facets'] = tag_facets(books)
+        return response
 
 
 # S3 integration
@@ -226,13 +235,14 @@ class S3PodcastsImageManager(APIView):
             return Response({'error': 'No file provided'}, status=400)
 
         bucket = S3_BLOG_BUCKET_NAME
-        response = upload_image_to_s3(image_file=upload_file, folder=folder, bucket=bucket)
+        response = upload_image_with_variants(image_file=upload_file, folder=folder, bucket=bucket)
 
         if not response['error']:
             return Response({
                 'message': response['message'],
                 'url': response['url'],
-                'key': response['key']
+                'key': response['key'],
+                'variants': response['variants'],
             }, status=200)
         
         return Response({'message': response['message']}, status=400)
@@ -249,8 +259,94 @@ class S3PodcastsImageManager(APIView):
 
         bucket = S3_BLOG_BUCKET_NAME
         response = delete_image_from_s3(bucket=bucket, image_key=file_key)
+        delete_image_variants(bucket=bucket, image_key=file_key)
 
         if not response['error']:
             return Response({'message': response['message']}, status=200)
 
         return Response({'message': response['message']}, status=400)
+
+
+class S3PodcastsDirectUploadView(APIView):
+    authentication_classes = [CustomJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        """
+        Issue a presigned upload target for podcast audio, so the file goes
+        straight from the browser to S3.
+        Send as JSON:
+        - filename (required)
+        - content_type (required, audio/*)
+        - size (required, bytes)
+        - method (optional: 'post' (default), 'put' or 'multipart')
+        """
+        filename = request.data.get('filename')
+        content_type = request.data.get('content_type')
+        size = request.data.get('size')
+
+        if not filename or not content_type or size is None:
+            return Response({'error': '`filename`, `content_type` and `size` are required'}, status=400)
+
+        response = issue_direct_upload(
+            bucket=S3_BLOG_BUCKET_NAME,
+            folder=DIRECT_UPLOAD_PODCAST_AUDIO_FOLDER,
+            filename=filename,
+            content_type=content_type,
+            size=size,
+            allowed_content_types=DIRECT_UPLOAD_AUDIO_CONTENT_TYPES,
+            max_size_bytes=settings.PODCAST_AUDIO_MAX_UPLOAD_MB * MB,
+            method=request.data.get('method'),
+        )
+
+        if response['error']:
+            return Response({'message': response['message']}, status=400)
+
+        return Response(response, status=200)
+
+
+class S3PodcastsDirectUploadCompleteView(APIView):
+    authentication_classes = [CustomJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        """
+        Verify a direct upload and, when `podcast_id` is given, attach it to the podcast.
+        Send as JSON:
+        - key (required, as returned by the presign endpoint)
+        - upload_id, parts (required for multipart uploads)
+        - podcast_id (optional)
+        """
+        podcast = None
+        podcast_id = request.data.get('podcast_id')
+        if podcast_id:
+            try:
+                podcast = Podcast.objects.get(pk=podcast_id)
+            except (Podcast.DoesNotExist, ValueError, TypeError):
+                return Response({'error': 'Podcast not found'}, status=404)
+
+        response = complete_direct_upload(
+            bucket=S3_BLOG_BUCKET_NAME,
+            key=request.data.get('key'),
+            expected_prefix=f"{DIRECT_UPLOAD_PODCAST_AUDIO_FOLDER}/",
+            allowed_content_types=DIRECT_UPLOAD_AUDIO_CONTENT_TYPES,
+            max_size_bytes=settings.PODCAST_AUDIO_MAX_UPLOAD_MB * MB,
+            upload_id=request.data.get('upload_id'),
+            parts=request.data.get('parts'),
+        )
+
+        if response['error']:
+            return Response({'message': response['message']}, status=400)
+
+        if podcast:
+            podcast.audio_url = response['url']
+            podcast.audio_key = response['key']
+            podcast.save(update_fields=['audio_url', 'audio_key', 'updated_at'])
+
+        return Response({
+            'message': response['message'],
+            'url': response['url'],
+            'key': response['key'],
+            'size': response['size'],
+            'content_type': response['content_type'],
+        }, status=200)
@@ -0,0 +1,128 @@
+# user/google_auth.py
+#
+# Google sign-in token checks. ID tokens (JWTs) are verified locally against
+# Google's JWKS key set, which is cached and refreshed when Google rotates
+# keys. OAuth access tokens still go to the userinfo endpoint, over a pooled
+# HTTP session.
+
+import threading
+
+import jwt
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+_lock = threading.Lock()
+_jwks_client = None
+_session = None
+
+
+def get_jwks_client():
+    global _jwks_client
+    if _jwks_client is None:
+        with _lock:
+            if _jwks_client is None:
+                # Caches the key set for GOOGLE_JWKS_CACHE_SECONDS and refetches it
+                # early when a token is signed with a key id it hasn't seen
+                _jwks_client = jwt.PyJWKClient(
+                    settings.GOOGLE_JWKS_URL,
+                    cache_jwk_set=True,
+                    lifespan=settings.GOOGLE_JWKS_CACHE_SECONDS,
+                    timeout=settings.GOOGLE_HTTP_TIMEOUT_SECONDS,
+                )
+    return _jwks_client
+
+
+def get_google_session():
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=settings.GOOGLE_HTTP_POOL_SIZE, max_retries=1)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def reset_google_clients():
+    """Drop the cached JWKS client and session, e.g. after overriding the Google URLs in tests."""
+    global _jwks_client, _session
+    with _lock:
+        _jwks_client = None
+        _session = None
+
+
+def is_id_token(token):
+    # ID tokens are JWTs (header.payload.signature); access tokens are opaque
+    return token.count(".") == 2
+
+
+def verify_id_token(token):
+    """
+    Verify a Google ID token's signature, audience, issuer and expiry locally.
+    Returns {'error': False, 'user_info': {...}} in the userinfo endpoint's
+    shape, or {'error': True, 'message': ...}.
+    """
+    if not settings.GOOGLE_CLIENT_IDS:
+        return {"error": True, "message": "Google ID token sign-in is not configured"}
+
+    try:
+        signing_key = get_jwks_client().get_signing_key_from_jwt(token)
+        claims = jwt.decode(
+            token,
+            signing_key.key,
+            algorithms=["RS256"],
+            audience=settings.GOOGLE_CLIENT_IDS,
+            options={"require": ["exp", "iat", "iss", "aud", "sub"]},
+            leeway=settings.GOOGLE_ID_TOKEN_LEEWAY_SECONDS,
+        )
+    except jwt.PyJWKClientConnectionError as e:
+        print('Google JWKS fetch failed:', e)
+        return {"error": True, "message": "Failed to connect to Google", "unavailable": True}
+    except jwt.PyJWTError as e:
+        return {"error": True, "message": f"Invalid Google ID token: {e}"}
+
+    if claims["iss"] not in GOOGLE_ISSUERS:
+        return {"error": True, "message": "Invalid Google ID token: wrong issuer"}
+
+    return {
+        "error": False,
+        "user_info": {
+            "id": claims["sub"],
+            "email": claims.get("email", ""),
+            "verified_email": claims.get("email_verified") in (True, "true"),
+            "name": claims.get("name"),
+            "picture": claims.get("picture"),
+        },
+    }
+
+
+def fetch_userinfo(access_token):
+    """Resolve an OAuth access token through Google's userinfo endpoint."""
+    try:
+        response = get_google_session().get(
+            settings.GOOGLE_USERINFO_URL,
+            headers={"Authorization": f"Bearer {access_token}"},
+            timeout=settings.GOOGLE_HTTP_TIMEOUT_SECONDS,
+        )
+    except requests.exceptions.RequestException as e:
+        print('Google userinfo request failed:', e)
+        return {"error": True, "message": "Failed to connect to Google", "unavailable": True}
+
+    if response.status_code != 200:
+        return {"error": True, "message": "Failed to fetch user info from Google"}
+    return {"error": False, "user_info": response.json()}
+
+
+def resolve_google_token(token):
+    """ID tokens are verified locally; anything else falls back to userinfo."""
+    if settings.GOOGLE_SIGNIN_MODE == "userinfo" or (
+        settings.GOOGLE_SIGNIN_MODE == "auto" and not is_id_token(token)
+    ):
+        return fetch_userinfo(token)
+    return verify_id_token(token)
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from user.omnisend import OmnisendNotConfigured, drain_outbox
+
+
+class Command(BaseCommand):
+    help = "Send queued Omnisend contact calls from the outbox, retrying failures with backoff"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, help="Entries claimed per batch (default: OMNISEND_OUTBOX_BATCH_SIZE)")
+        parser.add_argument("--concurrency", type=int, help="Omnisend calls in flight at once (default: OMNISEND_SYNC_CONCURRENCY)")
+        parser.add_argument("--loop", action="store_true", help="Keep polling for new entries instead of exiting when drained")
+        parser.add_argument("--interval", type=float, default=10, help="Seconds between polls with --loop (default: 10)")
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                sent, failed = drain_outbox(batch_size=options["batch_size"], concurrency=options["concurrency"])
+            except OmnisendNotConfigured as e:
+                # A configuration error, not a failed call: leave the outbox untouched
+                raise CommandError(f"{e}; outbox entries left pending")
+            if sent or failed or not options["loop"]:
+                self.stdout.write(self.style.SUCCESS(f"Synced {sent} contacts, {failed} failed"))
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
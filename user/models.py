@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
 import uuid
 
@@ -74,6 +75,7 @@ class UserProfile(models.Model):
     name = models.CharField(max_length=255)
     image_url = models.URLField(blank=True, null=True)
     image_key = models.CharField(max_length=255, blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True)
     occupation = models.CharField(max_length=255, blank=True, null=True)
     bio = models.TextField(blank=True, null=True)
 
@@ -136,4 +138,47 @@ class OmnisendContacts(models.Model):
         verbose_name_plural = "Omnisend Contacts"
 
     def __str__(self):
-        return self.email or f"Contact {self.omnisend_id}"
\ No newline at end of file
+        return self.email or f"Contact {self.omnisend_id}"
+
+
+class OmnisendOutbox(models.Model):
+    """
+    Pending Omnisend API calls, written in the same transaction as the
+    contact change and sent later by `sync_omnisend_contacts` (user.omnisend).
+    """
+
+    class Action(models.TextChoices):
+        CREATE_CONTACT = "create_contact", "Create contact"
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        PROCESSING = "processing", "Processing"
+        DONE = "done", "Done"
+        DEAD = "dead", "Dead"  # gave up, needs a look
+
+    contact = models.ForeignKey(OmnisendContacts, on_delete=models.CASCADE, related_name="outbox")
+    action = models.CharField(max_length=30, choices=Action.choices)
+    payload = models.JSONField(default=dict, blank=True)
+    # One live entry per action and contact, so repeated signups don't queue duplicate calls
+    idempotency_key = models.CharField(max_length=255, unique=True)
+
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+
+    # Set when a worker claims the entry; a stale lock means the worker died
+    lock_token = models.UUIDField(null=True, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.action} {self.contact_id} ({self.status})"
@@ -0,0 +1,227 @@
+# user/omnisend.py
+#
+# Omnisend client and the outbox that feeds it. Signups only write the
+# contact and an OmnisendOutbox row; `sync_omnisend_contacts` drains the
+# outbox in batches, a few calls at a time, retrying with exponential backoff.
+
+import hashlib
+import random
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+
+from .models import OmnisendContacts, OmnisendOutbox
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class OmnisendNotConfigured(Exception):
+    """OMNISEND_API_KEY is missing: nothing can be sent, so nothing is claimed."""
+
+
+def get_omnisend_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_maxsize=settings.OMNISEND_SYNC_CONCURRENCY)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def create_omnisend_contact(email: str, custom_properties: dict = None, status: str = "nonSubscribed"):
+    """
+    Creates a contact in Omnisend via API.
+    Returns dict {"success": True, "data": {...}} on success
+    or {"success": False, "error": "message", "retry": bool} on failure.
+    Raises OmnisendNotConfigured without an API key.
+    """
+    if not settings.OMNISEND_API_KEY:
+        raise OmnisendNotConfigured("OMNISEND_API_KEY is not set")
+
+    headers = {
+        "X-API-KEY": settings.OMNISEND_API_KEY,
+        "accept": "application/json",
+        "content-type": "application/json"
+    }
+
+    payload = {
+        "customProperties": custom_properties or {},
+        "identifiers": [
+            {
+                "channels": {
+                    "email": {
+                        "status": status
+                    }
+                },
+                "type": "email",
+                "id": email
+            }
+        ]
+    }
+
+    try:
+        response = get_omnisend_session().post(
+            settings.OMNISEND_CONTACTS_URL, json=payload, headers=headers,
+            timeout=settings.OMNISEND_HTTP_TIMEOUT_SECONDS,
+        )
+    except requests.Timeout:
+        return {"success": False, "error": "Omnisend API request timed out.", "retry": True}
+    except requests.RequestException as e:
+        return {"success": False, "error": str(e), "retry": True}
+
+    if response.status_code in (200, 201, 409):
+        # 409: already exists, the response still carries the contact id
+        try:
+            return {"success": True, "data": response.json()}
+        except ValueError:
+            return {"success": True, "data": {}}
+
+    return {
+        "success": False,
+        "error": f"Omnisend API error {response.status_code}: {response.text[:500]}",
+        # Throttling and server errors are transient; other 4xx won't fix themselves
+        "retry": response.status_code in (408, 429) or response.status_code >= 500,
+    }
+
+
+def contact_idempotency_key(action, email):
+    # Emails can be 254 characters, too long for the key column once prefixed
+    return f"{action}:{hashlib.sha256(email.encode()).hexdigest()}"
+
+
+def enqueue_contact_sync(contact, status="nonSubscribed"):
+    """
+    Queue the Omnisend create call for `contact`. Call inside the transaction
+    that saved the contact. A contact that already has an entry is not queued
+    twice; a dead entry is revived.
+    """
+    entry, created = OmnisendOutbox.objects.get_or_create(
+        idempotency_key=contact_idempotency_key(OmnisendOutbox.Action.CREATE_CONTACT, contact.email),
+        defaults={
+            "contact": contact,
+            "action": OmnisendOutbox.Action.CREATE_CONTACT,
+            "payload": {"email": contact.email, "status": status},
+        },
+    )
+    if not created and entry.status == OmnisendOutbox.Status.DEAD:
+        OmnisendOutbox.objects.filter(pk=entry.pk, status=OmnisendOutbox.Status.DEAD).update(
+            status=OmnisendOutbox.Status.PENDING, attempts=0, next_attempt_at=timezone.now(), updated_at=timezone.now(),
+        )
+    return entry
+
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter: base, 2x base, 4x base, ... capped at the max."""
+    delay = min(settings.OMNISEND_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.OMNISEND_RETRY_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def claim_batch(batch_size):
+    """
+    Lock up to `batch_size` due entries for this worker with one conditional
+    UPDATE. Concurrent workers never claim the same entry. Entries stuck in
+    PROCESSING longer than OMNISEND_OUTBOX_LOCK_SECONDS are reclaimed.
+    """
+    now = timezone.now()
+    claimable = (
+        Q(status=OmnisendOutbox.Status.PENDING, next_attempt_at__lte=now)
+        | Q(status=OmnisendOutbox.Status.PROCESSING,
+            locked_at__lt=now - timedelta(seconds=settings.OMNISEND_OUTBOX_LOCK_SECONDS))
+    )
+    ids = list(
+        OmnisendOutbox.objects.filter(claimable).order_by("next_attempt_at").values_list("id", flat=True)[:batch_size]
+    )
+    if not ids:
+        return []
+
+    token = uuid.uuid4()
+    OmnisendOutbox.objects.filter(claimable, pk__in=ids).update(
+        status=OmnisendOutbox.Status.PROCESSING, lock_token=token, locked_at=now, updated_at=now,
+    )
+    return list(OmnisendOutbox.objects.filter(lock_token=token).select_related("contact"))
+
+
+def _send(entry):
+    # Runs on a worker thread: HTTP only, no database access
+    if entry.action == OmnisendOutbox.Action.CREATE_CONTACT:
+        return create_omnisend_contact(email=entry.payload["email"], status=entry.payload.get("status", "nonSubscribed"))
+    return {"success": False, "error": f"Unknown action {entry.action}", "retry": False}
+
+
+def _record_result(entry, result):
+    """
+    Store the outcome of a claimed entry. The write is conditional on the
+    entry's lock token, so a worker whose lock expired and was reclaimed
+    can't overwrite the new owner's state. Returns True (sent), False
+    (failed) or None (lock lost, nothing written).
+    """
+    now = timezone.now()
+    attempts = entry.attempts + 1
+    owned = OmnisendOutbox.objects.filter(pk=entry.pk, lock_token=entry.lock_token)
+    released = {"attempts": attempts, "lock_token": None, "locked_at": None, "updated_at": now}
+
+    if result["success"]:
+        contact_id = result["data"].get("contactID")
+        with transaction.atomic():
+            if not owned.update(status=OmnisendOutbox.Status.DONE, last_error="", processed_at=now, **released):
+                return None
+            if contact_id:
+                # Only fill it in once; a later 409 replay must not overwrite it
+                OmnisendContacts.objects.filter(pk=entry.contact_id, omnisend_id__isnull=True).update(
+                    omnisend_id=contact_id, updated_at=now,
+                )
+        return True
+
+    if result.get("retry") and attempts < settings.OMNISEND_MAX_ATTEMPTS:
+        outcome = {"status": OmnisendOutbox.Status.PENDING, "next_attempt_at": now + retry_delay(attempts)}
+    else:
+        outcome = {"status": OmnisendOutbox.Status.DEAD, "processed_at": now}
+    if not owned.update(last_error=result["error"], **outcome, **released):
+        return None
+    return False
+
+
+def drain_outbox(batch_size=None, concurrency=None, max_batches=None):
+    """
+    Process due outbox entries until none are left (or `max_batches` ran).
+    At most `concurrency` Omnisend calls are in flight at once.
+    Returns (sent, failed) counts. Raises OmnisendNotConfigured, before
+    claiming anything, when there is no API key.
+    """
+    if not settings.OMNISEND_API_KEY:
+        raise OmnisendNotConfigured("OMNISEND_API_KEY is not set")
+
+    batch_size = batch_size or settings.OMNISEND_OUTBOX_BATCH_SIZE
+    concurrency = concurrency or settings.OMNISEND_SYNC_CONCURRENCY
+    sent = failed = batches = 0
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="omnisend-sync") as executor:
+        while max_batches is None or batches < max_batches:
+            entries = claim_batch(batch_size)
+            if not entries:
+                break
+            batches += 1
+            for entry, result in zip(entries, executor.map(_send, entries)):
+                recorded = _record_result(entry, result)
+                if recorded is None:
+                    print('Omnisend outbox entry reclaimed by another worker:', entry.pk)
+                elif recorded:
+                    sent += 1
+                else:
+                    failed += 1
+
+    return sent, failed
@@ -1,10 +1,13 @@
 from rest_framework import serializers
 from .models import UserProfile, OmnisendContacts
+from common.serializers import ImageSrcsetField
 
 class UserProfileSerializer(serializers.ModelSerializer):
+    image_srcset = ImageSrcsetField(source='image_variants')
+
     class Meta:
         model = UserProfile
-        fields = ['id', 'name', 'image_url', 'image_key', 'occupation', 'bio']
+        fields = ['id', 'name', 'image_url', 'image_key', 'image_variants', 'image_srcset', 'occupation', 'bio']
 
 
 class OmnisendContactsSerializer(serializers.ModelSerializer):
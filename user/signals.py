@@ -0,0 +1,29 @@
+# user/signals.py
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from common.utils.principal_cache import invalidate_principal
+from .models import AdminProfile, SubscriberProfile, UserAuth, UserProfile
+
+
+def _invalidate(user_id):
+    invalidate_principal(user_id)
+    # Again after commit, in case a concurrent request re-cached the old row meanwhile
+    transaction.on_commit(lambda: invalidate_principal(user_id))
+
+
+def _user_changed(sender, instance, **kwargs):
+    _invalidate(instance.pk)
+
+
+def _profile_changed(sender, instance, **kwargs):
+    _invalidate(instance.user_id)
+
+
+def connect_principal_cache_signals():
+    post_save.connect(_user_changed, sender=UserAuth, dispatch_uid='principal_cache_user_save')
+    post_delete.connect(_user_changed, sender=UserAuth, dispatch_uid='principal_cache_user_delete')
+    for model in (UserProfile, AdminProfile, SubscriberProfile):
+        post_save.connect(_profile_changed, sender=model, dispatch_uid=f'principal_cache_{model.__name__}_save')
+        post_delete.connect(_profile_changed, sender=model, dispatch_uid=f'principal_cache_{model.__name__}_delete')
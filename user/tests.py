@@ -1,3 +1,469 @@
-from django.test import TestCase
+import io
+import json
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
-# Create your tests here.
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from user import google_auth
+from user.models import OmnisendContacts, OmnisendOutbox
+from user.omnisend import OmnisendNotConfigured, _record_result, claim_batch, drain_outbox, enqueue_contact_sync
+
+
+CLIENT_ID = "test-client.apps.googleusercontent.com"
+
+
+def generate_key(kid):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key()))
+    jwk.update({"kid": kid, "alg": "RS256", "use": "sig"})
+    return private_key, jwk
+
+
+class StubServer:
+    """
+    Threaded HTTP server on 127.0.0.1 standing in for a third-party API.
+    Subclasses implement `respond(method, path, headers, body, client_address)`
+    and return (status code, JSON payload).
+    """
+
+    def __init__(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                self.dispatch(b"")
+
+            def do_POST(self):
+                self.dispatch(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+
+            def dispatch(self, body):
+                with stub.lock:
+                    status_code, payload = stub.respond(self.command, self.path, self.headers, body, self.client_address)
+                data = json.dumps(payload).encode()
+                self.send_response(status_code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class GoogleStubServer(StubServer):
+    """
+    /certs serves a JWK set, /userinfo answers Bearer tokens listed in
+    `userinfo`. Records each userinfo request's client port so tests can
+    tell whether connections were reused.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.keys = []
+        self.userinfo = {}
+        self.jwks_fetches = 0
+        self.userinfo_ports = []
+
+    def respond(self, method, path, headers, body, client_address):
+        if path == "/certs":
+            self.jwks_fetches += 1
+            return 200, {"keys": self.keys}
+        if path == "/userinfo":
+            self.userinfo_ports.append(client_address[1])
+            token = headers.get("Authorization", "").removeprefix("Bearer ")
+            if token in self.userinfo:
+                return 200, self.userinfo[token]
+            return 401, {"error": "invalid_token"}
+        return 404, {}
+
+
+class GoogleAuthTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.google = GoogleStubServer()
+        cls.google.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.google.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.private_key, jwk = generate_key("key-1")
+        self.google.keys = [jwk]
+        self.google.userinfo = {}
+        self.google.jwks_fetches = 0
+        self.google.userinfo_ports = []
+
+        overrides = override_settings(
+            GOOGLE_CLIENT_IDS=[CLIENT_ID],
+            GOOGLE_SIGNIN_MODE="auto",
+            GOOGLE_JWKS_URL=f"{self.google.url}/certs",
+            GOOGLE_USERINFO_URL=f"{self.google.url}/userinfo",
+            GOOGLE_JWKS_CACHE_SECONDS=3600,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        google_auth.reset_google_clients()
+        self.addCleanup(google_auth.reset_google_clients)
+
+    def make_token(self, private_key=None, kid="key-1", **claims):
+        now = int(time.time())
+        payload = {
+            "iss": "https://accounts.google.com",
+            "aud": CLIENT_ID,
+            "sub": "1234567890",
+            "email": "reader@example.com",
+            "email_verified": True,
+            "name": "Reader",
+            "iat": now,
+            "exp": now + 3600,
+        }
+        payload.update(claims)
+        return jwt.encode(payload, private_key or self.private_key, algorithm="RS256", headers={"kid": kid})
+
+    def test_valid_id_token(self):
+        result = google_auth.resolve_google_token(self.make_token())
+
+        self.assertFalse(result["error"])
+        self.assertEqual(result["user_info"], {
+            "id": "1234567890",
+            "email": "reader@example.com",
+            "verified_email": True,
+            "name": "Reader",
+            "picture": None,
+        })
+
+    def test_key_set_is_cached(self):
+        for _ in range(3):
+            self.assertFalse(google_auth.resolve_google_token(self.make_token())["error"])
+
+        self.assertEqual(self.google.jwks_fetches, 1)
+
+    def test_wrong_audience(self):
+        result = google_auth.resolve_google_token(self.make_token(aud="someone-else"))
+
+        self.assertTrue(result["error"])
+        self.assertIn("Invalid Google ID token", result["message"])
+
+    def test_wrong_issuer(self):
+        result = google_auth.resolve_google_token(self.make_token(iss="https://accounts.example.com"))
+
+        self.assertTrue(result["error"])
+        self.assertEqual(result["message"], "Invalid Google ID token: wrong issuer")
+
+    def test_expired_token(self):
+        now = int(time.time())
+        result = google_auth.resolve_google_token(self.make_token(iat=now - 7200, exp=now - 3600))
+
+        self.assertTrue(result["error"])
+        self.assertIn("expired", result["message"])
+
+    def test_token_signed_with_unknown_key(self):
+        other_key, _ = generate_key("key-1")
+        result = google_auth.resolve_google_token(self.make_token(private_key=other_key))
+
+        self.assertTrue(result["error"])
+        self.assertIn("Invalid Google ID token", result["message"])
+
+    def test_key_rotation_refetches_key_set(self):
+        self.assertFalse(google_auth.resolve_google_token(self.make_token())["error"])
+        self.assertEqual(self.google.jwks_fetches, 1)
+
+        # Google publishes a new key and starts signing with it
+        new_key, new_jwk = generate_key("key-2")
+        self.google.keys = [self.google.keys[0], new_jwk]
+        result = google_auth.resolve_google_token(self.make_token(private_key=new_key, kid="key-2"))
+
+        self.assertFalse(result["error"])
+        self.assertEqual(self.google.jwks_fetches, 2)
+        # The refreshed set is cached again
+        self.assertFalse(google_auth.resolve_google_token(self.make_token())["error"])
+        self.assertEqual(self.google.jwks_fetches, 2)
+
+    def test_jwks_unreachable(self):
+        with override_settings(GOOGLE_JWKS_URL="http://127.0.0.1:1/certs"):
+            google_auth.reset_google_clients()
+            result = google_auth.resolve_google_token(self.make_token())
+
+        self.assertTrue(result["error"])
+        self.assertTrue(result["unavailable"])
+
+    def test_not_configured(self):
+        with override_settings(GOOGLE_CLIENT_IDS=[]):
+            result = google_auth.resolve_google_token(self.make_token())
+
+        self.assertTrue(result["error"])
+        self.assertEqual(self.google.jwks_fetches, 0)
+
+    def test_access_token_falls_back_to_userinfo(self):
+        user_info = {"id": "42", "email": "reader@example.com", "verified_email": True}
+        self.google.userinfo = {"opaque-access-token": user_info}
+
+        first = google_auth.resolve_google_token("opaque-access-token")
+        second = google_auth.resolve_google_token("opaque-access-token")
+
+        self.assertEqual(first, {"error": False, "user_info": user_info})
+        self.assertEqual(second, first)
+        self.assertEqual(self.google.jwks_fetches, 0)
+        # Both requests went over the same pooled keep-alive connection
+        self.assertEqual(len(self.google.userinfo_ports), 2)
+        self.assertEqual(len(set(self.google.userinfo_ports)), 1)
+
+    def test_userinfo_rejects_unknown_access_token(self):
+        result = google_auth.resolve_google_token("revoked-access-token")
+
+        self.assertTrue(result["error"])
+        self.assertEqual(result["message"], "Failed to fetch user info from Google")
+
+    def test_userinfo_mode_skips_local_verification(self):
+        token = self.make_token()
+        self.google.userinfo = {token: {"id": "7"}}
+
+        with override_settings(GOOGLE_SIGNIN_MODE="userinfo"):
+            result = google_auth.resolve_google_token(token)
+
+        self.assertEqual(result, {"error": False, "user_info": {"id": "7"}})
+        self.assertEqual(self.google.jwks_fetches, 0)
+
+
+class OmnisendStubServer(StubServer):
+    """
+    POST /v5/contacts records each call and answers with the next scripted
+    (status, payload) for the email, or 201 with a new contactID.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+        self.scripts = {}
+
+    def respond(self, method, path, headers, body, client_address):
+        if method != "POST" or path != "/v5/contacts":
+            return 404, {}
+        payload = json.loads(body)
+        email = payload["identifiers"][0]["id"]
+        self.calls.append({"email": email, "api_key": headers.get("X-API-KEY"), "payload": payload})
+        script = self.scripts.get(email)
+        if script:
+            return script.pop(0)
+        return 201, {"contactID": f"omni-{len(self.calls)}"}
+
+
+class OmnisendOutboxTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.omnisend = OmnisendStubServer()
+        cls.omnisend.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.omnisend.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.omnisend.calls = []
+        self.omnisend.scripts = {}
+        overrides = override_settings(
+            OMNISEND_API_KEY="test-key",
+            OMNISEND_CONTACTS_URL=f"{self.omnisend.url}/v5/contacts",
+            OMNISEND_MAX_ATTEMPTS=3,
+            OMNISEND_RETRY_BASE_SECONDS=30,
+            OMNISEND_RETRY_MAX_SECONDS=3600,
+            OMNISEND_OUTBOX_LOCK_SECONDS=300,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def enqueue(self, email):
+        contact = OmnisendContacts.objects.create(email=email)
+        return contact, enqueue_contact_sync(contact)
+
+    def make_due(self):
+        OmnisendOutbox.objects.update(next_attempt_at=timezone.now())
+
+    def test_sync_fills_in_omnisend_id(self):
+        contact, entry = self.enqueue("reader@example.com")
+
+        self.assertEqual(drain_outbox(), (1, 0))
+
+        entry.refresh_from_db()
+        contact.refresh_from_db()
+        self.assertEqual(entry.status, OmnisendOutbox.Status.DONE)
+        self.assertEqual(entry.attempts, 1)
+        self.assertIsNone(entry.lock_token)
+        self.assertEqual(contact.omnisend_id, "omni-1")
+        self.assertEqual(self.omnisend.calls[0]["api_key"], "test-key")
+        self.assertEqual(self.omnisend.calls[0]["email"], "reader@example.com")
+
+    def test_enqueue_is_idempotent_for_long_emails(self):
+        email = f"{'a' * 64}@{'b' * 63}.{'c' * 63}.{'d' * 57}.com"
+        contact, entry = self.enqueue(email)
+
+        self.assertLessEqual(len(entry.idempotency_key), 255)
+        self.assertEqual(enqueue_contact_sync(contact).pk, entry.pk)
+        self.assertEqual(OmnisendOutbox.objects.count(), 1)
+
+    def test_claimed_entries_are_not_claimed_twice(self):
+        self.enqueue("one@example.com")
+        self.enqueue("two@example.com")
+
+        first = claim_batch(10)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(claim_batch(10), [])
+        self.assertTrue(all(entry.status == OmnisendOutbox.Status.PROCESSING for entry in first))
+
+        # A worker that died keeps its claim until the lock goes stale
+        OmnisendOutbox.objects.update(locked_at=timezone.now() - timedelta(seconds=301))
+        self.assertEqual(len(claim_batch(10)), 2)
+
+    def test_transient_error_backs_off(self):
+        _, entry = self.enqueue("reader@example.com")
+        self.omnisend.scripts["reader@example.com"] = [(503, {"error": "unavailable"})]
+
+        before = timezone.now()
+        self.assertEqual(drain_outbox(), (0, 1))
+
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, OmnisendOutbox.Status.PENDING)
+        self.assertEqual(entry.attempts, 1)
+        self.assertIn("503", entry.last_error)
+        self.assertGreaterEqual(entry.next_attempt_at, before + timedelta(seconds=24))
+        self.assertLessEqual(entry.next_attempt_at, timezone.now() + timedelta(seconds=36))
+        # Not due yet
+        self.assertEqual(drain_outbox(), (0, 0))
+        self.assertEqual(len(self.omnisend.calls), 1)
+
+        self.make_due()
+        self.assertEqual(drain_outbox(), (1, 0))
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, OmnisendOutbox.Status.DONE)
+        self.assertEqual(entry.attempts, 2)
+
+    def test_gives_up_after_max_attempts(self):
+        _, entry = self.enqueue("reader@example.com")
+        self.omnisend.scripts["reader@example.com"] = [(429, {})] * 3
+
+        for _ in range(3):
+            self.make_due()
+            drain_outbox()
+
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, OmnisendOutbox.Status.DEAD)
+        self.assertEqual(entry.attempts, 3)
+        self.assertIsNotNone(entry.processed_at)
+        self.make_due()
+        self.assertEqual(drain_outbox(), (0, 0))
+        self.assertEqual(len(self.omnisend.calls), 3)
+
+    def test_client_error_is_not_retried(self):
+        _, entry = self.enqueue("reader@example.com")
+        self.omnisend.scripts["reader@example.com"] = [(400, {"error": "invalid email"})]
+
+        self.assertEqual(drain_outbox(), (0, 1))
+
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, OmnisendOutbox.Status.DEAD)
+        self.assertEqual(entry.attempts, 1)
+
+    def test_dead_entry_is_revived_on_signup(self):
+        contact, entry = self.enqueue("reader@example.com")
+        self.omnisend.scripts["reader@example.com"] = [(400, {})]
+        drain_outbox()
+
+        enqueue_contact_sync(contact)
+
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, OmnisendOutbox.Status.PENDING)
+        self.assertEqual(entry.attempts, 0)
+        self.assertEqual(drain_outbox(), (1, 0))
+
+    def test_conflict_replay_keeps_existing_omnisend_id(self):
+        contact, entry = self.enqueue("reader@example.com")
+        OmnisendContacts.objects.filter(pk=contact.pk).update(omnisend_id="omni-original")
+        self.omnisend.scripts["reader@example.com"] = [(409, {"contactID": "omni-other"})]
+
+        self.assertEqual(drain_outbox(), (1, 0))
+
+        contact.refresh_from_db()
+        entry.refresh_from_db()
+        self.assertEqual(contact.omnisend_id, "omni-original")
+        self.assertEqual(entry.status, OmnisendOutbox.Status.DONE)
+
+    def test_conflict_fills_in_missing_omnisend_id(self):
+        contact, _ = self.enqueue("reader@example.com")
+        self.omnisend.scripts["reader@example.com"] = [(409, {"contactID": "omni-existing"})]
+
+        self.assertEqual(drain_outbox(), (1, 0))
+
+        contact.refresh_from_db()
+        self.assertEqual(contact.omnisend_id, "omni-existing")
+
+    def test_result_is_dropped_when_lock_was_reclaimed(self):
+        contact, entry = self.enqueue("reader@example.com")
+        (claimed,) = claim_batch(10)
+        # The lock went stale and another worker claimed the entry meanwhile
+        OmnisendOutbox.objects.update(locked_at=timezone.now() - timedelta(seconds=301))
+        (reclaimed,) = claim_batch(10)
+
+        self.assertIsNone(_record_result(claimed, {"success": True, "data": {"contactID": "omni-stale"}}))
+
+        entry.refresh_from_db()
+        contact.refresh_from_db()
+        self.assertEqual(entry.status, OmnisendOutbox.Status.PROCESSING)
+        self.assertEqual(entry.lock_token, reclaimed.lock_token)
+        self.assertEqual(entry.attempts, 0)
+        self.assertIsNone(contact.omnisend_id)
+
+        self.assertTrue(_record_result(reclaimed, {"success": True, "data": {"contactID": "omni-1"}}))
+        contact.refresh_from_db()
+        self.assertEqual(contact.omnisend_id, "omni-1")
+
+    @override_settings(OMNISEND_API_KEY=None)
+    def test_missing_api_key_leaves_entries_pending(self):
+        _, entry = self.enqueue("reader@example.com")
+
+        with self.assertRaises(OmnisendNotConfigured):
+            drain_outbox()
+        with self.assertRaises(CommandError):
+            call_command("sync_omnisend_contacts")
+
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, OmnisendOutbox.Status.PENDING)
+        self.assertEqual(entry.attempts, 0)
+        self.assertIsNone(entry.lock_token)
+        self.assertEqual(self.omnisend.calls, [])
+
+    def test_command_reports_counts(self):
+        self.enqueue("one@example.com")
+        self.enqueue("two@example.com")
+        self.omnisend.scripts["two@example.com"] = [(500, {})]
+        out = io.StringIO()
+
+        call_command("sync_omnisend_contacts", stdout=out)
+
+        self.assertIn("Synced 1 contacts, 1 failed", out.getvalue())
@@ -4,7 +4,6 @@ from rest_framework.views import APIView
 from django.http import JsonResponse
 from django.db import transaction
 from rest_framework_simplejwt.tokens import RefreshToken
-import requests
 from rest_framework import status, permissions, generics
 import traceback
 from user.models import UserAuth, AdminProfile, UserProfile, SubscriberProfile, OmnisendContacts
@@ -14,16 +13,23 @@ from django.contrib.auth import authenticate
 from django.contrib.auth.backends import BaseBackend
 from django.contrib.auth.hashers import check_password
 from user.tokens import CustomTokenObtainPairSerializer
+from user.google_auth import resolve_google_token
+from user.omnisend import enqueue_contact_sync
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from common.views import CustomJWTAuthentication, IsAdminUser, IsSubscriberUser
 from user.serializers import UserProfileSerializer, OmnisendContactsSerializer, OmnisendContactsUpdateSerializer
 from rest_framework.parsers import MultiPartParser, FormParser
-from common.utils.s3_utils import upload_image_to_s3, delete_image_from_s3
+from common.utils.image_variants import upload_image_with_variants, delete_image_variants
+from common.utils.s3_utils import delete_image_from_s3
 from common.constants import S3_USER_BUCKET_NAME, S3_BLOG_BUCKET_NAME
 from rest_framework.pagination import PageNumberPagination
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.utils import timezone
+from common.utils.streaming import stream_csv, stream_jsonl
+import datetime
 
 
 # Google Sign in functionality
@@ -39,18 +45,13 @@ class GoogleSigninView(APIView):
 
     def handle_google_signin(self, token):
         try:
-            # Fetch user info from Google using access token
-            user_info_url = "https://www.googleapis.com/oauth2/v2/userinfo"
-            headers = {"Authorization": f"Bearer {token}"}
-            try:
-                response = requests.get(user_info_url, headers=headers, timeout=10)
-            except requests.exceptions.RequestException as e:
-                return Response({"error": "Failed to connect to Google"}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
-
-            if response.status_code != 200:
-                return Response({"error": "Failed to fetch user info from Google"}, status=status.HTTP_400_BAD_REQUEST)
+            # ID tokens are verified locally against Google's cached keys; access tokens go to userinfo
+            result = resolve_google_token(token)
+            if result['error']:
+                error_status = status.HTTP_503_SERVICE_UNAVAILABLE if result.get('unavailable') else status.HTTP_400_BAD_REQUEST
+                return Response({"error": result['message']}, status=error_status)
 
-            user_info = response.json()
+            user_info = result['user_info']
 
             if not user_info.get('verified_email'):
                 return Response({"error": "Email not verified by Google"}, status=status.HTTP_400_BAD_REQUEST)
@@ -286,6 +287,7 @@ class AuthenticatedUserView(APIView):
             "name": "",
             "image_key": "",
             "image_url": "",
+            "image_variants": {},
             "occupation": "",
             "bio": "",
             "subscription_start": None,
@@ -324,6 +326,7 @@ class AuthenticatedUserView(APIView):
                 "name": user_profile.name,
                 "image_url": user_profile.image_url or "",
                 "image_key": user_profile.image_key or "",
+                "image_variants": user_profile.image_variants,
                 "occupation": user_profile.occupation or "",
                 "bio": user_profile.bio or "",
             })
@@ -405,13 +408,14 @@ class S3UserImageManager(APIView):
             return Response({'error': 'No file provided'}, status=400)
 
         bucket = S3_BLOG_BUCKET_NAME
-        response = upload_image_to_s3(image_file=upload_file, folder=folder, bucket=bucket)
+        response = upload_image_with_variants(image_file=upload_file, folder=folder, bucket=bucket)
 
         if not response['error']:
             return Response({
                 'message': response['message'],
                 'url': response['url'],
-                'key': response['key']
+                'key': response['key'],
+                'variants': response['variants'],
             }, status=200)
         
         return Response({'message': response['message']}, status=400)
@@ -428,6 +432,7 @@ class S3UserImageManager(APIView):
 
         bucket = S3_BLOG_BUCKET_NAME
         response = delete_image_from_s3(bucket=bucket, image_key=file_key)
+        delete_image_variants(bucket=bucket, image_key=file_key)
 
         if not response['error']:
             return Response({'message': response['message']}, status=200)
@@ -664,75 +669,14 @@ class GetAllUsersView(APIView):
     def get_single_user(self, email):
         """Get detailed information for a single user"""
         try:
-            # Try to get user by ID first
-            try:
-                user = UserAuth.objects.get(email=email)
-            except UserAuth.DoesNotExist:
+            user = admin_users_queryset().filter(email=email).first()
+            if user is None:
                 return Response({
                     "error": f"User with email '{email}' not found"
                 }, status=status.HTTP_404_NOT_FOUND)
 
-            user_data = {
-                "email": user.email,
-                "unique_id": user.unique_id,
-                "is_staff": user.is_staff,
-                "is_subscriber": user.is_subscriber,
-                "is_active": user.is_active,
-                "is_verified": user.is_verified,
-                "is_superuser": user.is_superuser,
-                "auth_type": user.auth_type,
-                "date_joined": user.date_joined,
-                "last_login": user.last_login,
-                "profiles": {}
-            }
-            
-            # Get UserProfile if exists
-            try:
-                user_profile = UserProfile.objects.get(user=user)
-                user_data["profiles"]["user_profile"] = {
-                    "name": user_profile.name,
-                    "image_url": user_profile.image_url,
-                    "image_key": user_profile.image_key,
-                    "occupation": user_profile.occupation,
-                    "bio": user_profile.bio
-                }
-            except UserProfile.DoesNotExist:
-                user_data["profiles"]["user_profile"] = None
-            
-            # Get SubscriberProfile if exists
-            try:
-                subscriber_profile = SubscriberProfile.objects.get(user=user)
-                user_data["profiles"]["subscriber_profile"] = {
-                    "full_name": subscriber_profile.full_name,
-                    "subscription_plan": subscriber_profile.subscription_plan,
-                    "subscription_start": subscriber_profile.subscription_start,
-                    "subscription_end": subscriber_profile.subscription_end,
-                    "active": subscriber_profile.active
-                }
-            except SubscriberProfile.DoesNotExist:
-                user_data["profiles"]["subscriber_profile"] = None
-            
-            # Get AdminProfile if exists
-            try:
-                admin_profile = AdminProfile.objects.get(user=user)
-                user_data["profiles"]["admin_profile"] = {
-                    "full_name": admin_profile.full_name,
-                    "joined_on": admin_profile.joined_on,
-                    "active": admin_profile.active
-                }
-            except AdminProfile.DoesNotExist:
-                user_data["profiles"]["admin_profile"] = None
-            
-            # Determine the primary profile type
-            if user.is_staff:
-                user_data["primary_profile"] = "admin"
-            elif user.is_subscriber:
-                user_data["primary_profile"] = "subscriber"
-            else:
-                user_data["primary_profile"] = "user"
-
             return Response({
-                "user": user_data,
+                "user": serialize_admin_user(user),
                 "message": f"User details retrieved successfully for {user.email or user.unique_id}"
             }, status=status.HTTP_200_OK)
 
@@ -744,79 +688,16 @@ class GetAllUsersView(APIView):
 
     def get_all_users(self, request):
         """Get all users with pagination"""
+        users_queryset, error = filter_admin_users(admin_users_queryset(), request.query_params)
+        if error:
+            return Response(error, status=status.HTTP_400_BAD_REQUEST)
+
         try:
-            # Get all users from UserAuth
-            users_queryset = UserAuth.objects.all().order_by('-date_joined')
-            
-            users_data = []
-            
-            for user in users_queryset:
-                user_data = {
-                    "email": user.email,
-                    "unique_id": user.unique_id,
-                    "is_staff": user.is_staff,
-                    "is_subscriber": user.is_subscriber,
-                    "is_active": user.is_active,
-                    "is_verified": user.is_verified,
-                    "is_superuser": user.is_superuser,
-                    "auth_type": user.auth_type,
-                    "date_joined": user.date_joined,
-                    "last_login": user.last_login,
-                    "profiles": {}
-                }
-                
-                # Get UserProfile if exists
-                try:
-                    user_profile = UserProfile.objects.get(user=user)
-                    user_data["profiles"]["user_profile"] = {
-                        "name": user_profile.name,
-                        "image_url": user_profile.image_url,
-                        "image_key": user_profile.image_key,
-                        "occupation": user_profile.occupation,
-                        "bio": user_profile.bio
-                    }
-                except UserProfile.DoesNotExist:
-                    user_data["profiles"]["user_profile"] = None
-                
-                # Get SubscriberProfile if exists
-                try:
-                    subscriber_profile = SubscriberProfile.objects.get(user=user)
-                    user_data["profiles"]["subscriber_profile"] = {
-                        "full_name": subscriber_profile.full_name,
-                        "subscription_plan": subscriber_profile.subscription_plan,
-                        "subscription_start": subscriber_profile.subscription_start,
-                        "subscription_end": subscriber_profile.subscription_end,
-                        "active": subscriber_profile.active
-                    }
-                except SubscriberProfile.DoesNotExist:
-                    user_data["profiles"]["subscriber_profile"] = None
-                
-                # Get AdminProfile if exists
-                try:
-                    admin_profile = AdminProfile.objects.get(user=user)
-                    user_data["profiles"]["admin_profile"] = {
-                        "full_name": admin_profile.full_name,
-                        "joined_on": admin_profile.joined_on,
-                        "active": admin_profile.active
-                    }
-                except AdminProfile.DoesNotExist:
-                    user_data["profiles"]["admin_profile"] = None
-                
-                # Determine the primary profile type
-                if user.is_staff:
-                    user_data["primary_profile"] = "admin"
-                elif user.is_subscriber:
-                    user_data["primary_profile"] = "subscriber"
-                else:
-                    user_data["primary_profile"] = "user"
-                
-                users_data.append(user_data)
-            
-            # Use custom pagination
+            # Paginated in the database; profiles come from the same query
             paginator = self.CustomPagination()
-            result_page = paginator.paginate_queryset(users_data, request)
-            
-            return paginator.get_paginated_response(result_page)
+            result_page = paginator.paginate_queryset(users_queryset.order_by('-date_joined', '-id'), request)
+
+            return paginator.get_paginated_response([serialize_admin_user(user) for user in result_page])
 
         except Exception as e:
             print('Error fetching all users:', e)
@@ -825,6 +706,148 @@ class GetAllUsersView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+USER_EXPORT_CSV_HEADER = [
+    "email", "unique_id", "is_staff", "is_subscriber", "is_active", "is_verified", "is_superuser",
+    "auth_type", "date_joined", "last_login", "primary_profile",
+    "user_name", "occupation", "subscriber_name", "subscription_plan", "subscription_start",
+    "subscription_end", "subscription_active", "admin_name",
+]
+
+
+class ExportUsersView(APIView):
+    """
+    Stream all users matching the GetAllUsersView filters as CSV (default) or
+    JSON Lines (`?type=jsonl`). Rows are read with a chunked iterator, so
+    memory stays flat however many users there are.
+    """
+    authentication_classes = [CustomJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        export_type = request.query_params.get("type", "csv")
+        if export_type not in ("csv", "jsonl"):
+            return Response({"error": "type must be 'csv' or 'jsonl'"}, status=status.HTTP_400_BAD_REQUEST)
+
+        users_queryset, error = filter_admin_users(admin_users_queryset(), request.query_params)
+        if error:
+            return Response(error, status=status.HTTP_400_BAD_REQUEST)
+
+        users = users_queryset.order_by('-date_joined', '-id').iterator(chunk_size=settings.USER_EXPORT_CHUNK_SIZE)
+        filename = f"users-{timezone.now():%Y%m%d-%H%M%S}.{export_type}"
+
+        if export_type == "jsonl":
+            return stream_jsonl((serialize_admin_user(user) for user in users), filename)
+        return stream_csv((_user_csv_row(user) for user in users), USER_EXPORT_CSV_HEADER, filename)
+
+
+def admin_users_queryset():
+    return UserAuth.objects.select_related('profile', 'subscriber_profile', 'admin_profile')
+
+
+def filter_admin_users(queryset, params):
+    """
+    Apply the admin user list filters:
+    ?is_subscriber=true|false&auth_type=google&joined_from=2025-01-01&joined_to=2025-01-31&email_prefix=ann
+    Returns (queryset, error dict or None).
+    """
+    is_subscriber = params.get('is_subscriber')
+    if is_subscriber in ('true', 'True', '1'):
+        queryset = queryset.filter(is_subscriber=True)
+    elif is_subscriber in ('false', 'False', '0'):
+        queryset = queryset.filter(is_subscriber=False)
+
+    auth_type = params.get('auth_type')
+    if auth_type:
+        queryset = queryset.filter(auth_type=auth_type)
+
+    for param, lookup in (('joined_from', 'date_joined__date__gte'), ('joined_to', 'date_joined__date__lte')):
+        value = params.get(param)
+        if not value:
+            continue
+        try:
+            queryset = queryset.filter(**{lookup: datetime.date.fromisoformat(value)})
+        except ValueError:
+            return None, {"error": f"{param} must be a date (YYYY-MM-DD)"}
+
+    email_prefix = params.get('email_prefix')
+    if email_prefix:
+        queryset = queryset.filter(email__istartswith=email_prefix)
+
+    return queryset, None
+
+
+def _related_or_none(user, relation):
+    # select_related() has already cached the profile (or its absence), no query here
+    try:
+        return getattr(user, relation)
+    except ObjectDoesNotExist:
+        return None
+
+
+def serialize_admin_user(user):
+    user_profile = _related_or_none(user, 'profile')
+    subscriber_profile = _related_or_none(user, 'subscriber_profile')
+    admin_profile = _related_or_none(user, 'admin_profile')
+
+    if user.is_staff:
+        primary_profile = "admin"
+    elif user.is_subscriber:
+        primary_profile = "subscriber"
+    else:
+        primary_profile = "user"
+
+    return {
+        "email": user.email,
+        "unique_id": user.unique_id,
+        "is_staff": user.is_staff,
+        "is_subscriber": user.is_subscriber,
+        "is_active": user.is_active,
+        "is_verified": user.is_verified,
+        "is_superuser": user.is_superuser,
+        "auth_type": user.auth_type,
+        "date_joined": user.date_joined,
+        "last_login": user.last_login,
+        "profiles": {
+            "user_profile": {
+                "name": user_profile.name,
+                "image_url": user_profile.image_url,
+                "image_key": user_profile.image_key,
+                "occupation": user_profile.occupation,
+                "bio": user_profile.bio
+            } if user_profile else None,
+            "subscriber_profile": {
+                "full_name": subscriber_profile.full_name,
+                "subscription_plan": subscriber_profile.subscription_plan,
+                "subscription_start": subscriber_profile.subscription_start,
+                "subscription_end": subscriber_profile.subscription_end,
+                "active": subscriber_profile.active
+            } if subscriber_profile else None,
+            "admin_profile": {
+                "full_name": admin_profile.full_name,
+                "joined_on": admin_profile.joined_on,
+                "active": admin_profile.active
+            } if admin_profile else None,
+        },
+        "primary_profile": primary_profile,
+    }
+
+
+def _user_csv_row(user):
+    data = serialize_admin_user(user)
+    user_profile = data["profiles"]["user_profile"] or {}
+    subscriber_profile = data["profiles"]["subscriber_profile"] or {}
+    admin_profile = data["profiles"]["admin_profile"] or {}
+    return [
+        data["email"], data["unique_id"], data["is_staff"], data["is_subscriber"], data["is_active"],
+        data["is_verified"], data["is_superuser"], data["auth_type"], data["date_joined"], data["last_login"],
+        data["primary_profile"],
+        user_profile.get("name"), user_profile.get("occupation"),
+        subscriber_profile.get("full_name"), subscriber_profile.get("subscription_plan"),
+        subscriber_profile.get("subscription_start"), subscriber_profile.get("subscription_end"),
+        subscriber_profile.get("active"),
+        admin_profile.get("full_name"),
+    ]
+
 
 class GetUserSubscriptionDetails(APIView):
     authentication_classes = [CustomJWTAuthentication]
@@ -861,8 +884,6 @@ class GetUserSubscriptionDetails(APIView):
         return Response(subscription_details, status=status.HTTP_200_OK)
 
 
-OMNISEND_BASE_URL = "https://api.omnisend.com/v5/contacts"
-OMNISEND_API_KEY = settings.OMNISEND_API_KEY
 class OmnisendContactsView(APIView):
     authentication_classes = [CustomJWTAuthentication]
 
@@ -875,78 +896,17 @@ class OmnisendContactsView(APIView):
             return [permissions.AllowAny()]
         return [permissions.IsAdminUser()]
 
-    @staticmethod
-    def create_omnisend_contact(email: str, custom_properties: dict = None, status: str = "nonSubscribed"):
-        """
-        Creates a contact in Omnisend via API.
-        Returns dict {"success": True, "data": {...}} on success
-        or {"success": False, "error": "message"} on failure.
-        """
-        if not OMNISEND_API_KEY:
-            return {"success": False, "error": "Omnisend API key not configured."}
-
-        headers = {
-            "X-API-KEY": OMNISEND_API_KEY,
-            "accept": "application/json",
-            "content-type": "application/json"
-        }
-
-        payload = {
-            "customProperties": custom_properties or {},
-            "identifiers": [
-                {
-                    "channels": {
-                        "email": {
-                            "status": status
-                        }
-                    },
-                    "type": "email",
-                    "id": email
-                }
-            ]
-        }
-
-        try:
-            response = requests.post(OMNISEND_BASE_URL, json=payload, headers=headers, timeout=10)
-
-            if response.status_code == 200 or response.status_code == 201:
-                return {"success": True, "data": response.json()}
-
-            elif response.status_code == 409:
-                # Already exists — return response anyway
-                return {"success": True, "data": response.json()}
-
-            else:
-                return {
-                    "success": False,
-                    "error": f"Omnisend API error {response.status_code}: {response.text}"
-                }
-
-        except requests.Timeout:
-            return {"success": False, "error": "Omnisend API request timed out."}
-        except requests.RequestException as e:
-            return {"success": False, "error": str(e)}
-
     # Public POST: subscribe user
     def post(self, request):
         email = request.data.get("email")
         if not email:
             return Response({"detail": "Email is required"}, status=status.HTTP_400_BAD_REQUEST)
 
-        contact, created = OmnisendContacts.objects.get_or_create(email=email)
-
-        omni_response = self.create_omnisend_contact(email=email, status="nonSubscribed")
-
-        if omni_response["success"]:
-            data = omni_response["data"]
-            contact.omnisend_id = data.get("contactID", contact.omnisend_id)
-            contact.save()
-        else:
-            # Do not fail user signup just because Omnisend failed
-            return Response(
-                {"detail": "Contact saved locally, but Omnisend sync failed.", "error": omni_response["error"]},
-                status=status.HTTP_202_ACCEPTED
-            )
+        # Omnisend is called later by `sync_omnisend_contacts`, which fills in omnisend_id
+        with transaction.atomic():
+            contact, created = OmnisendContacts.objects.get_or_create(email=email)
+            if not contact.omnisend_id:
+                enqueue_contact_sync(contact, status="nonSubscribed")
 
         serializer = OmnisendContactsSerializer(contact)
         return Response(serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)